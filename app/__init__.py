@@ -71,6 +71,8 @@ def create_app():
     from app.api.treatment_routes import bp as treatment_bp
     from app.api.report_routes import bp as reports_bp
     from app.api.report_management_routes import bp as report_management_bp
+    from app.api.search_routes import bp as search_bp
+    from app.api.export_routes import bp as export_bp
     
     app.register_blueprint(context_bp)
     app.register_blueprint(asset_bp)
@@ -86,6 +88,8 @@ def create_app():
     app.register_blueprint(treatment_bp)
     app.register_blueprint(reports_bp)
     app.register_blueprint(report_management_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(export_bp)
     
     # Маршрут для главной страницы
     @app.route('/')
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import AssetDependency, Asset
+from app.utils.dependency_graph import get_dependency_graph, invalidate_dependency_graph
+from app.utils.dependency_utils import recalculate_dependency_values
 
 bp = Blueprint('asset_dependency_bp', __name__, url_prefix='/api/asset-dependencies')
 
@@ -78,77 +80,111 @@ def get_dependencies_for_asset(asset_id):
 
 @bp.route('/bulk-update', methods=['POST'])
 def bulk_update_dependencies():
-    """Массовое обновление зависимостей активов"""
+    """
+    Массовое обновление зависимостей активов
+    
+    Присланная матрица сравнивается с сохраненными зависимостями: удаляются
+    только исчезнувшие связи, добавляются только новые, у сохранившихся
+    обновляется relationship_type, если он изменился, а dependency_value
+    пересчитывается лишь для активов, затронутых изменившимися связями.
+    """
     data = request.get_json()
     dependencies_data = data.get('dependencies', [])
     
-    # Получаем все уникальные asset_id из текущих зависимостей в БД
-    all_existing_deps = AssetDependency.query.all()
-    all_asset_ids_with_deps = set([dep.asset_id for dep in all_existing_deps])
-    
-    # Добавляем asset_id из новых данных
-    new_asset_ids = set([dep['asset_id'] for dep in dependencies_data])
-    all_affected_asset_ids = all_asset_ids_with_deps.union(new_asset_ids)
-    
-    # Также добавляем все активы, чтобы очистить dependency_value у тех, кто потерял зависимости
-    all_assets = Asset.query.all()
-    for asset in all_assets:
-        all_affected_asset_ids.add(asset.id)
-    
-    # Удаляем ВСЕ существующие зависимости
-    AssetDependency.query.delete()
-    db.session.commit()
-    
-    # Создаем новые зависимости
+    new_edges = {}
     for dep_data in dependencies_data:
-        dependency = AssetDependency(
-            asset_id=dep_data.get('asset_id'),
-            depends_on_asset_id=dep_data.get('depends_on_asset_id'),
-            relationship_type=dep_data.get('relationship_type', '+')
+        edge = (int(dep_data['asset_id']), int(dep_data['depends_on_asset_id']))
+        new_edges[edge] = dep_data.get('relationship_type', '+')
+    
+    # Текущие зависимости одним запросом
+    stored_edges = {
+        (asset_id, depends_on_asset_id): (dep_id, relationship_type)
+        for dep_id, asset_id, depends_on_asset_id, relationship_type in db.session.query(
+            AssetDependency.id, AssetDependency.asset_id, AssetDependency.depends_on_asset_id,
+            AssetDependency.relationship_type
         )
-        db.session.add(dependency)
-    
+    }
+    
+    removed = [edge for edge in stored_edges if edge not in new_edges]
+    added = [edge for edge in new_edges if edge not in stored_edges]
+    updated = [
+        edge for edge, (_, relationship_type) in stored_edges.items()
+        if edge in new_edges and new_edges[edge] != relationship_type
+    ]
+    
+    if removed:
+        removed_ids = [stored_edges[edge][0] for edge in removed]
+        AssetDependency.query.filter(AssetDependency.id.in_(removed_ids)).delete(synchronize_session=False)
+    if added:
+        db.session.bulk_insert_mappings(AssetDependency, [
+            {'asset_id': asset_id, 'depends_on_asset_id': depends_on_asset_id, 'relationship_type': new_edges[(asset_id, depends_on_asset_id)]}
+            for asset_id, depends_on_asset_id in added
+        ])
+    if updated:
+        db.session.bulk_update_mappings(AssetDependency, [
+            {'id': stored_edges[edge][0], 'relationship_type': new_edges[edge]}
+            for edge in updated
+        ])
+    # Пакетные операции не вызывают событий модели, версию графа увеличиваем явно
+    if removed or added or updated:
+        invalidate_dependency_graph()
     db.session.commit()
     
-    # Пересчитываем dependency_value для всех активов
-    for asset_id in all_affected_asset_ids:
-        asset = Asset.query.get(asset_id)
-        if not asset:
-            continue
-            
-        # Проверяем, есть ли у актива зависимости после обновления
-        asset_deps = AssetDependency.query.filter_by(asset_id=asset_id).all()
-        
-        if not asset_deps:
-            # Если зависимостей нет, очищаем dependency_value
-            asset.dependency_value = None
-        else:
-            # Если есть зависимости, пересчитываем dependency_value
-            # Собираем все связанные активы (сам актив + активы, от которых он зависит)
-            related_asset_ids = [asset_id]
-            for dep in asset_deps:
-                related_asset_ids.append(dep.depends_on_asset_id)
-            
-            # Находим максимальную ценность без зависимостей среди всех связанных активов
-            max_value_without_deps = None
-            priority_map = {'Н': 1, 'С': 2, 'В': 3}
-            max_priority = 0
-            
-            for related_id in related_asset_ids:
-                related_asset = Asset.query.get(related_id)
-                if related_asset and related_asset.value_without_dependencies:
-                    asset_priority = priority_map.get(related_asset.value_without_dependencies, 0)
-                    if asset_priority > max_priority:
-                        max_priority = asset_priority
-                        max_value_without_deps = related_asset.value_without_dependencies
-            
-            # Преобразуем в формат для dependency_value
-            if max_value_without_deps:
-                dependency_value_map = {'Н': 'низкая', 'С': 'средняя', 'В': 'высокая'}
-                asset.dependency_value = dependency_value_map.get(max_value_without_deps, 'средняя')
-            else:
-                asset.dependency_value = None
-    
-    db.session.commit()
-    
-    return jsonify({'success': True})
\ No newline at end of file
+    # Пересчитываем только активы, у которых изменились исходящие связи,
+    # и активы, транзитивно зависящие от них
+    changed_sources = {asset_id for asset_id, _ in removed + added + updated}
+    changed_assets = []
+    if changed_sources:
+        sources_by_context = {}
+        for asset_id, context_id in db.session.query(Asset.id, Asset.context_id).filter(Asset.id.in_(changed_sources)):
+            sources_by_context.setdefault(context_id, set()).add(asset_id)
+        for context_id, asset_ids in sources_by_context.items():
+            changed_assets.extend(recalculate_dependency_values(context_id, changed_asset_ids=asset_ids))
+    
+    return jsonify({
+        'success': True,
+        'added': len(added),
+        'removed': len(removed),
+        'updated': len(updated),
+        'changed_assets': sorted(changed_assets)
+    })
+
+
+@bp.route('/graph/<int:context_id>', methods=['GET'])
+def get_dependency_graph_summary(context_id):
+    """Сводка по графу зависимостей контекста"""
+    graph = get_dependency_graph(context_id)
+    result = graph.to_dict()
+    result['context_id'] = context_id
+    result['cycles'] = len(graph.cycles())
+    return jsonify(result)
+
+@bp.route('/graph/<int:context_id>/dependents/<int:asset_id>', methods=['GET'])
+def get_graph_dependents(context_id, asset_id):
+    """Активы, прямо или транзитивно зависящие от актива"""
+    graph = get_dependency_graph(context_id)
+    if request.args.get('direct') == 'true':
+        dependents = graph.direct_dependents(asset_id)
+    else:
+        dependents = graph.dependents(asset_id)
+    return jsonify({'asset_id': asset_id, 'dependents': sorted(dependents)})
+
+@bp.route('/graph/<int:context_id>/dependencies/<int:asset_id>', methods=['GET'])
+def get_graph_dependencies(context_id, asset_id):
+    """Активы, от которых актив зависит прямо или транзитивно"""
+    graph = get_dependency_graph(context_id)
+    if request.args.get('direct') == 'true':
+        dependencies = graph.direct_dependencies(asset_id)
+    else:
+        dependencies = graph.dependencies(asset_id)
+    return jsonify({'asset_id': asset_id, 'dependencies': sorted(dependencies)})
+
+@bp.route('/graph/<int:context_id>/cycles', methods=['GET'])
+def get_graph_cycles(context_id):
+    """Циклические зависимости в контексте"""
+    return jsonify(get_dependency_graph(context_id).cycles())
+
+@bp.route('/graph/<int:context_id>/topological-order', methods=['GET'])
+def get_graph_topological_order(context_id):
+    """Активы контекста в порядке зависимостей"""
+    return jsonify(get_dependency_graph(context_id).topological_order())
@@ -1,124 +1,21 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Asset, AssetDependency, AssetImpactAssessment, AssetSecurityPropertyImpact, ImpactCriterion, ContextImpactCriterion
+from app.utils.dependency_utils import recalculate_dependency_values
 from datetime import datetime
 
 bp = Blueprint('asset_bp', __name__, url_prefix='/api/assets')
 
-def update_dependent_assets(asset_id, new_dependency_value, visited_assets=None):
-    """
-    Обновляет dependency_value для всех активов, которые зависят от данного актива
-    (только если у них есть зависимости)
-    """
-    if new_dependency_value is None:
-        return
-    
-    if visited_assets is None:
-        visited_assets = set()
-    
-    # Избегаем циклических зависимостей
-    if asset_id in visited_assets:
-        return
-    visited_assets.add(asset_id)
-    
-    # Находим все зависимости, где данный актив является "depends_on_asset_id"
-    # (т.е. другие активы зависят от него)
-    dependencies = AssetDependency.query.filter_by(depends_on_asset_id=asset_id).all()
-    
-    for dep in dependencies:
-        # Получаем актив, который зависит от текущего актива
-        dependent_asset = Asset.query.get(dep.asset_id)
-        if dependent_asset:
-            # Проверяем, есть ли у зависимого актива собственные зависимости
-            # (только тогда мы устанавливаем ему dependency_value)
-            dependent_asset_dependencies = AssetDependency.query.filter_by(asset_id=dependent_asset.id).all()
-            
-            if dependent_asset_dependencies:  # Только если у актива есть зависимости
-                # Преобразуем значения для сравнения
-                dependency_value_map = {'низкая': 1, 'средняя': 2, 'высокая': 3}
-                
-                current_dep_priority = dependency_value_map.get(dependent_asset.dependency_value, 0) if dependent_asset.dependency_value else 0
-                new_dep_priority = dependency_value_map.get(new_dependency_value, 0)
-                
-                # Обновляем только если новое значение выше текущего
-                if new_dep_priority > current_dep_priority:
-                    # Обновляем dependency_value
-                    dependent_asset.dependency_value = new_dependency_value
-                    
-                    # НЕ обновляем value_without_dependencies - это независимая характеристика
-                    
-                    # Обновляем final_value если необходимо
-                    if new_dependency_value == 'высокая' and dependent_asset.final_value != 'В':
-                        dependent_asset.final_value = 'В'
-                    elif new_dependency_value == 'средняя' and dependent_asset.final_value == 'Н':
-                        dependent_asset.final_value = 'С'
-                    
-                    db.session.commit()
-                    
-                    # Рекурсивно обновляем активы, зависящие от только что обновленного актива
-                    update_dependent_assets(dependent_asset.id, new_dependency_value, visited_assets)
-
-
 def recalculate_asset_dependencies(asset_id):
     """
-    Пересчитывает dependency_value для актива на основе максимальной ценности без зависимостей
-    всех связанных активов (только если у актива есть зависимости)
+    Пересчитывает dependency_value актива и всех связанных с ним активов
+    контекста (значения только повышаются, не понижаются)
     """
     asset = Asset.query.get(asset_id)
     if not asset:
-        return
-    
-    # Находим все зависимости, где данный актив является "asset_id"
-    # (т.е. он зависит от других активов)
-    dependencies = AssetDependency.query.filter_by(asset_id=asset_id).all()
-    
-    # Если у актива нет зависимостей, очищаем dependency_value
-    if not dependencies:
-        if asset.dependency_value is not None:
-            asset.dependency_value = None
-            db.session.commit()
-        return
-    
-    # Собираем все связанные активы (сам актив + активы, от которых он зависит)
-    related_asset_ids = [asset_id]
-    for dep in dependencies:
-        related_asset_ids.append(dep.depends_on_asset_id)
-    
-    # Находим максимальную ценность без зависимостей среди всех связанных активов
-    max_value_without_deps = None
-    priority_map = {'Н': 1, 'С': 2, 'В': 3}
-    
-    for related_id in related_asset_ids:
-        related_asset = Asset.query.get(related_id)
-        if related_asset and related_asset.value_without_dependencies:
-            asset_priority = priority_map.get(related_asset.value_without_dependencies, 0)
-            if max_value_without_deps is None or asset_priority > priority_map.get(max_value_without_deps, 0):
-                max_value_without_deps = related_asset.value_without_dependencies
+        return []
     
-    # Если не нашли ценность без зависимостей, используем текущее значение или устанавливаем по умолчанию
-    if max_value_without_deps is None:
-        max_value_without_deps = asset.value_without_dependencies or 'С'  # По умолчанию средняя
-    
-    # Преобразуем в формат для dependency_value
-    dependency_value_map = {'Н': 'низкая', 'С': 'средняя', 'В': 'высокая'}
-    max_dependency_value = dependency_value_map.get(max_value_without_deps, 'средняя')
-    
-    # Обновляем значение, если оно увеличилось (только повышаем, не понижаем)
-    if asset.dependency_value != max_dependency_value and max_dependency_value is not None:
-        # Убедимся, что значение только увеличивается, не уменьшается
-        priority_map_dep = {'низкая': 1, 'средняя': 2, 'высокая': 3}
-        current_priority = priority_map_dep.get(asset.dependency_value, 0) if asset.dependency_value else 0
-        new_priority = priority_map_dep.get(max_dependency_value, 0) if max_dependency_value else 0
-        
-        if new_priority > current_priority:  # Только если новое значение выше
-            old_dependency_value = asset.dependency_value
-            asset.dependency_value = max_dependency_value
-            # НЕ обновляем value_without_dependencies - это независимая характеристика
-            db.session.commit()
-            
-            # Если значение изменилось, обновляем активы, которые зависят от этого актива
-            if old_dependency_value != max_dependency_value:
-                update_dependent_assets(asset.id, max_dependency_value, set())
+    return recalculate_dependency_values(asset.context_id, raise_only=True)
 
 @bp.route('/', methods=['GET'])
 def get_assets():
@@ -264,12 +161,7 @@ def create_asset():
     
     db.session.commit()
     
-    # Если установлено dependency_value, обновляем зависимые активы
-    if dependency_value is not None:
-        update_dependent_assets(asset.id, dependency_value, set())
-        db.session.commit()
-    
-    # Пересчитываем зависимости для этого актива (учитываем активы, от которых он зависит)
+    # Пересчитываем зависимости для этого актива и зависящих от него активов
     recalculate_asset_dependencies(asset.id)
     
     return jsonify(asset.to_dict()), 201
@@ -321,7 +213,6 @@ def update_asset(asset_id):
         dependency_value = None
     else:
         dependency_value = dependency_value if dependency_value is not None else asset.dependency_value
-    old_dependency_value = asset.dependency_value
     
     # Обновляем dependency_value только если новое значение выше текущего
     if dependency_value:
@@ -335,13 +226,7 @@ def update_asset(asset_id):
             if new_priority >= current_priority:  # Устанавливаем новое значение, если оно не ниже текущего
                 asset.dependency_value = dependency_value
     
-    # Если dependency_value изменилось, обновляем зависимые активы
-    if old_dependency_value != dependency_value and dependency_value is not None:
-        update_dependent_assets(asset.id, dependency_value, set())
-        db.session.commit()
-    else:
-        # Если dependency_value не изменилось, просто делаем commit
-        db.session.commit()
+    db.session.commit()
     
     # Обработка полей с CHECK constraint для обновления - преобразуем пустые строки в None
     business_process_impact = data.get('business_process_impact')
@@ -443,7 +328,8 @@ def update_asset(asset_id):
     
     db.session.commit()
     
-    # Пересчитываем зависимости для этого актива (учитываем активы, от которых он зависит)
+    # Пересчитываем зависимости для этого актива и зависящих от него активов
+    # (новое dependency_value распространяется на зависимые активы)
     recalculate_asset_dependencies(asset.id)
       
     return jsonify(asset.to_dict())
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Asset, AssetImpactAssessment, ImpactCriterion
-from app.api.asset_routes import update_dependent_assets, recalculate_asset_dependencies
+from app.api.asset_routes import recalculate_asset_dependencies
 import json
 
 bp = Blueprint('asset_value_bp', __name__, url_prefix='/api/asset-values')
@@ -40,7 +40,6 @@ def calculate_asset_value():
             asset.asset_cost_rating = 'высокая'
     
     # Обновляем зависимости
-    old_dependency_value = asset.dependency_value
     dependency_value = data.get('dependency_value')
     if dependency_value:
         # Обновляем dependency_value только если новое значение выше текущего
@@ -69,14 +68,9 @@ def calculate_asset_value():
     
     db.session.commit()
     
-    # Пересчитываем зависимости для этого актива (учитываем активы, от которых он зависит)
+    # Пересчитываем зависимости для этого актива и зависящих от него активов
     recalculate_asset_dependencies(asset.id)
     
-    # Если dependency_value изменилось, обновляем зависимые активы
-    if old_dependency_value != asset.dependency_value and asset.dependency_value is not None:
-        update_dependent_assets(asset.id, asset.dependency_value, set())
-        db.session.commit()
-    
     return jsonify({
         'success': True,
         'asset': asset.to_dict()
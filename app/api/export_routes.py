@@ -0,0 +1,44 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from app.utils.export_utils import EXPORT_ENTITIES, generate_csv, generate_ndjson
+from app.utils.serialization_utils import parse_fields
+
+bp = Blueprint('export_bp', __name__, url_prefix='/api/export')
+
+EXPORT_FORMATS = {
+    'ndjson': (generate_ndjson, 'application/x-ndjson'),
+    'csv': (generate_csv, 'text/csv')
+}
+
+
+def _export(entity, export_format):
+    """
+    Потоковая выгрузка всех записей сущности. Ответ формируется генератором
+    по мере чтения строк из БД, поэтому объем памяти не зависит от размера таблицы.
+
+    Параметры: context_id - только записи контекста (для справочников угроз
+    и уязвимостей игнорируется), fields=id,name,... - выгружаемые колонки.
+    """
+    if entity not in EXPORT_ENTITIES:
+        return jsonify({'error': f'Неизвестная сущность: {entity}'}), 404
+
+    generate, mimetype = EXPORT_FORMATS[export_format]
+    chunks = generate(
+        entity,
+        context_id=request.args.get('context_id', type=int),
+        fields=parse_fields(request.args.get('fields'))
+    )
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={entity}.{export_format}'}
+    )
+
+
+@bp.route('/<entity>.ndjson', methods=['GET'])
+def export_ndjson(entity):
+    return _export(entity, 'ndjson')
+
+
+@bp.route('/<entity>.csv', methods=['GET'])
+def export_csv(entity):
+    return _export(entity, 'csv')
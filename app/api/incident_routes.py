@@ -1,14 +1,37 @@
 from flask import Blueprint, request, jsonify, render_template
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models import Incident, Risk, RiskTreatmentPlan, Asset, Threat, Vulnerability
+from app.utils.incident_utils import generate_incidents, upsert_incident
+from app.utils.serialization_utils import parse_fields, serialize_incidents
 from datetime import datetime
 
 bp = Blueprint('incident_bp', __name__, url_prefix='/api/incidents')
 
 @bp.route('/', methods=['GET'])
 def get_incidents():
-    incidents = Incident.query.all()
-    return jsonify([incident.to_dict() for incident in incidents])
+    """
+    Список инцидентов.
+
+    Параметры: context_id - только инциденты активов контекста,
+    fields=id,scenario_name,... - набор полей, limit/after_id - keyset-пагинация
+    (курсор следующей страницы возвращается в заголовке X-Next-Cursor).
+    """
+    query = Incident.query
+    context_id = request.args.get('context_id', type=int)
+    if context_id:
+        query = query.join(Asset, Asset.id == Incident.asset_id).filter(Asset.context_id == context_id)
+    
+    incidents, next_cursor = serialize_incidents(
+        query,
+        fields=parse_fields(request.args.get('fields')),
+        after_id=request.args.get('after_id', type=int),
+        limit=request.args.get('limit', type=int)
+    )
+    response = jsonify(incidents)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
 
 @bp.route('/<int:incident_id>', methods=['GET'])
 def get_incident(incident_id):
@@ -24,54 +47,26 @@ def create_incident():
     threats = data.get('threats', [])
     vulnerabilities = data.get('vulnerabilities', [])
     
-    created_incidents = []
-    
     # Если есть массивы, создаем инциденты для всех комбинаций
     if assets and threats and vulnerabilities:
-        # Получаем максимальный ID инцидента из базы данных
-        max_incident = Incident.query.order_by(Incident.id.desc()).first()
-        next_id = (max_incident.id + 1) if max_incident else 1
-        
-        for asset_id in assets:
-            for threat_id in threats:
-                for vulnerability_id in vulnerabilities:
-                    # Генерируем обозначение сценария на основе следующего ID
-                    scenario_name = f"СИ{next_id}"
-                    
-                    incident = Incident(
-                        asset_id=asset_id,
-                        threat_id=threat_id,
-                        vulnerability_id=vulnerability_id,
-                        operational_impact=data.get('operational_impact'),
-                        business_impact=data.get('business_impact'),
-                        impact_level=data.get('impact_level') or None,  # По умолчанию None
-                        scenario_name=scenario_name
-                    )
-                    
-                    db.session.add(incident)
-                    created_incidents.append(incident)
-                    next_id += 1  # Увеличиваем счетчик для следующего инцидента
-        
-        db.session.commit()
+        summary = generate_incidents(assets, threats, vulnerabilities, data)
         
-        # Возвращаем первый созданный инцидент как основной
-        return jsonify(created_incidents[0].to_dict()), 201
+        # id - инцидент, с которого продолжается ввод последствий: первый
+        # созданный, а если все комбинации уже были - первый существующий
+        summary['id'] = summary['first_id']
+        if summary['id'] is None:
+            existing = Incident.query.filter(
+                Incident.asset_id.in_(assets),
+                Incident.threat_id.in_(threats),
+                Incident.vulnerability_id.in_(vulnerabilities)
+            ).order_by(Incident.id).first()
+            summary['id'] = existing.id if existing else None
+        return jsonify(summary), 201 if summary['created'] else 200
     else:
-        # Одиночное создание (обратная совместимость)
-        incident = Incident(
-            asset_id=data.get('asset_id'),
-            threat_id=data.get('threat_id'),
-            vulnerability_id=data.get('vulnerability_id'),
-            operational_impact=data.get('operational_impact'),
-            business_impact=data.get('business_impact'),
-            impact_level=data.get('impact_level') or None,
-            scenario_name=data.get('scenario_name')
-        )
-        
-        db.session.add(incident)
-        db.session.commit()
-        
-        return jsonify(incident.to_dict()), 201
+        # Одиночное создание (обратная совместимость); повторная отправка
+        # той же комбинации обновляет существующий инцидент
+        incident, created = upsert_incident(data)
+        return jsonify(incident.to_dict()), 201 if created else 200
 
 @bp.route('/<int:incident_id>', methods=['PUT'])
 def update_incident(incident_id):
@@ -94,7 +89,11 @@ def update_incident(incident_id):
     incident.scenario_name = data.get('scenario_name', incident.scenario_name)
     incident.updated_at = datetime.utcnow()
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Инцидент с такими активом, угрозой и уязвимостью уже существует'}), 409
     
     return jsonify(incident.to_dict())
 
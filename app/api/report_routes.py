@@ -1,6 +1,5 @@
-from flask import Blueprint, request, send_file, jsonify
-from app.utils.report_utils import generate_combined_pdf_report
-from app.models import Report, Context
+from flask import Blueprint, Response, request, send_file, jsonify, current_app
+from app.models import Report, Context, ReportJob
 from app import db
 import tempfile
 import os
@@ -15,6 +14,8 @@ def download_combined_pdf_report():
     """
     Скачивание комбинированного PDF отчета с выбранными модулями
     """
+    from app.utils.report_jobs import save_combined_pdf_report
+    
     try:
         # Получаем данные из формы
         context_id = request.form.get('context_id')
@@ -23,46 +24,106 @@ def download_combined_pdf_report():
         if not modules:
             return "Не выбраны модули для отчета", 400
 
-        # Генерируем комбинированный отчет
-        pdf_buffer = generate_combined_pdf_report(context_id, modules)
-        
-        # Создаем директорию для отчетов если её нет
-        reports_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'reports')
-        os.makedirs(reports_dir, exist_ok=True)
-        
-        # Генерируем имя файла
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"combined_report_{timestamp}.pdf"
-        file_path = os.path.join(reports_dir, filename)
-        
-        # Сохраняем файл на диск
-        with open(file_path, 'wb') as f:
-            f.write(pdf_buffer.getvalue())
-        
-        # Получаем размер файла
-        file_size = os.path.getsize(file_path)
-        
-        # Создаем запись в БД
-        report_name = f"Комбинированный отчет от {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-        report = Report(
-            name=report_name,
-            context_id=int(context_id) if context_id else None,
-            file_path=file_path,
-            file_size=file_size,
-            selected_data=json.dumps({'modules': modules})
-        )
-        
-        db.session.add(report)
-        db.session.commit()
+        # Генерируем отчет, сохраняем файл и запись в БД
+        report = save_combined_pdf_report(context_id, modules)
         
         # Отправляем файл для скачивания
         return send_file(
-            file_path,
+            report.file_path,
             as_attachment=True,
-            download_name=filename,
+            download_name=os.path.basename(report.file_path),
             mimetype='application/pdf'
         )
         
     except Exception as e:
         db.session.rollback()
         return str(e), 400
+
+
+@bp.route('/combined/xlsx', methods=['POST'])
+def download_combined_xlsx_report():
+    """
+    Выгрузка реестра рисков в XLSX (лист на каждый выбранный модуль).
+    Параметры - как у /combined/pdf (форма) или JSON {context_id, modules}
+    """
+    from app.utils.report_xlsx import generate_combined_xlsx_report
+    
+    data = request.get_json(silent=True)
+    if data is not None:
+        context_id = data.get('context_id')
+        modules = data.get('modules', [])
+    else:
+        context_id = request.form.get('context_id')
+        modules = request.form.getlist('modules[]')
+    
+    if not modules:
+        return "Не выбраны модули для отчета", 400
+    
+    fd, file_path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        generate_combined_xlsx_report(context_id, modules, file_path)
+    except Exception as e:
+        os.remove(file_path)
+        db.session.rollback()
+        return str(e), 400
+    
+    def stream_file():
+        # Временный файл удаляется после отправки (или обрыва соединения)
+        try:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(64 * 1024), b''):
+                    yield chunk
+        finally:
+            os.remove(file_path)
+    
+    filename = f"combined_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return Response(
+        stream_file(),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'Content-Length': str(os.path.getsize(file_path))
+        }
+    )
+
+
+@bp.route('/jobs', methods=['POST'])
+def create_report_job():
+    """
+    Постановка формирования комбинированного PDF отчета в очередь.
+    Возвращает id задачи сразу, статус - GET /api/reports/jobs/<id>
+    """
+    from app.utils.report_jobs import count_active_report_jobs, enqueue_report_job
+    
+    data = request.get_json(silent=True)
+    if data is not None:
+        context_id = data.get('context_id')
+        modules = data.get('modules', [])
+    else:
+        context_id = request.form.get('context_id')
+        modules = request.form.getlist('modules[]')
+    
+    if not modules:
+        return jsonify({'error': 'Не выбраны модули для отчета'}), 400
+    
+    if count_active_report_jobs() >= current_app.config.get('REPORT_QUEUE_LIMIT', 20):
+        return jsonify({'error': 'Очередь формирования отчетов переполнена, повторите позже'}), 429
+    
+    job = enqueue_report_job(current_app._get_current_object(), context_id, modules)
+    return jsonify(job.to_dict()), 202
+
+
+@bp.route('/jobs', methods=['GET'])
+def get_report_jobs():
+    """Список задач формирования отчетов (последние сверху)"""
+    limit = request.args.get('limit', 50, type=int)
+    jobs = ReportJob.query.order_by(ReportJob.id.desc()).limit(limit).all()
+    return jsonify([job.to_dict() for job in jobs])
+
+
+@bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_report_job(job_id):
+    """Статус задачи: состояние по модулям и сформированный отчет"""
+    job = ReportJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
@@ -1,14 +1,37 @@
 from flask import Blueprint, request, jsonify
 from app import db
-from app.models import Risk
+from app.models import Risk, Incident, Asset
+from app.utils.serialization_utils import parse_fields, serialize_risks
 from datetime import datetime
 
 bp = Blueprint('risk_bp', __name__, url_prefix='/api/risks')
 
 @bp.route('/', methods=['GET'])
 def get_risks():
-    risks = Risk.query.all()
-    return jsonify([risk.to_dict() for risk in risks])
+    """
+    Список рисков.
+
+    Параметры: context_id - только риски инцидентов активов контекста,
+    fields=id,risk_level,... - набор полей, limit/after_id - keyset-пагинация
+    (курсор следующей страницы возвращается в заголовке X-Next-Cursor).
+    """
+    query = Risk.query
+    context_id = request.args.get('context_id', type=int)
+    if context_id:
+        query = query.join(Incident, Incident.id == Risk.incident_id).join(
+            Asset, Asset.id == Incident.asset_id
+        ).filter(Asset.context_id == context_id)
+    
+    risks, next_cursor = serialize_risks(
+        query,
+        fields=parse_fields(request.args.get('fields')),
+        after_id=request.args.get('after_id', type=int),
+        limit=request.args.get('limit', type=int)
+    )
+    response = jsonify(risks)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
 
 @bp.route('/<int:risk_id>', methods=['GET'])
 def get_risk(risk_id):
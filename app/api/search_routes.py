@@ -0,0 +1,31 @@
+from flask import Blueprint, request, jsonify
+from app.utils.search_utils import search_catalogs
+
+bp = Blueprint('search_bp', __name__, url_prefix='/api/search')
+
+@bp.route('/', methods=['GET'])
+def search():
+    """
+    Полнотекстовый поиск по угрозам, уязвимостям и активам.
+
+    Параметры: q - строка поиска, types=threats,vulnerabilities,assets -
+    каталоги, context_id - активы только этого контекста, limit/offset -
+    страница результатов.
+    """
+    text = request.args.get('q', '')
+    types = request.args.get('types')
+    limit = request.args.get('limit', 20, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    
+    results, has_more = search_catalogs(
+        text,
+        types=[entity.strip() for entity in types.split(',')] if types else None,
+        limit=limit,
+        offset=offset,
+        context_id=request.args.get('context_id', type=int)
+    )
+    return jsonify({
+        'query': text,
+        'results': results,
+        'next_offset': offset + len(results) if has_more else None
+    })
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, render_template
 from app import db
 from app.models import Threat, AssetThreat
+from app.utils.threat_assessment_utils import save_threat_assessments
 from datetime import datetime
 
 bp = Blueprint('threat_bp', __name__, url_prefix='/api/threats')
@@ -279,51 +280,14 @@ def get_asset_probability_assessments():
 @bp.route('/save-asset-probability-assessment', methods=['POST'])
 def save_asset_probability_assessment():
     """
-    Сохранение результатов оценки вероятности реализации угрозы для активов
+    Сохранение результатов оценки вероятности реализации угрозы для активов.
+    Оценки записываются пакетами INSERT ... ON CONFLICT DO UPDATE,
+    в ответе - количество и время записи каждого пакета
     """
     try:
         data = request.get_json()
-        print(f"[DEBUG] Received data for saving assessments: {data}")
-        
-        from app.models import ThreatAssessment
-        
-        assessments_list = data.get('assessments', [])
-        print(f"[DEBUG] Number of assessments to save: {len(assessments_list)}")
-        
-        # Проходим по всем оценкам из данных
-        for assessment_data in assessments_list:
-            print(f"[DEBUG] Processing assessment: asset_id={assessment_data.get('asset_id')}, threat_id={assessment_data.get('threat_id')}, score={assessment_data.get('score')}, level={assessment_data.get('level')}")
-            
-            # Проверяем, существует ли уже оценка для этой связки актив-угроза
-            existing = ThreatAssessment.query.filter_by(
-                asset_id=assessment_data['asset_id'],
-                threat_id=assessment_data['threat_id']
-            ).first()
-            
-            if existing:
-                # Обновляем существующую оценку
-                print(f"[DEBUG] Updating existing assessment ID={existing.id}")
-                existing.score = assessment_data['score']
-                existing.assessment = assessment_data.get('level', '')
-            else:
-                # Создаем новую оценку
-                print(f"[DEBUG] Creating new assessment")
-                threat_assessment = ThreatAssessment(
-                    asset_id=assessment_data['asset_id'],
-                    threat_id=assessment_data['threat_id'],
-                    score=assessment_data['score'],
-                    assessment=assessment_data.get('level', '')
-                )
-                db.session.add(threat_assessment)
-        
-        db.session.commit()
-        print(f"[DEBUG] Successfully committed {len(assessments_list)} assessments to database")
-        
-        # Verify the data was saved
-        saved_count = ThreatAssessment.query.count()
-        print(f"[DEBUG] Total assessments in database after save: {saved_count}")
-        
-        return jsonify({'message': 'Оценки вероятности реализации угроз успешно сохранены', 'count': len(assessments_list)}), 200
+        stats = save_threat_assessments(data.get('assessments', []))
+        return jsonify({'message': 'Оценки вероятности реализации угроз успешно сохранены', **stats}), 200
         
     except Exception as e:
         db.session.rollback()
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Vulnerability, AssetVulnerability, Asset, VulnerabilityAssessment
+from app.utils.serialization_utils import parse_fields, serialize_vulnerabilities
+from app.utils.sequence_utils import next_sequence_value, resync_sequence
 from datetime import datetime
 import json
 
@@ -8,8 +10,44 @@ bp = Blueprint('vulnerability_bp', __name__, url_prefix='/api/vulnerabilities')
 
 @bp.route('/', methods=['GET'])
 def get_vulnerabilities():
-    vulnerabilities = Vulnerability.query.all()
-    return jsonify([vulnerability.to_dict() for vulnerability in vulnerabilities])
+    """
+    Каталог уязвимостей.
+
+    Фильтры: level - по началу значения (в БДУ уровень хранится вместе с
+    описанием оценки CVSS), vendor, software_name - точное совпадение,
+    cvss_min/cvss_max - диапазон CVSS. fields=id,name,... - набор полей,
+    limit/after_id - пагинация по id (курсор следующей страницы возвращается
+    в заголовке X-Next-Cursor).
+    """
+    query = Vulnerability.query
+    
+    level = request.args.get('level')
+    if level:
+        # Диапазон вместо LIKE, чтобы поиск по префиксу шел по индексу
+        query = query.filter(Vulnerability.level >= level, Vulnerability.level < level + '\uffff')
+    vendor = request.args.get('vendor')
+    if vendor:
+        query = query.filter(Vulnerability.vendor == vendor)
+    software_name = request.args.get('software_name')
+    if software_name:
+        query = query.filter(Vulnerability.software_name == software_name)
+    cvss_min = request.args.get('cvss_min', type=float)
+    if cvss_min is not None:
+        query = query.filter(Vulnerability.cvss_score >= cvss_min)
+    cvss_max = request.args.get('cvss_max', type=float)
+    if cvss_max is not None:
+        query = query.filter(Vulnerability.cvss_score <= cvss_max)
+    
+    vulnerabilities, next_cursor = serialize_vulnerabilities(
+        query,
+        fields=parse_fields(request.args.get('fields')),
+        after_id=request.args.get('after_id'),
+        limit=request.args.get('limit', type=int)
+    )
+    response = jsonify(vulnerabilities)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
 
 @bp.route('/<vulnerability_id>', methods=['GET'])
 def get_vulnerability(vulnerability_id):
@@ -23,9 +61,15 @@ def create_vulnerability():
     # Автогенерация ID если не указан
     vuln_id = data.get('id')
     if not vuln_id:
-        # Генерируем ID на основе максимального существующего
-        max_id = db.session.query(db.func.max(db.cast(Vulnerability.id, db.Integer))).scalar()
-        vuln_id = str((max_id or 0) + 1)
+        # Номер из последовательности. Если он занят уязвимостью с заданным
+        # вручную id, последовательность один раз сдвигается за максимальный
+        # числовой id, без перебора номеров по одному
+        vuln_id = str(next_sequence_value('vulnerabilities'))
+        if db.session.get(Vulnerability, vuln_id) is not None:
+            resync_sequence('vulnerabilities')
+            vuln_id = str(next_sequence_value('vulnerabilities'))
+            if db.session.get(Vulnerability, vuln_id) is not None:
+                return jsonify({'error': f'Идентификатор {vuln_id} уже занят'}), 409
     
     # Преобразуем строку даты в объект даты
     discovered_at = None
@@ -4,3 +4,15 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///risk_management.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-for-risk-management-app'
+    # Фоновое формирование отчетов: число параллельных задач и предел очереди
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 2))
+    REPORT_QUEUE_LIMIT = int(os.environ.get('REPORT_QUEUE_LIMIT', 20))
+    # Число потоков для параллельной выборки данных разделов одного отчета
+    REPORT_SECTION_WORKERS = int(os.environ.get('REPORT_SECTION_WORKERS', 5))
+    # При большем числе записей инциденты и риски выводятся одной таблицей-реестром
+    REPORT_REGISTER_THRESHOLD = int(os.environ.get('REPORT_REGISTER_THRESHOLD', 200))
+    # Кэш сформированных отчетов: предельный размер каталога отчетов и срок хранения
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+    REPORT_CACHE_MAX_AGE_DAYS = int(os.environ.get('REPORT_CACHE_MAX_AGE_DAYS', 30))
+    # Число номеров последовательности, выделяемых процессу за одно обращение к БД
+    SEQUENCE_BLOCK_SIZE = int(os.environ.get('SEQUENCE_BLOCK_SIZE', 20))
@@ -16,6 +16,10 @@ from .asset_threat import AssetThreat
 from .asset_vulnerability import AssetVulnerability
 from .damage_scale import DamageScale
 from .report import Report
+from .import_manifest import ImportManifest
+from .report_job import ReportJob
+from .report_cache import DataVersion, ReportCacheEntry
+from .sequence import Sequence
 
 __all__ = [
     'Context',
@@ -36,5 +40,10 @@ __all__ = [
     'AssetThreat',
     'AssetVulnerability',
     'DamageScale',
-    'Report'
+    'Report',
+    'ImportManifest',
+    'ReportJob',
+    'DataVersion',
+    'ReportCacheEntry',
+    'Sequence'
 ]
\ No newline at end of file
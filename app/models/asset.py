@@ -6,7 +6,7 @@ class Asset(db.Model):
     __tablename__ = 'assets'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    context_id = db.Column(db.Integer, db.ForeignKey('contexts.id'), nullable=False)
+    context_id = db.Column(db.Integer, db.ForeignKey('contexts.id'), nullable=False, index=True)
     name = db.Column(db.Text, nullable=False)
     description = db.Column(db.Text)
     type = db.Column(db.Text, db.CheckConstraint("type IN ('information', 'software', 'hardware')"), nullable=False)
@@ -64,4 +64,18 @@ class Asset(db.Model):
 # Триггер для обновления времени
 @event.listens_for(Asset, 'before_update')
 def update_asset_timestamp(mapper, connection, target):
-    target.updated_at = datetime.utcnow()
\ No newline at end of file
+    target.updated_at = datetime.utcnow()
+
+# Изменение графа зависимостей при изменении состава активов контекста
+@event.listens_for(Asset, 'after_insert')
+@event.listens_for(Asset, 'after_delete')
+def invalidate_asset_dependency_graph(mapper, connection, target):
+    from app.utils.dependency_graph import mark_dependency_graph_changed
+    mark_dependency_graph_changed(target)
+
+
+@event.listens_for(Asset, 'after_update')
+def invalidate_asset_dependency_graph_on_move(mapper, connection, target):
+    if db.inspect(target).attrs.context_id.history.has_changes():
+        from app.utils.dependency_graph import mark_dependency_graph_changed
+        mark_dependency_graph_changed(target)
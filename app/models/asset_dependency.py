@@ -1,4 +1,5 @@
 from app import db
+from sqlalchemy import event
 
 class AssetDependency(db.Model):
     __tablename__ = 'asset_dependencies'
@@ -16,4 +17,14 @@ class AssetDependency(db.Model):
             'asset_id': self.asset_id,
             'depends_on_asset_id': self.depends_on_asset_id,
             'relationship_type': self.relationship_type
-        }
\ No newline at end of file
+        }
+
+# Изменение графа зависимостей: версия графа увеличивается в транзакции
+# flush (пакетные операции событий не вызывают, для них версия
+# увеличивается явно)
+@event.listens_for(AssetDependency, 'after_insert')
+@event.listens_for(AssetDependency, 'after_update')
+@event.listens_for(AssetDependency, 'after_delete')
+def invalidate_asset_dependency_graph(mapper, connection, target):
+    from app.utils.dependency_graph import mark_dependency_graph_changed
+    mark_dependency_graph_changed(target)
@@ -0,0 +1,27 @@
+from app import db
+from datetime import datetime
+import json
+
+class ImportManifest(db.Model):
+    __tablename__ = 'import_manifests'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    source_name = db.Column(db.Text, nullable=False, unique=True)  # имя файла-источника (thrlist.xlsx, vullist.xlsx)
+    file_path = db.Column(db.Text)  # путь к файлу при последнем импорте
+    file_size = db.Column(db.Integer)  # размер файла в байтах
+    file_mtime = db.Column(db.Float)  # время изменения файла (unix timestamp)
+    sha256 = db.Column(db.Text)  # хеш содержимого файла
+    result = db.Column(db.Text)  # статистика последнего импорта в JSON формате
+    imported_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source_name': self.source_name,
+            'file_path': self.file_path,
+            'file_size': self.file_size,
+            'file_mtime': self.file_mtime,
+            'sha256': self.sha256,
+            'result': json.loads(self.result) if self.result else None,
+            'imported_at': self.imported_at.isoformat() if self.imported_at else None
+        }
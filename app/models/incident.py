@@ -4,6 +4,11 @@ from sqlalchemy import event
 
 class Incident(db.Model):
     __tablename__ = 'incidents'
+    # Один сценарий на комбинацию актив/угроза/уязвимость; индекс также
+    # покрывает выборки по asset_id (первая колонка)
+    __table_args__ = (
+        db.Index('uq_incidents_asset_threat_vulnerability', 'asset_id', 'threat_id', 'vulnerability_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), nullable=False)
@@ -21,15 +26,16 @@ class Incident(db.Model):
     risks = db.relationship('Risk', backref='incident', lazy=True, cascade='all, delete-orphan')
     treatment_plans = db.relationship('RiskTreatmentPlan', backref='incident', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
+    def to_dict(self, cache=None, fields=None):
+        from app.utils.serialization_utils import related_to_dict, project_fields
+        return project_fields({
             'id': self.id,
             'asset_id': self.asset_id,
-            'asset': self.asset.to_dict() if self.asset else None,
+            'asset': related_to_dict(self, 'asset', cache, fields),
             'threat_id': self.threat_id,
-            'threat': self.threat.to_dict() if self.threat else None,
+            'threat': related_to_dict(self, 'threat', cache, fields),
             'vulnerability_id': self.vulnerability_id,
-            'vulnerability': self.vulnerability.to_dict() if self.vulnerability else None,
+            'vulnerability': related_to_dict(self, 'vulnerability', cache, fields),
             'operational_impact': self.operational_impact,
             'business_impact': self.business_impact,
             'impact_level': self.impact_level,
@@ -37,7 +43,7 @@ class Incident(db.Model):
             'scenario_probability': self.scenario_probability,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        }, fields)
 
 # Триггер для обновления времени
 @event.listens_for(Incident, 'before_update')
@@ -0,0 +1,38 @@
+from app import db
+from datetime import datetime
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+    
+    table_name = db.Column(db.Text, primary_key=True)  # имя таблицы
+    version = db.Column(db.Integer, nullable=False, default=0)  # счетчик изменений (увеличивается триггерами)
+    
+    def to_dict(self):
+        return {
+            'table_name': self.table_name,
+            'version': self.version
+        }
+
+
+class ReportCacheEntry(db.Model):
+    __tablename__ = 'report_cache_entries'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    cache_key = db.Column(db.Text, nullable=False, unique=True)  # sha256 от (context_id, modules, версии данных)
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id'), nullable=False)
+    hits = db.Column(db.Integer, default=0)  # количество повторных выдач
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Связи
+    report = db.relationship('Report', backref=db.backref('cache_entries', lazy=True, cascade='all, delete-orphan'))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cache_key': self.cache_key,
+            'report_id': self.report_id,
+            'hits': self.hits,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None
+        }
@@ -0,0 +1,36 @@
+from app import db
+from datetime import datetime
+import json
+
+class ReportJob(db.Model):
+    __tablename__ = 'report_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    context_id = db.Column(db.Integer, db.ForeignKey('contexts.id'), nullable=True)
+    modules = db.Column(db.Text, nullable=False)  # выбранные модули отчета в JSON формате
+    status = db.Column(db.Text, db.CheckConstraint("status IN ('queued', 'running', 'done', 'failed')"), nullable=False, default='queued', index=True)
+    progress = db.Column(db.Text)  # состояние по модулям в JSON формате {"assets": "done", ...}
+    error = db.Column(db.Text)  # текст ошибки для status = 'failed'
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id'), nullable=True)  # сформированный отчет
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    # Связи
+    report = db.relationship('Report')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'context_id': self.context_id,
+            'modules': json.loads(self.modules) if self.modules else [],
+            'status': self.status,
+            'progress': json.loads(self.progress) if self.progress else {},
+            'error': self.error,
+            'report_id': self.report_id,
+            'report': self.report.to_dict() if self.report else None,
+            'download_url': f'/api/reports/{self.report_id}/download' if self.report_id else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
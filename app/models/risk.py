@@ -6,7 +6,7 @@ class Risk(db.Model):
     __tablename__ = 'risks'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'), nullable=False)
+    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'), nullable=False, index=True)
     likelihood = db.Column(db.Text, db.CheckConstraint("likelihood IN ('низкая', 'средняя', 'высокая')")) # вероятность
     impact_level = db.Column(db.Text, db.CheckConstraint("impact_level IN ('низкий', 'средний', 'высокий')"))  # уровень последствий
     vulnerability_level = db.Column(db.Text, db.CheckConstraint("vulnerability_level IN ('Н', 'С', 'В')"))  # уровень уязвимости
@@ -17,11 +17,12 @@ class Risk(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, cache=None, fields=None):
+        from app.utils.serialization_utils import related_to_dict, project_fields
+        return project_fields({
             'id': self.id,
             'incident_id': self.incident_id,
-            'incident': self.incident.to_dict() if self.incident else None,
+            'incident': related_to_dict(self, 'incident', cache, fields, nested=True),
             'likelihood': self.likelihood,
             'impact_level': self.impact_level,
             'vulnerability_level': self.vulnerability_level,
@@ -31,7 +32,7 @@ class Risk(db.Model):
             'acceptable': self.acceptable,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        }, fields)
 
 # Триггер для обновления времени
 @event.listens_for(Risk, 'before_update')
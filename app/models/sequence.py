@@ -0,0 +1,14 @@
+from app import db
+
+
+class Sequence(db.Model):
+    __tablename__ = 'sequences'
+    
+    name = db.Column(db.Text, primary_key=True)  # имя последовательности (обычно имя таблицы)
+    last_value = db.Column(db.Integer, nullable=False, default=0)  # последнее выделенное значение
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'last_value': self.last_value
+        }
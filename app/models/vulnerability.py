@@ -7,17 +7,17 @@ class Vulnerability(db.Model):
     id = db.Column(db.Text, primary_key=True)  # идентификатор из БДУ ФСТЭК
     name = db.Column(db.Text, nullable=False)  # наименование уязвимости
     description = db.Column(db.Text)  # описание
-    software_name = db.Column(db.Text)  # название ПО
+    software_name = db.Column(db.Text, index=True)  # название ПО
     software_version = db.Column(db.Text)  # версия ПО
-    vendor = db.Column(db.Text)  # вендор ПО
+    vendor = db.Column(db.Text, index=True)  # вендор ПО
     platform = db.Column(db.Text)  # платформа
     discovered_at = db.Column(db.Date)  # дата выявления
-    level = db.Column(db.Text)  # уровень опасности
+    level = db.Column(db.Text, index=True)  # уровень опасности
     exploit_available = db.Column(db.Boolean, default=False)  # наличие эксплойта
     fix_info = db.Column(db.Text)  # информация об устранении
     cve = db.Column(db.Text)  # идентификаторы CVE
     cwe = db.Column(db.Text)  # тип ошибки CWE
-    cvss_score = db.Column(db.Float)  # CVSS оценка
+    cvss_score = db.Column(db.Float, index=True)  # CVSS оценка
     imported_from_bdu = db.Column(db.Boolean, default=False)  # импортировано из БДУ ФСТЭК
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
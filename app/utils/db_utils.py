@@ -0,0 +1,13 @@
+from app import db
+
+
+def dialect_insert():
+    """insert() с поддержкой ON CONFLICT для текущей БД (None - не поддерживается)"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
@@ -0,0 +1,287 @@
+from array import array
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models import Asset, AssetDependency, Sequence
+from app.utils.db_utils import dialect_insert
+
+
+def strongly_connected_components(nodes, successors):
+    """
+    Компоненты сильной связности графа (итеративный алгоритм Тарьяна).
+
+    successors(node) возвращает соседей узла. Компоненты возвращаются в
+    обратном топологическом порядке: каждая компонента идет после всех
+    компонент, достижимых из нее.
+    """
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in nodes:
+        if root in index_of:
+            continue
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+
+        while work:
+            node, node_successors = work[-1]
+            advanced = False
+            for successor in node_successors:
+                if successor not in index_of:
+                    index_of[successor] = lowlink[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(successors(successor))))
+                    advanced = True
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[successor])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+
+def _compressed_adjacency(size, pairs):
+    """Список смежности в формате CSR: смещения и плоский массив соседей"""
+    offsets = array('i', [0]) * (size + 1)
+    for source, _ in pairs:
+        offsets[source + 1] += 1
+    for position in range(size):
+        offsets[position + 1] += offsets[position]
+
+    targets = array('i', [0]) * len(pairs)
+    fill = array('i', offsets[:-1]) if size else array('i')
+    for source, target in pairs:
+        targets[fill[source]] = target
+        fill[source] += 1
+    return offsets, targets
+
+
+class DependencyGraph:
+    """
+    Граф зависимостей активов одного контекста.
+
+    Узлы пронумерованы подряд, прямые (актив -> от чего зависит) и обратные
+    (актив -> кто от него зависит) списки смежности хранятся в массивах
+    array('i'), поэтому обходы выполняются без запросов к БД.
+    """
+
+    def __init__(self, asset_ids, edges):
+        node_ids = set(asset_ids)
+        for asset_id, depends_on_asset_id in edges:
+            node_ids.add(asset_id)
+            node_ids.add(depends_on_asset_id)
+
+        self.asset_ids = array('i', sorted(node_ids))
+        self.index = {asset_id: position for position, asset_id in enumerate(self.asset_ids)}
+        self.context_asset_ids = frozenset(asset_ids)
+
+        pairs = [(self.index[asset_id], self.index[depends_on_asset_id]) for asset_id, depends_on_asset_id in edges]
+        size = len(self.asset_ids)
+        self.forward_offsets, self.forward_targets = _compressed_adjacency(size, pairs)
+        self.reverse_offsets, self.reverse_targets = _compressed_adjacency(size, [(target, source) for source, target in pairs])
+
+    def __contains__(self, asset_id):
+        return asset_id in self.index
+
+    @property
+    def edge_count(self):
+        return len(self.forward_targets)
+
+    def _forward(self, position):
+        return self.forward_targets[self.forward_offsets[position]:self.forward_offsets[position + 1]]
+
+    def _reverse(self, position):
+        return self.reverse_targets[self.reverse_offsets[position]:self.reverse_offsets[position + 1]]
+
+    def _reachable(self, asset_ids, neighbours):
+        """
+        Узлы, достижимые из asset_ids хотя бы за один шаг. Сам исходный актив
+        попадает в результат, только если он лежит на цикле.
+        """
+        visited = bytearray(len(self.asset_ids))
+        stack = []
+        for asset_id in asset_ids:
+            position = self.index.get(asset_id)
+            if position is not None:
+                stack.append(position)
+        while stack:
+            for neighbour in neighbours(stack.pop()):
+                if not visited[neighbour]:
+                    visited[neighbour] = 1
+                    stack.append(neighbour)
+        return {self.asset_ids[position] for position in range(len(visited)) if visited[position]}
+
+    def edges(self):
+        """Все ребра графа в виде пар (asset_id, depends_on_asset_id)"""
+        for position in range(len(self.asset_ids)):
+            for target in self._forward(position):
+                yield self.asset_ids[position], self.asset_ids[target]
+
+    def direct_dependencies(self, asset_id):
+        position = self.index.get(asset_id)
+        if position is None:
+            return []
+        return [self.asset_ids[target] for target in self._forward(position)]
+
+    def direct_dependents(self, asset_id):
+        position = self.index.get(asset_id)
+        if position is None:
+            return []
+        return [self.asset_ids[source] for source in self._reverse(position)]
+
+    def dependencies(self, asset_ids):
+        """Активы, от которых asset_ids зависят прямо или транзитивно"""
+        if isinstance(asset_ids, int):
+            asset_ids = [asset_ids]
+        return self._reachable(asset_ids, self._forward)
+
+    def dependents(self, asset_ids):
+        """Активы, которые прямо или транзитивно зависят от asset_ids"""
+        if isinstance(asset_ids, int):
+            asset_ids = [asset_ids]
+        return self._reachable(asset_ids, self._reverse)
+
+    def strongly_connected_components(self):
+        """Компоненты сильной связности (id активов) в порядке: зависимости раньше зависящих"""
+        components = strongly_connected_components(range(len(self.asset_ids)), self._forward)
+        return [[self.asset_ids[position] for position in component] for component in components]
+
+    def cycles(self):
+        """Циклические зависимости: компоненты из нескольких активов и петли"""
+        result = []
+        for component in self.strongly_connected_components():
+            if len(component) > 1 or component[0] in self.direct_dependencies(component[0]):
+                result.append(sorted(component))
+        return result
+
+    def topological_order(self):
+        """
+        Активы контекста в порядке зависимостей: актив идет после всех активов,
+        от которых он зависит. Активы одного цикла идут подряд.
+        """
+        order = []
+        for component in self.strongly_connected_components():
+            order.extend(sorted(asset_id for asset_id in component if asset_id in self.context_asset_ids))
+        return order
+
+    def to_dict(self):
+        return {
+            'assets': len(self.context_asset_ids),
+            'nodes': len(self.asset_ids),
+            'edges': self.edge_count
+        }
+
+
+# Кэш графов по контекстам в памяти процесса: context_id -> (версия, граф).
+# Версия графа хранится в БД (строка dependency_graph таблицы sequences) и
+# увеличивается в той же транзакции, что и изменение активов и зависимостей:
+# кэши всех процессов устаревают только после commit, откат их не сбрасывает
+GRAPH_VERSION_SEQUENCE = 'dependency_graph'
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+# Отметки в session.info: граф изменен при flush / версия увеличена, но не зафиксирована
+_GRAPH_CHANGED = 'dependency_graph_changed'
+_GRAPH_UNCOMMITTED = 'dependency_graph_uncommitted'
+
+
+def build_dependency_graph(context_id):
+    """Построение графа контекста двумя запросами"""
+    asset_ids = [asset_id for (asset_id,) in db.session.query(Asset.id).filter(Asset.context_id == context_id)]
+    edges = db.session.query(
+        AssetDependency.asset_id, AssetDependency.depends_on_asset_id
+    ).join(Asset, Asset.id == AssetDependency.asset_id).filter(Asset.context_id == context_id).all()
+    return DependencyGraph(asset_ids, edges)
+
+
+def get_dependency_graph(context_id):
+    """
+    Граф зависимостей контекста из кэша. Граф перестраивается, если версия
+    графа в БД изменилась; версия читается до построения, поэтому граф не
+    бывает старше версии, под которой он сохранен в кэше.
+    """
+    version = db.session.query(Sequence.last_value).filter(Sequence.name == GRAPH_VERSION_SEQUENCE).scalar() or 0
+    if db.session.info.get(_GRAPH_UNCOMMITTED):
+        # Граф изменен в текущей незафиксированной транзакции - в кэш не попадает
+        return build_dependency_graph(context_id)
+
+    with _graphs_lock:
+        cached = _graphs.get(context_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    graph = build_dependency_graph(context_id)
+    with _graphs_lock:
+        _graphs[context_id] = (version, graph)
+    return graph
+
+
+def invalidate_dependency_graph(session=None):
+    """
+    Увеличение версии графа в текущей транзакции сессии. Вызывается до
+    commit: после пакетных операций, которые не вызывают событий модели
+    (изменения через ORM отмечаются автоматически при flush).
+    """
+    session = session or db.session
+    table = Sequence.__table__
+    connection = session.connection()
+    insert = dialect_insert()
+    if insert is not None:
+        statement = insert(table).values(name=GRAPH_VERSION_SEQUENCE, last_value=1)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['name'], set_={'last_value': table.c.last_value + 1}
+        ))
+    else:
+        updated = connection.execute(
+            table.update().where(table.c.name == GRAPH_VERSION_SEQUENCE).values(last_value=table.c.last_value + 1)
+        )
+        if not updated.rowcount:
+            connection.execute(table.insert().values(name=GRAPH_VERSION_SEQUENCE, last_value=1))
+    session.info[_GRAPH_UNCOMMITTED] = True
+
+
+def mark_dependency_graph_changed(target):
+    """Отметка изменения графа из событий модели; версия увеличивается один раз за flush"""
+    session = object_session(target)
+    if session is not None:
+        session.info[_GRAPH_CHANGED] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_graph_version_after_flush(session, flush_context):
+    if session.info.pop(_GRAPH_CHANGED, False):
+        invalidate_dependency_graph(session)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _clear_graph_marks(session):
+    session.info.pop(_GRAPH_CHANGED, None)
+    session.info.pop(_GRAPH_UNCOMMITTED, None)
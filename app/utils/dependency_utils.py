@@ -0,0 +1,159 @@
+from app import db
+from app.models import Asset
+from app.utils.dependency_graph import get_dependency_graph, strongly_connected_components
+from datetime import datetime
+
+# Порядок значений для сравнения ценности
+VALUE_PRIORITY = {'Н': 1, 'С': 2, 'В': 3}
+DEPENDENCY_VALUE_PRIORITY = {'низкая': 1, 'средняя': 2, 'высокая': 3}
+# Приоритет -> значение dependency_value
+PRIORITY_TO_DEPENDENCY_VALUE = {1: 'низкая', 2: 'средняя', 3: 'высокая'}
+
+
+def compute_dependency_values(base_priorities, edges):
+    """
+    Расчет ценности с учетом зависимостей в памяти.
+
+    base_priorities - {asset_id: приоритет собственной ценности (0-3)},
+    edges - пары (asset_id, depends_on_asset_id).
+    Ценность актива с зависимостями - максимум собственной ценности по всем
+    активам, от которых он зависит прямо или транзитивно (включая сам актив).
+    Циклы обрабатываются через конденсацию графа в компоненты сильной связности.
+
+    Возвращает {asset_id: dependency_value} для активов, у которых есть
+    зависимости; для остальных - None.
+    """
+    adjacency = {}
+    for asset_id, depends_on_asset_id in edges:
+        adjacency.setdefault(asset_id, []).append(depends_on_asset_id)
+
+    nodes = set(base_priorities)
+    for asset_id, targets in adjacency.items():
+        nodes.add(asset_id)
+        nodes.update(targets)
+
+    component_of = {}
+    component_priority = []
+    components = strongly_connected_components(nodes, lambda node: adjacency.get(node, ()))
+    for component_index, component in enumerate(components):
+        priority = 0
+        for node in component:
+            component_of[node] = component_index
+            priority = max(priority, base_priorities.get(node, 0))
+        # Все достижимые компоненты уже обработаны (обратный топологический порядок)
+        for node in component:
+            for target in adjacency.get(node, ()):
+                target_component = component_of[target]
+                if target_component != component_index:
+                    priority = max(priority, component_priority[target_component])
+        component_priority.append(priority)
+
+    result = {}
+    for asset_id in base_priorities:
+        if asset_id in adjacency:
+            result[asset_id] = PRIORITY_TO_DEPENDENCY_VALUE.get(component_priority[component_of[asset_id]])
+        else:
+            result[asset_id] = None
+    return result
+
+
+def raise_final_value(final_value, dependency_value):
+    """
+    Повышение итоговой ценности до уровня ценности с учетом зависимостей.
+
+    Только для пересчета в режиме raise_only, когда ценность активов, от
+    которых зависит актив, могла лишь вырасти: итоговая ценность не
+    понижается, поэтому при удалении связей ее пересчитывать так нельзя.
+    """
+    if dependency_value == 'высокая' and final_value != 'В':
+        return 'В'
+    if dependency_value == 'средняя' and final_value == 'Н':
+        return 'С'
+    return final_value
+
+
+def recalculate_dependency_values(context_id, raise_only=False, changed_asset_ids=None):
+    """
+    Пересчет dependency_value/final_value для активов контекста.
+
+    Ценности активов загружаются одним запросом, ребра берутся из индекса
+    графа зависимостей контекста (dependency_graph), распространение
+    выполняется в памяти, изменения записываются одним пакетным UPDATE и
+    одним commit. При raise_only=True значения только повышаются, а текущее
+    dependency_value актива учитывается как нижняя граница (так его
+    получают и зависящие от актива активы); final_value повышается вслед за
+    dependency_value. Без raise_only dependency_value рассчитывается заново
+    (и может понизиться), а final_value не изменяется.
+
+    Если передан changed_asset_ids, пересчитываются только эти активы и
+    активы, транзитивно зависящие от них.
+
+    Возвращает список id активов, у которых изменилось dependency_value.
+    """
+    assets = {
+        asset_id: (value_without_dependencies, dependency_value, final_value)
+        for asset_id, value_without_dependencies, dependency_value, final_value in db.session.query(
+            Asset.id, Asset.value_without_dependencies, Asset.dependency_value, Asset.final_value
+        ).filter(Asset.context_id == context_id)
+    }
+    if not assets:
+        return []
+
+    graph = get_dependency_graph(context_id)
+    edges = list(graph.edges())
+
+    targets = set(assets)
+    if changed_asset_ids is not None:
+        targets = (graph.dependents(changed_asset_ids) | set(changed_asset_ids)) & targets
+        if not targets:
+            return []
+        # Для расчета нужен только подграф, достижимый из пересчитываемых активов
+        subgraph = graph.dependencies(targets) | targets
+        edges = [edge for edge in edges if edge[0] in subgraph]
+    else:
+        subgraph = None
+
+    # Зависимости на активы других контекстов учитываем по их собственной ценности
+    external_ids = {target for _, target in edges if target not in assets}
+    base_priorities = {}
+    if external_ids:
+        for asset_id, value_without_dependencies in db.session.query(
+            Asset.id, Asset.value_without_dependencies
+        ).filter(Asset.id.in_(external_ids)):
+            base_priorities[asset_id] = VALUE_PRIORITY.get(value_without_dependencies, 0)
+
+    for asset_id, (value_without_dependencies, dependency_value, _) in assets.items():
+        if subgraph is not None and asset_id not in subgraph:
+            continue
+        priority = VALUE_PRIORITY.get(value_without_dependencies, 0)
+        if raise_only:
+            priority = max(priority, DEPENDENCY_VALUE_PRIORITY.get(dependency_value, 0))
+        base_priorities[asset_id] = priority
+
+    computed = compute_dependency_values(base_priorities, edges)
+
+    now = datetime.utcnow()
+    mappings = []
+    for asset_id in targets:
+        _, dependency_value, final_value = assets[asset_id]
+        new_dependency_value = computed[asset_id]
+        if raise_only and new_dependency_value is not None:
+            current_priority = DEPENDENCY_VALUE_PRIORITY.get(dependency_value, 0)
+            if DEPENDENCY_VALUE_PRIORITY.get(new_dependency_value, 0) <= current_priority:
+                new_dependency_value = dependency_value
+        if new_dependency_value == dependency_value:
+            continue
+        mapping = {
+            'id': asset_id,
+            'dependency_value': new_dependency_value,
+            'updated_at': now
+        }
+        if raise_only:
+            mapping['final_value'] = raise_final_value(final_value, new_dependency_value)
+        mappings.append(mapping)
+
+    if mappings:
+        db.session.bulk_update_mappings(Asset, mappings)
+    db.session.commit()
+
+    return sorted(mapping['id'] for mapping in mappings)
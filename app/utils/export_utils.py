@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from app import db
+from app.models import Context, Asset, Threat, Vulnerability, Incident, Risk, RiskTreatmentPlan
+
+# Строки читаются из курсора БД пакетами по EXPORT_BATCH_SIZE (yield_per),
+# клиенту отправляются фрагментами по EXPORT_CHUNK_ROWS строк
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_ROWS = 500
+
+
+def _filter_by_asset_context(query, context_id):
+    return query.join(Asset, Asset.id == Incident.asset_id).filter(Asset.context_id == context_id)
+
+
+# Выгружаемые сущности: модель и фильтр по контексту (None - справочник без контекста)
+EXPORT_ENTITIES = {
+    'contexts': (Context, lambda query, context_id: query.filter(Context.id == context_id)),
+    'assets': (Asset, lambda query, context_id: query.filter(Asset.context_id == context_id)),
+    'threats': (Threat, None),
+    'vulnerabilities': (Vulnerability, None),
+    'incidents': (Incident, _filter_by_asset_context),
+    'risks': (
+        Risk,
+        lambda query, context_id: _filter_by_asset_context(
+            query.join(Incident, Incident.id == Risk.incident_id), context_id
+        )
+    ),
+    'treatment_plans': (
+        RiskTreatmentPlan,
+        lambda query, context_id: _filter_by_asset_context(
+            query.join(Incident, Incident.id == RiskTreatmentPlan.incident_id), context_id
+        )
+    )
+}
+
+
+def export_columns(entity, fields=None):
+    """Колонки таблицы сущности (в порядке модели), ограниченные fields"""
+    model, _ = EXPORT_ENTITIES[entity]
+    return [
+        getattr(model, column.key) for column in model.__table__.columns
+        if fields is None or column.key in fields
+    ]
+
+
+def iter_export_rows(entity, columns, context_id=None):
+    """
+    Кортежи значений колонок в порядке id. Записи читаются с курсора БД
+    пакетами (yield_per), ORM-объекты не создаются.
+    """
+    model, context_filter = EXPORT_ENTITIES[entity]
+    query = db.session.query(*columns)
+    if context_id and context_filter is not None:
+        query = context_filter(query, context_id)
+    return query.order_by(model.id).yield_per(EXPORT_BATCH_SIZE)
+
+
+def _export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def generate_ndjson(entity, context_id=None, fields=None):
+    """Выгрузка в NDJSON: одна JSON-запись на строку"""
+    columns = export_columns(entity, fields)
+    names = [column.key for column in columns]
+
+    def lines():
+        for row in iter_export_rows(entity, columns, context_id):
+            item = {name: _export_value(value) for name, value in zip(names, row)}
+            yield json.dumps(item, ensure_ascii=False) + '\n'
+
+    return _chunked(lines())
+
+
+def generate_csv(entity, context_id=None, fields=None):
+    """
+    Выгрузка в CSV: строка заголовка с именами колонок, затем записи.
+    Первым символом идет BOM, чтобы Excel распознал кодировку UTF-8.
+    """
+    columns = export_columns(entity, fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    def lines():
+        yield '\ufeff' + line([column.key for column in columns])
+        for row in iter_export_rows(entity, columns, context_id):
+            yield line([_export_value(value) for value in row])
+
+    return _chunked(lines())
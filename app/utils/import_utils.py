@@ -1,110 +1,397 @@
-import pandas as pd
-from app.models import Threat, Vulnerability
+from app.models import Threat, Vulnerability, ImportManifest
 from app import db
+import hashlib
+import json
 import os
+import time
+from datetime import date, datetime
 
-def import_threats_from_xlsx(file_path):
+# Соответствие столбцов выгрузки thrlist.xlsx полям модели Threat
+THREAT_COLUMN_MAPPING = {
+    'Идентификатор УБИ': 'bdu_id',
+    'Наименование УБИ': 'name',
+    'Описание': 'description',
+    'Источник угрозы (характеристика и потенциал нарушителя)': 'source',
+    'Объект воздействия': 'target_object',
+    'Нарушение конфиденциальности': 'confidentiality_violation',
+    'Нарушение целостности': 'integrity_violation',
+    'Нарушение доступности': 'availability_violation',
+    'Дата включения угрозы в БнД УБИ': 'published_at',
+    'Дата последнего изменения данных': 'updated_at'
+}
+
+THREAT_TEXT_FIELDS = ['name', 'description', 'source', 'target_object']
+THREAT_FLAG_FIELDS = ['confidentiality_violation', 'integrity_violation', 'availability_violation']
+THREAT_DATE_FIELDS = ['published_at', 'updated_at']
+
+
+def read_bdu_sheet(file_path, key_column):
+    """
+    Чтение листа выгрузки БДУ ФСТЭК.
+    В официальных файлах над строкой заголовков есть строка с группами
+    столбцов ("Общая информация", "Последствия"...), поэтому строка
+    заголовков ищется по наличию ключевого столбца.
+    """
+    # pandas загружается только при реальном импорте, чтобы не замедлять запуск
+    import pandas as pd
+    
+    raw = pd.read_excel(file_path, header=None)
+    header_row = 0
+    for index in range(min(len(raw), 10)):
+        if key_column in raw.iloc[index].astype(str).tolist():
+            header_row = index
+            break
+    df = raw.iloc[header_row + 1:].reset_index(drop=True)
+    df.columns = raw.iloc[header_row].tolist()
+    return df
+
+
+def prepare_threats_frame(df):
+    """
+    Приведение DataFrame угроз к типам модели Threat (векторно, без обхода строк)
+    """
+    import pandas as pd
+    
+    df = df.rename(columns=THREAT_COLUMN_MAPPING)
+    
+    df['bdu_id'] = pd.to_numeric(df['bdu_id'], errors='coerce')
+    df = df.dropna(subset=['bdu_id'])
+    df['bdu_id'] = df['bdu_id'].astype(int)
+    # При повторах идентификатора в файле берем последнюю строку
+    df = df.drop_duplicates(subset='bdu_id', keep='last')
+    
+    for field in THREAT_TEXT_FIELDS:
+        if field not in df.columns:
+            df[field] = ''
+        df[field] = df[field].fillna('').astype(str)
+    
+    for field in THREAT_FLAG_FIELDS:
+        if field not in df.columns:
+            df[field] = 0
+        df[field] = pd.to_numeric(df[field], errors='coerce').fillna(0).astype(int)
+    
+    for field in THREAT_DATE_FIELDS:
+        if field not in df.columns:
+            df[field] = None
+        dates = pd.to_datetime(df[field], errors='coerce')
+        df[field] = dates.dt.date.astype(object).where(dates.notna(), None)
+    
+    columns = ['bdu_id'] + THREAT_TEXT_FIELDS + THREAT_FLAG_FIELDS + THREAT_DATE_FIELDS
+    return df[columns]
+
+
+def import_threats_from_xlsx(file_path, update_existing=False):
     """
     Импорт угроз из файла thrlist.xlsx (БДУ ФСТЭК)
+    
+    Существующие bdu_id загружаются одним запросом, новые угрозы вставляются
+    одним пакетом (executemany). При update_existing=True угрозы, у которых
+    в файле изменилась "Дата последнего изменения данных", обновляются;
+    иначе они пропускаются.
+    
+    Возвращает словарь со статистикой импорта.
     """
+    import pandas as pd
+    
+    started_at = time.perf_counter()
     try:
-        # Чтение данных из Excel файла
-        df = pd.read_excel(file_path)
+        df = prepare_threats_frame(read_bdu_sheet(file_path, 'Идентификатор УБИ'))
         
-        # Переименовываем столбцы для удобства работы
-        column_mapping = {
-            'Идентификатор УБИ': 'bdu_id',
-            'Наименование УБИ': 'name',
-            'Описание': 'description',
-            'Источник угрозы (характеристика и потенциал нарушителя)': 'source',
-            'Объект воздействия': 'target_object',
-            'Нарушение конфиденциальности': 'confidentiality_violation',
-            'Нарушение целостности': 'integrity_violation',
-            'Нарушение доступности': 'availability_violation',
-            'Дата включения угрозы в БнД УБИ': 'published_at',
-            'Дата последнего изменения данных': 'updated_at'
+        # Все уже загруженные угрозы БДУ одним запросом
+        existing = {
+            bdu_id: (threat_id, updated_at)
+            for threat_id, bdu_id, updated_at in db.session.query(
+                Threat.id, Threat.bdu_id, Threat.updated_at
+            ).filter(Threat.bdu_id.isnot(None))
         }
         
-        # Переименовываем столбцы в DataFrame
-        df.rename(columns=column_mapping, inplace=True)
+        is_new = ~df['bdu_id'].isin(existing.keys())
+        new_rows = df[is_new]
         
-        imported_count = 0
+        new_records = new_rows.to_dict('records')
+        for record in new_records:
+            record['imported_from_bdu'] = True
+        if new_records:
+            db.session.bulk_insert_mappings(Threat, new_records)
         
-        for index, row in df.iterrows():
-            # Проверяем, существует ли уже угроза с таким идентификатором УБИ
-            existing_threat = Threat.query.filter_by(bdu_id=row.get('bdu_id')).first()
-            
-            if not existing_threat:
-                threat = Threat(
-                    bdu_id=row.get('bdu_id'),
-                    name=row.get('name', ''),
-                    description=row.get('description', ''),
-                    source=row.get('source', ''),
-                    target_object=row.get('target_object', ''),
-                    confidentiality_violation=int(row.get('confidentiality_violation', 0)),
-                    integrity_violation=int(row.get('integrity_violation', 0)),
-                    availability_violation=int(row.get('availability_violation', 0)),
-                    published_at=row.get('published_at'),
-                    updated_at=row.get('updated_at'),
-                    imported_from_bdu=True
-                )
-                
-                db.session.add(threat)
-                imported_count += 1
+        updated_count = 0
+        if update_existing:
+            known_rows = df[~is_new]
+            file_updated_at = pd.to_datetime(known_rows['updated_at'])
+            stored_updated_at = pd.to_datetime(
+                known_rows['bdu_id'].map({bdu_id: value[1] for bdu_id, value in existing.items()})
+            )
+            # Обновляем, если дата изменения в файле новее сохраненной (или не была сохранена)
+            changed = file_updated_at.notna() & (stored_updated_at.isna() | (file_updated_at > stored_updated_at))
+            changed_records = known_rows[changed].to_dict('records')
+            for record in changed_records:
+                record['id'] = existing[record['bdu_id']][0]
+            if changed_records:
+                db.session.bulk_update_mappings(Threat, changed_records)
+            updated_count = len(changed_records)
         
         db.session.commit()
-        return imported_count
     
     except Exception as e:
         db.session.rollback()
         raise e
+    
+    elapsed = time.perf_counter() - started_at
+    stats = {
+        'rows': len(df),
+        'imported': len(new_records),
+        'updated': updated_count,
+        'skipped': len(df) - len(new_records) - updated_count,
+        'elapsed': round(elapsed, 3),
+        'rows_per_sec': round(len(df) / elapsed) if elapsed > 0 else len(df)
+    }
+    print(f"Импорт угроз БДУ: строк {stats['rows']}, добавлено {stats['imported']}, "
+          f"обновлено {stats['updated']}, пропущено {stats['skipped']} "
+          f"({stats['rows_per_sec']} строк/с)")
+    return stats
+
+# Размер пакета строк при потоковом импорте уязвимостей.
+# Держим ниже лимита параметров SQLite (999) для запроса IN (...)
+VULNERABILITY_CHUNK_SIZE = 500
+
+# Соответствие столбцов vullist.xlsx полям модели Vulnerability.
+# Поддерживаются как заголовки выгрузки БДУ, так и имена полей модели
+VULNERABILITY_COLUMN_MAPPING = {
+    'Идентификатор': 'id',
+    'Наименование уязвимости': 'name',
+    'Описание уязвимости': 'description',
+    'Название ПО': 'software_name',
+    'Версия ПО': 'software_version',
+    'Вендор ПО': 'vendor',
+    'Наименование ОС и тип аппаратной платформы': 'platform',
+    'Дата выявления': 'discovered_at',
+    'Уровень опасности уязвимости': 'level',
+    'Наличие эксплойта': 'exploit_available',
+    'Информация об устранении': 'fix_info',
+    'Идентификаторы других систем описания уязвимости': 'cve',
+    'Тип ошибки CWE': 'cwe',
+    'CVSS 3.0': 'cvss_score'
+}
+
+VULNERABILITY_FIELDS = [
+    'id', 'name', 'description', 'software_name', 'software_version', 'vendor',
+    'platform', 'discovered_at', 'level', 'exploit_available', 'fix_info',
+    'cve', 'cwe', 'cvss_score'
+]
+
+
+def get_peak_rss_mb():
+    """Пиковое потребление памяти процессом (МБ) или None, если недоступно"""
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # На macOS ru_maxrss в байтах, на Linux - в килобайтах
+    if sys.platform == 'darwin':
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def _parse_date(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for date_format in ('%d.%m.%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_float(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        value = value.strip().lower()
+        return value in ('1', 'true', 'да', 'yes') or value.startswith('существует')
+    return bool(value)
+
+
+def _vulnerability_record(row, column_index):
+    """Преобразование строки листа в словарь полей Vulnerability"""
+    record = {}
+    for field in VULNERABILITY_FIELDS:
+        index = column_index.get(field)
+        value = row[index] if index is not None and index < len(row) else None
+        if field == 'discovered_at':
+            record[field] = _parse_date(value)
+        elif field == 'cvss_score':
+            record[field] = _parse_float(value)
+        elif field == 'exploit_available':
+            record[field] = _parse_bool(value)
+        else:
+            record[field] = '' if value is None else str(value).strip()
+    record['imported_from_bdu'] = True
+    return record
+
+
+def _insert_vulnerability_chunk(records):
+    """
+    Вставка пакета уязвимостей в отдельной транзакции.
+    Возвращает количество добавленных записей.
+    """
+    ids = [record['id'] for record in records]
+    existing_ids = {
+        vulnerability_id for (vulnerability_id,) in
+        db.session.query(Vulnerability.id).filter(Vulnerability.id.in_(ids))
+    }
+    new_records = []
+    for record in records:
+        if record['id'] not in existing_ids:
+            new_records.append(record)
+            # Защита от повторов идентификатора внутри файла
+            existing_ids.add(record['id'])
+    
+    try:
+        if new_records:
+            db.session.bulk_insert_mappings(Vulnerability, new_records)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
+    return len(new_records)
 
-def import_vulnerabilities_from_xlsx(file_path):
+
+def import_vulnerabilities_from_xlsx(file_path, chunk_size=VULNERABILITY_CHUNK_SIZE, progress_callback=None):
     """
-    Импорт уязвимостей из файла vullist.xlsx (БДУ ФСТЭК)
+    Потоковый импорт уязвимостей из файла vullist.xlsx (БДУ ФСТЭК)
+    
+    Лист читается в режиме read-only openpyxl пакетами по chunk_size строк,
+    каждый пакет вставляется в своей транзакции, поэтому потребление памяти
+    не зависит от размера файла. После каждого пакета вызывается
+    progress_callback(stats), если он передан.
+    
+    Возвращает словарь со статистикой импорта.
     """
+    from openpyxl import load_workbook
+    
+    started_at = time.perf_counter()
+    stats = {'rows': 0, 'imported': 0, 'skipped': 0, 'elapsed': 0, 'rows_per_sec': 0, 'peak_rss_mb': None}
+    
+    def update_progress():
+        elapsed = time.perf_counter() - started_at
+        stats['elapsed'] = round(elapsed, 3)
+        stats['rows_per_sec'] = round(stats['rows'] / elapsed) if elapsed > 0 else stats['rows']
+        stats['peak_rss_mb'] = get_peak_rss_mb()
+        if progress_callback:
+            progress_callback(dict(stats))
+    
+    def flush(chunk):
+        imported = _insert_vulnerability_chunk(chunk)
+        stats['rows'] += len(chunk)
+        stats['imported'] += imported
+        stats['skipped'] += len(chunk) - imported
+        update_progress()
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
     try:
-        # Чтение данных из Excel файла
-        df = pd.read_excel(file_path)
-        
-        imported_count = 0
+        rows = workbook.active.iter_rows(values_only=True)
         
-        for index, row in df.iterrows():
-            # Проверяем, существует ли уже уязвимость с таким ID
-            existing_vulnerability = Vulnerability.query.filter_by(id=row.get('id', '')).first()
-            
-            if not existing_vulnerability:
-                vulnerability = Vulnerability(
-                    id=row.get('id', ''),
-                    name=row.get('name', ''),
-                    description=row.get('description', ''),
-                    software_name=row.get('software_name', ''),
-                    software_version=row.get('software_version', ''),
-                    vendor=row.get('vendor', ''),
-                    platform=row.get('platform', ''),
-                    discovered_at=row.get('discovered_at'),
-                    level=row.get('level', ''),
-                    exploit_available=bool(row.get('exploit_available', False)),
-                    fix_info=row.get('fix_info', ''),
-                    cve=row.get('cve', ''),
-                    cwe=row.get('cwe', ''),
-                    cvss_score=row.get('cvss_score'),
-                    imported_from_bdu=True
-                )
-                
-                db.session.add(vulnerability)
-                imported_count += 1
+        # Строка заголовков: в выгрузке БДУ ей предшествует строка с названием листа
+        column_index = None
+        for row in rows:
+            headers = [str(cell).strip() if cell is not None else '' for cell in row]
+            mapped = [VULNERABILITY_COLUMN_MAPPING.get(header, header) for header in headers]
+            if 'id' in mapped:
+                column_index = {field: index for index, field in enumerate(mapped) if field in VULNERABILITY_FIELDS}
+                break
+        if column_index is None:
+            return stats
         
+        chunk = []
+        for row in rows:
+            record = _vulnerability_record(row, column_index)
+            if not record['id']:
+                continue
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+    finally:
+        workbook.close()
+    
+    update_progress()
+    print(f"Импорт уязвимостей БДУ: строк {stats['rows']}, добавлено {stats['imported']}, "
+          f"пропущено {stats['skipped']} ({stats['rows_per_sec']} строк/с, "
+          f"пиковая память {stats['peak_rss_mb']} МБ)")
+    return stats
+
+def file_sha256(file_path, block_size=1024 * 1024):
+    """Потоковый расчет SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def import_if_changed(file_path, import_func):
+    """
+    Импорт файла БДУ только при изменении его содержимого.
+    
+    Для каждого файла в таблице import_manifests хранятся размер, mtime,
+    SHA-256 и результат последнего импорта. Если размер и mtime совпадают,
+    файл даже не читается; если они изменились, но хеш тот же - обновляется
+    только манифест. Возвращает статистику импорта или None, если импорт
+    был пропущен.
+    """
+    source_name = os.path.basename(file_path)
+    file_stat = os.stat(file_path)
+    manifest = ImportManifest.query.filter_by(source_name=source_name).first()
+    
+    if manifest and manifest.file_size == file_stat.st_size and manifest.file_mtime == file_stat.st_mtime:
+        return None
+    
+    sha256 = file_sha256(file_path)
+    if manifest and manifest.sha256 == sha256:
+        manifest.file_path = file_path
+        manifest.file_size = file_stat.st_size
+        manifest.file_mtime = file_stat.st_mtime
         db.session.commit()
-        return imported_count
+        return None
     
-    except Exception as e:
-        db.session.rollback()
-        raise e
+    stats = import_func(file_path)
+    
+    if not manifest:
+        manifest = ImportManifest(source_name=source_name)
+        db.session.add(manifest)
+    manifest.file_path = file_path
+    manifest.file_size = file_stat.st_size
+    manifest.file_mtime = file_stat.st_mtime
+    manifest.sha256 = sha256
+    manifest.result = json.dumps(stats)
+    manifest.imported_at = datetime.utcnow()
+    db.session.commit()
+    return stats
+
 
 def load_default_threats_and_vulnerabilities():
     """
     Загрузка угроз и уязвимостей из файлов в директории data/
+    
+    Файлы, не изменившиеся с прошлого запуска, пропускаются по манифесту
+    импорта; измененный файл угроз импортируется инкрементально
+    (новые угрозы добавляются, измененные - обновляются).
     """
     base_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
     threats_file = os.path.join(base_path, 'thrlist.xlsx')
@@ -114,9 +401,16 @@ def load_default_threats_and_vulnerabilities():
     imported_vulnerabilities = 0
     
     if os.path.exists(threats_file):
-        imported_threats = import_threats_from_xlsx(threats_file)
+        stats = import_if_changed(
+            threats_file,
+            lambda file_path: import_threats_from_xlsx(file_path, update_existing=True)
+        )
+        if stats:
+            imported_threats = stats['imported']
     
     if os.path.exists(vulnerabilities_file):
-        imported_vulnerabilities = import_vulnerabilities_from_xlsx(vulnerabilities_file)
+        stats = import_if_changed(vulnerabilities_file, import_vulnerabilities_from_xlsx)
+        if stats:
+            imported_vulnerabilities = stats['imported']
     
-    return imported_threats, imported_vulnerabilities
\ No newline at end of file
+    return imported_threats, imported_vulnerabilities
@@ -0,0 +1,195 @@
+from datetime import datetime
+
+from app import db
+from app.models import Incident, Risk, RiskTreatmentPlan
+from app.utils.db_utils import dialect_insert
+from app.utils.sequence_utils import allocate_sequence_block, next_sequence_value
+
+# Колонки уникального индекса uq_incidents_asset_threat_vulnerability
+INCIDENT_KEY_COLUMNS = ['asset_id', 'threat_id', 'vulnerability_id']
+
+# Поля инцидента, обновляемые при повторном создании той же комбинации
+INCIDENT_UPSERT_FIELDS = ['operational_impact', 'business_impact', 'impact_level', 'scenario_name', 'scenario_probability']
+
+
+def _existing_combinations(asset_ids, threat_ids, vulnerability_ids):
+    return set(db.session.query(
+        Incident.asset_id, Incident.threat_id, Incident.vulnerability_id
+    ).filter(
+        Incident.asset_id.in_(asset_ids),
+        Incident.threat_id.in_(threat_ids),
+        Incident.vulnerability_id.in_(vulnerability_ids)
+    ))
+
+
+def _incident_values(values):
+    """Поля инцидента из данных запроса (пустые значения полей с CHECK -> None)"""
+    result = {}
+    for field in INCIDENT_UPSERT_FIELDS:
+        if field in values:
+            value = values[field]
+            if field in ('impact_level', 'scenario_probability') and not value:
+                value = None
+            result[field] = value
+    return result
+
+
+def generate_incidents(asset_ids, threat_ids, vulnerability_ids, values=None):
+    """
+    Создание инцидентов для всех комбинаций актив x угроза x уязвимость.
+
+    Уже существующие комбинации (и повторы во входных списках) пропускаются.
+    Новые инциденты вставляются одним пакетом (executemany) без создания
+    ORM-объектов; id выделяются одним блоком из последовательности incidents,
+    обозначение сценария - СИ<id>, как при поштучном создании. Комбинации,
+    созданные параллельным запросом после проверки, пропускаются через
+    ON CONFLICT DO NOTHING по уникальному индексу. values - общие поля
+    инцидентов (operational_impact, business_impact, impact_level).
+
+    Возвращает сводку: created, skipped, first_id, last_id.
+    """
+    values = values or {}
+    asset_ids = list(dict.fromkeys(asset_ids))
+    threat_ids = list(dict.fromkeys(threat_ids))
+    vulnerability_ids = list(dict.fromkeys(vulnerability_ids))
+    total = len(asset_ids) * len(threat_ids) * len(vulnerability_ids)
+    common_values = {
+        'operational_impact': values.get('operational_impact'),
+        'business_impact': values.get('business_impact'),
+        'impact_level': values.get('impact_level') or None
+    }
+
+    existing = _existing_combinations(asset_ids, threat_ids, vulnerability_ids)
+    combinations = [
+        (asset_id, threat_id, vulnerability_id)
+        for asset_id in asset_ids
+        for threat_id in threat_ids
+        for vulnerability_id in vulnerability_ids
+        if (asset_id, threat_id, vulnerability_id) not in existing
+    ]
+    # Номера всего пакета выделяются одним обращением к последовательности
+    first_id = allocate_sequence_block('incidents', len(combinations)) if combinations else None
+    now = datetime.utcnow()
+
+    mappings = []
+    for incident_id, (asset_id, threat_id, vulnerability_id) in enumerate(combinations, first_id or 0):
+        mappings.append(dict(
+            common_values,
+            id=incident_id,
+            asset_id=asset_id,
+            threat_id=threat_id,
+            vulnerability_id=vulnerability_id,
+            scenario_name=f"СИ{incident_id}",
+            created_at=now,
+            updated_at=now
+        ))
+
+    insert = dialect_insert()
+    if mappings and insert is not None:
+        db.session.execute(
+            insert(Incident.__table__).on_conflict_do_nothing(index_elements=INCIDENT_KEY_COLUMNS),
+            mappings
+        )
+    elif mappings:
+        db.session.bulk_insert_mappings(Incident, mappings)
+    db.session.commit()
+
+    created, created_first_id, created_last_id = 0, None, None
+    if mappings:
+        created, created_first_id, created_last_id = db.session.query(
+            db.func.count(Incident.id), db.func.min(Incident.id), db.func.max(Incident.id)
+        ).filter(Incident.id.between(first_id, first_id + len(mappings) - 1)).one()
+
+    return {
+        'created': created,
+        'skipped': total - created,
+        'first_id': created_first_id,
+        'last_id': created_last_id
+    }
+
+
+def upsert_incident(data):
+    """
+    Создание инцидента или обновление существующего с той же комбинацией
+    актив/угроза/уязвимость (INSERT ... ON CONFLICT DO UPDATE): при повторной
+    отправке формы дубликат не создается, а переданные поля обновляются.
+
+    Возвращает (инцидент, создан ли новый).
+    """
+    key = {column: data.get(column) for column in INCIDENT_KEY_COLUMNS}
+    values = _incident_values(data)
+    # id нового инцидента - из последовательности (до изменений в сессии);
+    # если комбинация уже есть, номер остается неиспользованным
+    incident_id = next_sequence_value('incidents')
+    new_values = dict(values, id=incident_id)
+    if 'scenario_name' not in values:
+        new_values['scenario_name'] = f"СИ{incident_id}"
+
+    def find():
+        return Incident.query.filter_by(**key).order_by(Incident.id).first()
+
+    insert = dialect_insert()
+    if insert is None:
+        incident = find()
+        created = incident is None
+        if created:
+            incident = Incident(**key, **new_values)
+            db.session.add(incident)
+        for field, value in values.items():
+            setattr(incident, field, value)
+        db.session.commit()
+        return incident, created
+
+    existed = find() is not None
+    now = datetime.utcnow()
+    statement = insert(Incident.__table__).values(**key, **new_values, created_at=now, updated_at=now)
+    if values:
+        statement = statement.on_conflict_do_update(
+            index_elements=INCIDENT_KEY_COLUMNS,
+            set_={field: getattr(statement.excluded, field) for field in list(values) + ['updated_at']}
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=INCIDENT_KEY_COLUMNS)
+    db.session.execute(statement)
+    db.session.commit()
+
+    incident = find()
+    # Объект мог быть загружен в сессию до обновления
+    db.session.refresh(incident)
+    return incident, not existed
+
+
+def merge_duplicate_incidents():
+    """
+    Объединение дубликатов инцидентов (одинаковые актив, угроза и уязвимость)
+    перед созданием уникального индекса: остается инцидент с меньшим id,
+    риски и планы обработки дубликатов переносятся на него.
+
+    Возвращает количество удаленных дубликатов.
+    """
+    groups = db.session.query(
+        Incident.asset_id, Incident.threat_id, Incident.vulnerability_id
+    ).group_by(
+        Incident.asset_id, Incident.threat_id, Incident.vulnerability_id
+    ).having(db.func.count(Incident.id) > 1).all()
+    if not groups:
+        return 0
+
+    removed = 0
+    for asset_id, threat_id, vulnerability_id in groups:
+        ids = [incident_id for (incident_id,) in db.session.query(Incident.id).filter_by(
+            asset_id=asset_id, threat_id=threat_id, vulnerability_id=vulnerability_id
+        ).order_by(Incident.id)]
+        keep_id, duplicate_ids = ids[0], ids[1:]
+        Risk.query.filter(Risk.incident_id.in_(duplicate_ids)).update(
+            {'incident_id': keep_id}, synchronize_session=False
+        )
+        RiskTreatmentPlan.query.filter(RiskTreatmentPlan.incident_id.in_(duplicate_ids)).update(
+            {'incident_id': keep_id}, synchronize_session=False
+        )
+        Incident.query.filter(Incident.id.in_(duplicate_ids)).delete(synchronize_session=False)
+        removed += len(duplicate_ids)
+
+    db.session.commit()
+    print(f"Объединено дубликатов инцидентов: {removed}")
+    return removed
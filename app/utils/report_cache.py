@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+
+from app import db
+from app.models import DataVersion, Report, ReportCacheEntry, ReportJob
+
+# Таблицы, данные которых попадают в раздел отчета.
+# Версия таблицы увеличивается триггером при каждом INSERT/UPDATE/DELETE,
+# поэтому ключ кэша меняется при любом изменении данных раздела
+REPORT_MODULE_TABLES = {
+    'assets': ['assets', 'asset_dependencies', 'asset_security_property_impacts', 'impact_criteria'],
+    'threats': ['assets', 'threats', 'asset_threats', 'threat_assessment'],
+    'vulnerabilities': ['assets', 'vulnerabilities', 'asset_vulnerabilities', 'vulnerability_assessment'],
+    'incidents': ['assets', 'threats', 'vulnerabilities', 'incidents', 'risk_treatment_plans'],
+    'risks': ['assets', 'threats', 'vulnerabilities', 'incidents', 'risks', 'risk_treatment_plans']
+}
+# Шапка отчета и критерии берутся из контекста
+REPORT_COMMON_TABLES = ['contexts']
+
+# Версия формата отчета: увеличить при изменении вида отчета,
+# чтобы ранее сохраненные файлы не выдавались из кэша
+REPORT_FORMAT_VERSION = 3
+
+
+def tracked_tables():
+    tables = set(REPORT_COMMON_TABLES)
+    for module_tables in REPORT_MODULE_TABLES.values():
+        tables.update(module_tables)
+    return sorted(tables)
+
+
+def is_report_cache_supported():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def ensure_data_version_triggers():
+    """
+    Создание счетчиков версий и триггеров для таблиц, используемых в отчетах.
+    Триггеры срабатывают и при пакетных операциях, где события ORM не вызываются.
+    """
+    if not is_report_cache_supported():
+        return False
+
+    try:
+        with db.engine.begin() as connection:
+            for table in tracked_tables():
+                connection.exec_driver_sql(
+                    "INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (?, 0)", (table,)
+                )
+                for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                    connection.exec_driver_sql(
+                        f"CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()} "
+                        f"AFTER {operation} ON {table} BEGIN "
+                        f"UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}'; END"
+                    )
+    except Exception as e:
+        print(f"Warning: Could not create report cache triggers: {e}")
+        return False
+    return True
+
+
+def report_cache_key(context_id, modules):
+    """
+    Ключ кэша: sha256 от контекста, списка модулей (в порядке отчета) и
+    версий данных задействованных таблиц. None - кэширование недоступно.
+    """
+    if not is_report_cache_supported():
+        return None
+
+    tables = set(REPORT_COMMON_TABLES)
+    for module in modules:
+        tables.update(REPORT_MODULE_TABLES.get(module, []))
+    versions = dict(
+        db.session.query(DataVersion.table_name, DataVersion.version).filter(DataVersion.table_name.in_(tables))
+    )
+    if len(versions) != len(tables):
+        # Триггеры не созданы - изменения данных не отслеживаются
+        return None
+
+    payload = json.dumps({
+        'format': REPORT_FORMAT_VERSION,
+        'context_id': int(context_id) if context_id else None,
+        'modules': list(modules),
+        'versions': versions
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_report(cache_key):
+    """Отчет из кэша по ключу (или None, если записи нет или файл удален)"""
+    if not cache_key:
+        return None
+
+    entry = ReportCacheEntry.query.filter_by(cache_key=cache_key).first()
+    if entry is None:
+        return None
+    if not entry.report or not os.path.exists(entry.report.file_path):
+        db.session.delete(entry)
+        db.session.commit()
+        return None
+
+    entry.hits = (entry.hits or 0) + 1
+    entry.last_used_at = datetime.utcnow()
+    db.session.commit()
+    return entry.report
+
+
+def store_cached_report(cache_key, report):
+    """Привязка сформированного отчета к ключу кэша"""
+    if not cache_key:
+        return
+    db.session.add(ReportCacheEntry(cache_key=cache_key, report_id=report.id))
+    db.session.commit()
+
+
+def _remove_report(report):
+    """Удаление отчета кэша: файл, запись и ссылки задач на него"""
+    if report.file_path and os.path.exists(report.file_path):
+        os.remove(report.file_path)
+    # Задача остается в истории без ссылки на удаленный отчет
+    ReportJob.query.filter_by(report_id=report.id).update({'report_id': None})
+    db.session.delete(report)
+
+
+def _report_size(report):
+    if report.file_path and os.path.exists(report.file_path):
+        return os.path.getsize(report.file_path)
+    return 0
+
+
+def evict_report_cache(max_bytes=None, max_age_days=None, keep_report_id=None):
+    """
+    Ограничение кэша отчетов по возрасту и размеру.
+
+    Удаляются только отчеты, сформированные через кэш: сначала не
+    использовавшиеся дольше max_age_days, затем самые давно использованные,
+    пока общий размер их файлов превышает max_bytes. Остальные отчеты
+    каталога в размер не входят и не удаляются. Отчет keep_report_id
+    (только что сформированный и еще не выданный) не удаляется.
+    Возвращает количество удаленных отчетов.
+    """
+    reports = {}
+    for entry in ReportCacheEntry.query.order_by(ReportCacheEntry.last_used_at).all():
+        if entry.report:
+            reports.setdefault(entry.report.id, (entry.last_used_at, entry.report))
+    removed = 0
+
+    if max_age_days:
+        threshold = datetime.utcnow() - timedelta(days=max_age_days)
+        for report_id, (last_used_at, report) in list(reports.items()):
+            if report_id != keep_report_id and last_used_at and last_used_at < threshold:
+                _remove_report(report)
+                del reports[report_id]
+                removed += 1
+
+    if max_bytes:
+        sizes = {report_id: _report_size(report) for report_id, (_, report) in reports.items()}
+        total_size = sum(sizes.values())
+        for report_id, (_, report) in reports.items():
+            if total_size <= max_bytes:
+                break
+            if report_id == keep_report_id:
+                continue
+            total_size -= sizes[report_id]
+            _remove_report(report)
+            removed += 1
+
+    if removed:
+        db.session.commit()
+        print(f"Удалено отчетов из кэша: {removed}")
+    return removed
@@ -0,0 +1,189 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
+import os
+import threading
+import traceback
+import uuid
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Report, ReportJob
+from app.utils.report_cache import evict_report_cache, get_cached_report, report_cache_key, store_cached_report
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'reports')
+
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+# Пул потоков для формирования отчетов создается при первой задаче.
+# Размер пула ограничивает число одновременно формируемых отчетов, чтобы
+# всплеск запросов на отчеты не занимал все ресурсы интерактивных запросов
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, app.config.get('REPORT_WORKERS', 2)),
+                thread_name_prefix='report-worker'
+            )
+        return _executor
+
+
+def save_combined_pdf_report(context_id, modules, progress_callback=None):
+    """
+    Формирование комбинированного PDF отчета, сохранение файла в
+    static/reports и создание записи Report.
+
+    Если данные задействованных таблиц не менялись с момента формирования
+    такого же отчета (тот же контекст и модули), возвращается готовый отчет
+    из кэша. Файл кэшированного отчета именуется по ключу кэша, поэтому
+    каждый отличающийся отчет хранится один раз.
+    """
+    cache_key = report_cache_key(context_id, modules)
+    cached_report = get_cached_report(cache_key)
+    if cached_report is not None:
+        if progress_callback:
+            for module in modules:
+                progress_callback(module)
+        return cached_report
+
+    # reportlab и шрифты загружаются при первом построении отчета
+    from app.utils.report_utils import generate_combined_pdf_report
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    if cache_key:
+        filename = f"combined_report_{cache_key[:32]}.pdf"
+    else:
+        filename = f"combined_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.pdf"
+    file_path = os.path.join(REPORTS_DIR, filename)
+
+    # PDF пишется сразу во временный файл в том же каталоге (без копий в
+    # памяти) и атомарно переименовывается: параллельный запрос не увидит
+    # недописанный файл
+    temp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        generate_combined_pdf_report(context_id, modules, progress_callback, output_path=temp_path)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    report = Report(
+        name=f"Комбинированный отчет от {datetime.now().strftime('%d.%m.%Y %H:%M')}",
+        context_id=int(context_id) if context_id else None,
+        file_path=file_path,
+        file_size=os.path.getsize(file_path),
+        selected_data=json.dumps({'modules': modules})
+    )
+    db.session.add(report)
+    db.session.commit()
+
+    if cache_key:
+        try:
+            store_cached_report(cache_key, report)
+        except IntegrityError:
+            # Такой же отчет параллельно сформирован другим запросом (файл общий)
+            db.session.rollback()
+            db.session.delete(report)
+            db.session.commit()
+            report = get_cached_report(cache_key)
+
+        evict_report_cache(
+            max_bytes=current_app.config.get('REPORT_CACHE_MAX_BYTES'),
+            max_age_days=current_app.config.get('REPORT_CACHE_MAX_AGE_DAYS'),
+            keep_report_id=report.id if report else None
+        )
+    return report
+
+
+def count_active_report_jobs():
+    return ReportJob.query.filter(ReportJob.status.in_(ACTIVE_JOB_STATUSES)).count()
+
+
+def enqueue_report_job(app, context_id, modules):
+    """Создание задачи на формирование отчета и постановка ее в очередь"""
+    job = ReportJob(
+        context_id=int(context_id) if context_id else None,
+        modules=json.dumps(modules),
+        status='queued',
+        progress=json.dumps({module: 'pending' for module in modules})
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    _get_executor(app).submit(run_report_job, app, job.id)
+    return job
+
+
+def run_report_job(app, job_id):
+    """Выполнение задачи в потоке пула (со своим контекстом приложения и сессией)"""
+    with app.app_context():
+        try:
+            # Атомарный захват задачи: одну задачу не выполнят два потока
+            claimed = ReportJob.query.filter_by(id=job_id, status='queued').update(
+                {'status': 'running', 'started_at': datetime.utcnow()}, synchronize_session=False
+            )
+            db.session.commit()
+            if not claimed:
+                return
+
+            job = ReportJob.query.get(job_id)
+            modules = json.loads(job.modules)
+            progress = {module: 'pending' for module in modules}
+            job.progress = json.dumps(progress)
+            db.session.commit()
+
+            def on_progress(stage):
+                if stage in progress:
+                    progress[stage] = 'done'
+                job.progress = json.dumps(progress)
+                db.session.commit()
+
+            report = save_combined_pdf_report(job.context_id, modules, on_progress)
+            job.status = 'done'
+            job.report_id = report.id
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            traceback.print_exc()
+            _mark_job_failed(job_id, str(e))
+        finally:
+            db.session.remove()
+
+
+def _mark_job_failed(job_id, error):
+    """Перевод задачи в статус failed (задача не остается в очереди до перезапуска)"""
+    try:
+        ReportJob.query.filter_by(id=job_id).update(
+            {'status': 'failed', 'error': error, 'finished_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        traceback.print_exc()
+
+
+def resume_report_jobs(app):
+    """
+    Повторная постановка в очередь задач, не завершенных при остановке
+    приложения (таблица задач хранится в БД)
+    """
+    jobs = ReportJob.query.filter(ReportJob.status.in_(ACTIVE_JOB_STATUSES)).order_by(ReportJob.id).all()
+    for job in jobs:
+        job.status = 'queued'
+        job.started_at = None
+    db.session.commit()
+
+    for job in jobs:
+        _get_executor(app).submit(run_report_job, app, job.id)
+    if jobs:
+        print(f"Возобновлено задач формирования отчетов: {len(jobs)}")
+    return len(jobs)
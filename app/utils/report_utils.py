@@ -1,13 +1,16 @@
 from flask import send_file, make_response
-import pandas as pd
+from contextlib import contextmanager
+from functools import lru_cache
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, KeepTogether, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer, KeepTogether, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.utils import simpleSplit
+from sqlalchemy.orm import selectinload
 from app import db
 from app.models import Context
 from app.models import Threat, Vulnerability, Incident, Risk, RiskTreatmentPlan
@@ -23,6 +26,53 @@ from datetime import datetime
 # Полезная ширина для таблиц ~6.5-7 дюймов
 PAGE_WIDTH = 6.5 * inch  # Полезная ширина страницы
 
+# Отступы ячеек в create_table_style и create_detailed_table_style
+TABLE_CELL_PADDING = 3
+DETAILED_TABLE_CELL_PADDING = 6
+# Размер шрифта заголовка и строк таблиц
+TABLE_HEADER_FONT_SIZE = 8
+TABLE_FONT_SIZE = 7
+
+# Одни и те же описания угроз, уровни ('Н', 'С', 'В') и заголовки колонок
+# повторяются в отчете тысячи раз: разметка с переносами кэшируется,
+# а короткие строки используют общий Paragraph в пределах отчета
+WRAP_CACHE_SIZE = 8192
+SHARED_CELL_MAX_LENGTH = 40
+
+# Колонки реестров инцидентов и рисков (сумма ширин = PAGE_WIDTH). Реестр
+# содержит те же поля, что и подробный вид; ширины подобраны так, чтобы
+# слова заголовков и значений помещались в колонку без Paragraph
+INCIDENT_REGISTER_COLUMNS = [
+    ('ID', 0.35*inch),
+    ('Актив', 0.8*inch),
+    ('Угроза', 0.9*inch),
+    ('Уязвимость', 0.85*inch),
+    ('Опер. возд.', 0.5*inch),
+    ('Воздействие на бизнес', 0.95*inch),
+    ('Уровень возд.', 0.65*inch),
+    ('Сценарий (вер.)', 0.72*inch),
+    ('Дата создания', 0.78*inch)
+]
+RISK_REGISTER_COLUMNS = [
+    ('ID', 0.35*inch),
+    ('Актив', 0.85*inch),
+    ('Угроза', 0.95*inch),
+    ('Уязвимость', 0.9*inch),
+    ('Уровень посл.', 0.65*inch),
+    ('Вер. сценария', 0.75*inch),
+    ('Уровень риска', 0.65*inch),
+    ('Приемл.', 0.7*inch),
+    ('Дата создания', 0.7*inch)
+]
+TREATMENT_PLAN_REGISTER_COLUMNS = [
+    ('Инцидент', 0.6*inch),
+    ('ID плана', 0.5*inch),
+    ('Меры', 2.2*inch),
+    ('Остаточный риск', 0.9*inch),
+    ('Сроки', 0.9*inch),
+    ('Ответственные', 1.4*inch)
+]
+
 
 def add_titled_table(elements, title, table, styles, spacer_after=12):
     """Добавляет заголовок и таблицу вместе, чтобы они не разрывались (для небольших таблиц)"""
@@ -102,7 +152,14 @@ def register_cyrillic_font():
     except:
         return 'Helvetica'
 
-CYRILLIC_FONT = register_cyrillic_font()
+@lru_cache(maxsize=None)
+def get_cyrillic_font():
+    """
+    Имя шрифта с поддержкой кириллицы.
+    Регистрация TTF-шрифтов выполняется при первом построении отчета,
+    а не при импорте модуля.
+    """
+    return register_cyrillic_font()
 
 def create_cyrillic_style_sheet():
     """Создание стилей с поддержкой кириллицы"""
@@ -110,8 +167,8 @@ def create_cyrillic_style_sheet():
     
     try:
         from reportlab.pdfbase.pdfmetrics import getFont
-        getFont(CYRILLIC_FONT)
-        font_name = CYRILLIC_FONT
+        font_name = get_cyrillic_font()
+        getFont(font_name)
     except:
         font_name = 'Helvetica'
     
@@ -155,43 +212,89 @@ def create_cyrillic_style_sheet():
         'Table': table_style
     }
 
-def wrap_text(text, max_length=30):
-    """Разбивка текста на строки указанной длины"""
-    if not isinstance(text, str) or len(text) <= max_length:
+@lru_cache(maxsize=WRAP_CACHE_SIZE)
+def _wrap_lines(text, max_length, width, font_name, font_size):
+    if width:
+        # Перенос по фактической ширине строк в шрифте ячейки
+        lines = simpleSplit(text, font_name, font_size, width)
+    else:
+        lines = []
+        current_line = ""
+        for word in text.split():
+            if len(current_line + " " + word) <= max_length:
+                current_line += " " + word if current_line else word
+            else:
+                if current_line:
+                    lines.append(current_line)
+                current_line = word
+        if current_line:
+            lines.append(current_line)
+    return tuple(lines)
+
+def wrap_text(text, max_length=30, width=None, style=None):
+    """
+    Разбивка текста на строки указанной длины.
+    Если известны ширина колонки (width, пт) и стиль ячейки, строки
+    разбиваются по ширине текста в шрифте стиля, иначе - по max_length символов.
+    """
+    if not isinstance(text, str):
         return text
-    
-    words = text.split()
-    lines = []
-    current_line = ""
-    
-    for word in words:
-        if len(current_line + " " + word) <= max_length:
-            current_line += " " + word if current_line else word
-        else:
-            if current_line:
-                lines.append(current_line)
-            current_line = word
-    
-    if current_line:
-        lines.append(current_line)
-    
-    return "<br/>".join(lines)
+    if width and style is not None:
+        available_width = width - style.leftIndent - style.rightIndent
+        return "<br/>".join(_wrap_lines(text, None, available_width, style.fontName, style.fontSize))
+    if len(text) <= max_length:
+        return text
+    return "<br/>".join(_wrap_lines(text, max_length, None, None, None))
 
-def wrap_cell_text(cell, styles, max_length=30):
+@lru_cache(maxsize=WRAP_CACHE_SIZE)
+def _plain_cell_text(text, width, font_name, font_size):
+    """
+    Текст ячейки с переносами строк для вывода без Paragraph (None, если
+    отдельное слово шире колонки - такой ячейке нужен Paragraph)
+    """
+    lines = _wrap_lines(text, None, width, font_name, font_size)
+    if any(pdfmetrics.stringWidth(line, font_name, font_size) > width for line in lines):
+        return None
+    return "\n".join(lines)
+
+def _shared_cell(markup, style, styles):
+    """
+    Общий Paragraph короткой ячейки. Пул хранится в словаре стилей отчета
+    (создается заново для каждого отчета) и освобождается вместе с ним,
+    поэтому один Paragraph не используется в двух документах (Table вызывает
+    wrap ячейки перед каждой отрисовкой, так что внутри документа повтор безопасен)
+    """
+    pool = styles.setdefault('_shared_cells', {}).setdefault(style.name, {})
+    paragraph = pool.get(markup)
+    if paragraph is None:
+        paragraph = pool[markup] = Paragraph(markup, style)
+    return paragraph
+
+def wrap_cell_text(cell, styles, max_length=30, width=None):
     """Обертка текста ячейки в Paragraph для переноса"""
     if isinstance(cell, Paragraph):
         return cell
     if isinstance(cell, str):
-        return Paragraph(wrap_text(cell, max_length), styles['Table'])
+        style = styles['Table']
+        markup = wrap_text(cell, max_length, width, style)
+        if len(cell) <= SHARED_CELL_MAX_LENGTH:
+            return _shared_cell(markup, style, styles)
+        return Paragraph(markup, style)
     return cell
 
-def create_table_data_with_wrapping(data, styles, max_length=30):
-    """Создание данных таблицы с переносом текста для всех ячеек"""
+def create_table_data_with_wrapping(data, styles, max_length=30, col_widths=None, cell_padding=DETAILED_TABLE_CELL_PADDING):
+    """
+    Создание данных таблицы с переносом текста для всех ячеек.
+    При переданных col_widths перенос выполняется по ширине колонок
+    за вычетом отступов ячейки.
+    """
+    widths = [col_width - 2 * cell_padding for col_width in col_widths] if col_widths else []
     wrapped_data = []
     for row in data:
         wrapped_row = []
-        for cell in row:
-            wrapped_row.append(wrap_cell_text(cell, styles, max_length))
+        for index, cell in enumerate(row):
+            width = widths[index] if index < len(widths) else None
+            wrapped_row.append(wrap_cell_text(cell, styles, max_length, width))
         wrapped_data.append(wrapped_row)
     return wrapped_data
 
@@ -226,15 +329,56 @@ def create_standard_table(data, styles, col_widths=None, num_columns=None):
         col_widths = calculate_column_widths(num_columns)
     
     # Оборачиваем все ячейки в Paragraph
-    wrapped_data = create_table_data_with_wrapping(data, styles)
+    wrapped_data = create_table_data_with_wrapping(data, styles, col_widths=col_widths, cell_padding=TABLE_CELL_PADDING)
     
     table = Table(wrapped_data, colWidths=col_widths)
     table.setStyle(create_table_style())
     return table
 
+def create_register_table(columns, rows, styles):
+    """
+    Реестр: одна LongTable с заголовком, повторяемым на каждой странице,
+    и заранее заданными ширинами колонок (без подбора ширины по содержимому).
+
+    Ячейки переносятся по ширине колонок заранее и выводятся строками
+    таблицы без Paragraph, поэтому при раскладке страниц не выполняется
+    разбор разметки и перенос текста для каждой ячейки.
+    """
+    cyrillic_font = get_cyrillic_font()
+    header_font = f'{cyrillic_font}-Bold' if cyrillic_font != 'Helvetica' else 'Helvetica-Bold'
+    col_widths = [width for _, width in columns]
+    text_widths = [width - 2 * TABLE_CELL_PADDING for width in col_widths]
+
+    def cell(text, width, font_name, font_size):
+        plain_text = _plain_cell_text(text, width, font_name, font_size)
+        if plain_text is None:
+            return wrap_cell_text(text, styles, width=width)
+        return plain_text
+
+    data = [[
+        cell(title, width, header_font, TABLE_HEADER_FONT_SIZE)
+        for (title, _), width in zip(columns, text_widths)
+    ]]
+    for row in rows:
+        data.append([
+            cell(value, width, cyrillic_font, TABLE_FONT_SIZE)
+            for value, width in zip(row, text_widths)
+        ])
+
+    table = LongTable(data, colWidths=col_widths, repeatRows=1)
+    table.setStyle(create_table_style())
+    return table
+
+def use_register_layout(row_count):
+    """Реестровый вид раздела выбирается, когда записей больше порога REPORT_REGISTER_THRESHOLD"""
+    from flask import current_app
+    threshold = current_app.config.get('REPORT_REGISTER_THRESHOLD', 200)
+    return threshold is not None and row_count > threshold
+
 def create_table_style():
     """Создание стиля таблицы с поддержкой кириллицы"""
-    header_font = f'{CYRILLIC_FONT}-Bold' if CYRILLIC_FONT != 'Helvetica' else 'Helvetica-Bold'
+    cyrillic_font = get_cyrillic_font()
+    header_font = f'{cyrillic_font}-Bold' if cyrillic_font != 'Helvetica' else 'Helvetica-Bold'
     
     return TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
@@ -242,15 +386,15 @@ def create_table_style():
         ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
         ('VALIGN', (0, 0), (-1, -1), 'TOP'),
         ('FONTNAME', (0, 0), (-1, 0), header_font),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
+        ('FONTSIZE', (0, 0), (-1, 0), TABLE_HEADER_FONT_SIZE),
         ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
         ('TOPPADDING', (0, 0), (-1, 0), 6),
         ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
         ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 7),
-        ('FONTNAME', (0, 1), (-1, -1), CYRILLIC_FONT),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+        ('FONTSIZE', (0, 1), (-1, -1), TABLE_FONT_SIZE),
+        ('FONTNAME', (0, 1), (-1, -1), cyrillic_font),
+        ('LEFTPADDING', (0, 0), (-1, -1), TABLE_CELL_PADDING),
+        ('RIGHTPADDING', (0, 0), (-1, -1), TABLE_CELL_PADDING),
         ('TOPPADDING', (0, 1), (-1, -1), 3),
         ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
         ('SPLITLONGWORDS', (0, 0), (-1, -1), True),
@@ -259,7 +403,8 @@ def create_table_style():
 
 def create_detailed_table_style():
     """Создание стиля подробной таблицы"""
-    header_font = f'{CYRILLIC_FONT}-Bold' if CYRILLIC_FONT != 'Helvetica' else 'Helvetica-Bold'
+    cyrillic_font = get_cyrillic_font()
+    header_font = f'{cyrillic_font}-Bold' if cyrillic_font != 'Helvetica' else 'Helvetica-Bold'
     
     return TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
@@ -267,979 +412,1207 @@ def create_detailed_table_style():
         ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
         ('VALIGN', (0, 0), (-1, -1), 'TOP'),
         ('FONTNAME', (0, 0), (-1, 0), header_font),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
+        ('FONTSIZE', (0, 0), (-1, 0), TABLE_HEADER_FONT_SIZE),
         ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
         ('TOPPADDING', (0, 0), (-1, 0), 6),
         ('BACKGROUND', (0, 1), (-1, -1), colors.white),
         ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 7),
-        ('FONTNAME', (0, 1), (-1, -1), CYRILLIC_FONT),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ('FONTSIZE', (0, 1), (-1, -1), TABLE_FONT_SIZE),
+        ('FONTNAME', (0, 1), (-1, -1), cyrillic_font),
+        ('LEFTPADDING', (0, 0), (-1, -1), DETAILED_TABLE_CELL_PADDING),
+        ('RIGHTPADDING', (0, 0), (-1, -1), DETAILED_TABLE_CELL_PADDING),
         ('TOPPADDING', (0, 1), (-1, -1), 4),
         ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
         ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
     ])
 
-def generate_combined_pdf_report(context_id, modules):
+def bold_cell(text):
+    """Ячейка таблицы раздела с полужирным текстом"""
+    return ('bold', text)
+
+class SectionContent:
     """
-    Генерация комбинированного PDF отчета с выбранными модулями
+    Разметка раздела отчета: заголовки, абзацы, отступы и строки таблиц
+    в виде простых кортежей без объектов reportlab. Такую разметку можно
+    подготовить в потоке или процессе пула, а элементы PDF из нее строит
+    render_section в вызывающем потоке.
     """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.75*inch, bottomMargin=0.75*inch)
+
+    def __init__(self):
+        self.items = []
+
+    def title(self, text):
+        self.items.append(('paragraph', text, 'Title'))
+
+    def text(self, text):
+        self.items.append(('paragraph', text, 'Normal'))
+
+    def spacer(self, height):
+        self.items.append(('spacer', height))
+
+    def page_break(self):
+        self.items.append(('page_break',))
+
+    @contextmanager
+    def keep_together(self):
+        """Элементы, добавленные внутри блока with, выводятся на одной странице"""
+        outer_items = self.items
+        self.items = []
+        try:
+            yield
+        finally:
+            outer_items.append(('keep_together', self.items))
+            self.items = outer_items
+
+    def standard_table(self, rows, num_columns=None):
+        self.items.append(('standard_table', rows, num_columns))
+
+    def table(self, rows, max_length=30, col_widths=None, cell_padding=DETAILED_TABLE_CELL_PADDING, detailed=False):
+        self.items.append(('table', rows, max_length, col_widths, cell_padding, detailed))
+
+    def register_table(self, columns, rows):
+        self.items.append(('register_table', columns, rows))
+
+def _render_cell(cell, styles):
+    if isinstance(cell, tuple) and cell[0] == 'bold':
+        return Paragraph(f'<b>{cell[1]}</b>', styles['Normal'])
+    return cell
+
+def render_section(items, styles):
+    """Построение элементов reportlab по разметке раздела SectionContent"""
     elements = []
-    styles = create_cyrillic_style_sheet()
-    
-    title = "Отчёт по оценке рисков информационной безопасности"
-    elements.append(Paragraph(title, styles['Title']))
-    elements.append(Spacer(1, 10))
-    
-    current_date = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
-    elements.append(Paragraph(f"Дата формирования: {current_date}", styles['Normal']))
-    elements.append(Spacer(1, 10))
+    for kind, *args in items:
+        if kind == 'paragraph':
+            text, style_name = args
+            elements.append(Paragraph(text, styles[style_name]))
+        elif kind == 'spacer':
+            elements.append(Spacer(1, args[0]))
+        elif kind == 'page_break':
+            elements.append(PageBreak())
+        elif kind == 'keep_together':
+            elements.append(KeepTogether(render_section(args[0], styles)))
+        elif kind == 'standard_table':
+            rows, num_columns = args
+            elements.append(create_standard_table(rows, styles, num_columns=num_columns))
+        elif kind == 'table':
+            rows, max_length, col_widths, cell_padding, detailed = args
+            rows = [[_render_cell(cell, styles) for cell in row] for row in rows]
+            table = Table(
+                create_table_data_with_wrapping(rows, styles, max_length, col_widths, cell_padding),
+                colWidths=col_widths
+            )
+            table.setStyle(create_detailed_table_style() if detailed else create_table_style())
+            elements.append(table)
+        elif kind == 'register_table':
+            columns, rows = args
+            elements.append(create_register_table(columns, rows, styles))
+    return elements
+
+def load_assets_section(context_id):
+    """Раздел отчета «Активы»: выборка данных и разметка раздела (без элементов reportlab)"""
+    section = SectionContent()
+    section.title("1. АКТИВЫ")
+    section.spacer(8)
     
     if context_id:
         context = Context.query.get(context_id)
         if context:
-            elements.append(Paragraph(f"Название объекта: {context.name}", styles['Normal']))
-            elements.append(Spacer(1, 6))
+            section.title("Информация об области управления рисками и критериев риска:")
+            section.spacer(6)
+            
+            section.text(f"Название объекта: {context.name}")
+            section.text(f"ФИО ответственного: {context.owner_name or ''}")
+            section.text(f"Описание объекта: {context.description or ''}")
+            
+            if context.selected_impact_criteria:
+                try:
+                    import json
+                    criteria = json.loads(context.selected_impact_criteria)
+                    section.text("Критерии влияния риска:")
+                    for crit in criteria:
+                        section.text(f"• {crit}")
+                except:
+                    pass
+            
+            # Шкалы ущерба (до критериев оценивания рисков)
+            if context.damage_scales:
+                try:
+                    import json
+                    scales = json.loads(context.damage_scales)
+                    section.text("Шкалы ущерба:")
+                    for crit, scale in scales.items():
+                        section.text(f"Критерий: {crit}")
+                        section.text(f"Минимальная: {scale.get('minimal', '')}")
+                        section.text(f"Средняя: {scale.get('medium', '')}")
+                        section.text(f"Высокая: {scale.get('high', '')}")
+                except:
+                    pass
+            
+            if context.risk_evaluation_criteria:
+                try:
+                    import json
+                    risk_crit = json.loads(context.risk_evaluation_criteria)
+                    section.text("Критерии оценивания рисков ИБ:")
+                    section.text(f"Низкий уровень: {risk_crit.get('low', '')}")
+                    section.text(f"Средний уровень: {risk_crit.get('medium', '')}")
+                    section.text(f"Высокий уровень: {risk_crit.get('high', '')}")
+                except:
+                    pass
+            
+            # Критерии принятия риска
+            if context.risk_acceptance_criteria:
+                try:
+                    import json
+                    acceptance_crit = json.loads(context.risk_acceptance_criteria)
+                    section.text("Критерии принятия риска:")
+                    section.text(f"Низкий уровень риска: {acceptance_crit.get('low', 'приемлемый')}")
+                    section.text(f"Средний уровень риска: {acceptance_crit.get('medium', 'приемлемый')}")
+                    section.text(f"Высокий уровень риска: {acceptance_crit.get('high', 'неприемлемый')}")
+                except:
+                    pass
+            
+            section.spacer(12)
     
-    module_names = {
-        'assets': 'Активы',
-        'threats': 'Угрозы',
-        'vulnerabilities': 'Уязвимости',
-        'incidents': 'Инциденты',
-        'risks': 'Риски'
-    }
+    query = db.session.query(Asset).join(Context)
+    if context_id:
+        query = query.filter(Asset.context_id == context_id)
     
-    elements.append(Paragraph("Включенные модули:", styles['Normal']))
-    for module in modules:
-        if module in module_names:
-            elements.append(Paragraph(f"• {module_names[module]}", styles['Normal']))
-    elements.append(Spacer(1, 12))
+    assets = query.all()
     
-    for module in modules:
-        if module == 'assets':
-            elements.append(Paragraph("1. АКТИВЫ", styles['Title']))
-            elements.append(Spacer(1, 8))
-            
-            if context_id:
-                context = Context.query.get(context_id)
-                if context:
-                    elements.append(Paragraph("Информация об области управления рисками и критериев риска:", styles['Title']))
-                    elements.append(Spacer(1, 6))
-                    
-                    elements.append(Paragraph(f"Название объекта: {context.name}", styles['Normal']))
-                    elements.append(Paragraph(f"ФИО ответственного: {context.owner_name or ''}", styles['Normal']))
-                    elements.append(Paragraph(f"Описание объекта: {context.description or ''}", styles['Normal']))
-                    
-                    if context.selected_impact_criteria:
-                        try:
-                            import json
-                            criteria = json.loads(context.selected_impact_criteria)
-                            elements.append(Paragraph("Критерии влияния риска:", styles['Normal']))
-                            for crit in criteria:
-                                elements.append(Paragraph(f"• {crit}", styles['Normal']))
-                        except:
-                            pass
-                    
-                    # Шкалы ущерба (до критериев оценивания рисков)
-                    if context.damage_scales:
-                        try:
-                            import json
-                            scales = json.loads(context.damage_scales)
-                            elements.append(Paragraph("Шкалы ущерба:", styles['Normal']))
-                            for crit, scale in scales.items():
-                                elements.append(Paragraph(f"Критерий: {crit}", styles['Normal']))
-                                elements.append(Paragraph(f"Минимальная: {scale.get('minimal', '')}", styles['Normal']))
-                                elements.append(Paragraph(f"Средняя: {scale.get('medium', '')}", styles['Normal']))
-                                elements.append(Paragraph(f"Высокая: {scale.get('high', '')}", styles['Normal']))
-                        except:
-                            pass
-                    
-                    if context.risk_evaluation_criteria:
-                        try:
-                            import json
-                            risk_crit = json.loads(context.risk_evaluation_criteria)
-                            elements.append(Paragraph("Критерии оценивания рисков ИБ:", styles['Normal']))
-                            elements.append(Paragraph(f"Низкий уровень: {risk_crit.get('low', '')}", styles['Normal']))
-                            elements.append(Paragraph(f"Средний уровень: {risk_crit.get('medium', '')}", styles['Normal']))
-                            elements.append(Paragraph(f"Высокий уровень: {risk_crit.get('high', '')}", styles['Normal']))
-                        except:
-                            pass
-                    
-                    # Критерии принятия риска
-                    if context.risk_acceptance_criteria:
-                        try:
-                            import json
-                            acceptance_crit = json.loads(context.risk_acceptance_criteria)
-                            elements.append(Paragraph("Критерии принятия риска:", styles['Normal']))
-                            elements.append(Paragraph(f"Низкий уровень риска: {acceptance_crit.get('low', 'приемлемый')}", styles['Normal']))
-                            elements.append(Paragraph(f"Средний уровень риска: {acceptance_crit.get('medium', 'приемлемый')}", styles['Normal']))
-                            elements.append(Paragraph(f"Высокий уровень риска: {acceptance_crit.get('high', 'неприемлемый')}", styles['Normal']))
-                        except:
-                            pass
-                    
-                    elements.append(Spacer(1, 12))
-            
-            query = db.session.query(Asset).join(Context)
-            if context_id:
-                query = query.filter(Asset.context_id == context_id)
+    if assets:
+        # Перечень активов
+        section.title("Перечень активов:")
+        section.spacer(6)
+        
+        type_translations = {
+            'information': 'Информационный',
+            'software': 'Программный',
+            'hardware': 'Аппаратный',
+            'personnel': 'Персонал',
+            'facility': 'Объект недвижимости',
+            'network': 'Сетевой',
+            'data': 'Данные',
+            'service': 'Услуга'
+        }
+        
+        asset_table_data = [
+            ['ID', 'Наименование', 'Тип', 'Свойства ИБ', 
+             'Ценность без зависимостей', 'Ценность с зависимостями', 'Стоимость', 'Дата создания']
+        ]
+        
+        for asset in assets:
+            properties_text = ''
+            if asset.properties:
+                try:
+                    import json
+                    props = json.loads(asset.properties)
+                    props_list = []
+                    if props.get('confidentiality'): props_list.append('К')
+                    if props.get('integrity'): props_list.append('Ц')
+                    if props.get('availability'): props_list.append('Д')
+                    properties_text = ','.join(props_list)
+                except:
+                    properties_text = 'Ошибка'
             
-            assets = query.all()
+            translated_type = type_translations.get(asset.type, asset.type)
+            cost_text = f"{asset.asset_cost} тыс.руб." if asset.asset_cost else '-'
+            created_at_text = asset.created_at.strftime('%d.%m.%Y') if asset.created_at else '-'
             
-            if assets:
-                # Перечень активов
-                elements.append(Paragraph("Перечень активов:", styles['Title']))
-                elements.append(Spacer(1, 6))
-                
-                type_translations = {
-                    'information': 'Информационный',
-                    'software': 'Программный',
-                    'hardware': 'Аппаратный',
-                    'personnel': 'Персонал',
-                    'facility': 'Объект недвижимости',
-                    'network': 'Сетевой',
-                    'data': 'Данные',
-                    'service': 'Услуга'
-                }
-                
-                asset_table_data = [
-                    ['ID', 'Наименование', 'Тип', 'Свойства ИБ', 
-                     'Ценность без зависимостей', 'Ценность с зависимостями', 'Стоимость', 'Дата создания']
-                ]
-                
-                for asset in assets:
-                    properties_text = ''
-                    if asset.properties:
-                        try:
-                            import json
-                            props = json.loads(asset.properties)
-                            props_list = []
-                            if props.get('confidentiality'): props_list.append('К')
-                            if props.get('integrity'): props_list.append('Ц')
-                            if props.get('availability'): props_list.append('Д')
-                            properties_text = ','.join(props_list)
-                        except:
-                            properties_text = 'Ошибка'
-                    
-                    translated_type = type_translations.get(asset.type, asset.type)
-                    cost_text = f"{asset.asset_cost} тыс.руб." if asset.asset_cost else '-'
-                    created_at_text = asset.created_at.strftime('%d.%m.%Y') if asset.created_at else '-'
-                    
-                    asset_table_data.append([
-                        str(asset.id),
-                        asset.name,
-                        translated_type,
-                        properties_text,
-                        str(asset.value_without_dependencies) if asset.value_without_dependencies else '-',
-                        str(asset.dependency_value) if asset.dependency_value else '-',
-                        cost_text,
-                        created_at_text
-                    ])
-                
-                asset_table = create_standard_table(asset_table_data, styles, num_columns=8)
-                elements.append(asset_table)
-                elements.append(Spacer(1, 12))
-                
-                # Шкала стоимости актива (после перечня активов)
-                cost_scale_context = Context.query.filter(Context.asset_cost_scale.isnot(None)).first()
-                if cost_scale_context and cost_scale_context.asset_cost_scale:
-                    try:
-                        import json
-                        cost_scale = json.loads(cost_scale_context.asset_cost_scale)
-                        
-                        # Добавляем " руб." к значениям
-                        low_val = cost_scale.get('low_value', '-')
-                        med_val = cost_scale.get('medium_value', '-')
-                        high_val = cost_scale.get('high_value', '-')
-                        
-                        if low_val and low_val != '-':
-                            low_val = f"{low_val} руб."
-                        if med_val and med_val != '-':
-                            med_val = f"{med_val} руб."
-                        if high_val and high_val != '-':
-                            high_val = f"{high_val} руб."
-                        
-                        cost_scale_data = [
-                            ['Стоимость актива', 'Диапазон'],
-                            ['Низкая', low_val],
-                            ['Средняя', med_val],
-                            ['Высокая', high_val]
-                        ]
-                        cost_scale_table = create_standard_table(cost_scale_data, styles, num_columns=2)
-                        
-                        elements.append(KeepTogether([
-                            Paragraph("Шкала стоимости актива:", styles['Title']),
-                            Spacer(1, 6),
-                            cost_scale_table
-                        ]))
-                        elements.append(Spacer(1, 12))
-                    except:
-                        pass
-                
-                # Основная таблица - свойства ИБ
-                elements.append(Paragraph("Свойства информационной безопасности активов:", styles['Title']))
-                elements.append(Spacer(1, 6))
-                
-                data = [['Название актива', 'Конфиденциальность', 'Целостность', 'Доступность']]
-                for asset in assets:
-                    try:
-                        import json
-                        props = json.loads(asset.properties) if asset.properties else {}
-                        conf = 'Да' if props.get('confidentiality') else 'Нет'
-                        integ = 'Да' if props.get('integrity') else 'Нет'
-                        avail = 'Да' if props.get('availability') else 'Нет'
-                    except:
-                        conf = integ = avail = 'Нет'
-                    
-                    data.append([asset.name, conf, integ, avail])
-                
-                main_table = create_standard_table(data, styles, num_columns=4)
-                elements.append(main_table)
-                elements.append(Spacer(1, 12))
-                
-                # Ценность активов относительно нарушения свойств ИБ
-                elements.append(Paragraph("Ценность активов относительно нарушения свойств ИБ", styles['Title']))
-                elements.append(Spacer(1, 6))
-                
-                impact_criteria = []
-                impact_criteria_dict = {}
-                
-                if assets:
-                    asset_ids = [a.id for a in assets]
-                    impacts = AssetSecurityPropertyImpact.query.filter(
-                        AssetSecurityPropertyImpact.asset_id.in_(asset_ids),
-                        AssetSecurityPropertyImpact.impact_criterion_id.isnot(None)
-                    ).all()
-                    
-                    criterion_ids = set()
-                    for impact in impacts:
-                        if impact.impact_criterion_id:
-                            criterion_ids.add(impact.impact_criterion_id)
-                    
-                    if criterion_ids:
-                        criteria = ImpactCriterion.query.filter(ImpactCriterion.id.in_(criterion_ids)).all()
-                        for criterion in criteria:
-                            impact_criteria_dict[criterion.id] = criterion.name
-                        
-                        impact_criteria = [impact_criteria_dict[cid] for cid in sorted(criterion_ids) if cid in impact_criteria_dict]
-                
-                header_row = ['Актив', 'Свойства ИБ'] + impact_criteria + ['Ценность актива']
-                table8_data = [header_row]
+            asset_table_data.append([
+                str(asset.id),
+                asset.name,
+                translated_type,
+                properties_text,
+                str(asset.value_without_dependencies) if asset.value_without_dependencies else '-',
+                str(asset.dependency_value) if asset.dependency_value else '-',
+                cost_text,
+                created_at_text
+            ])
+        
+        section.standard_table(asset_table_data, 8)
+        section.spacer(12)
+        
+        # Шкала стоимости актива (после перечня активов)
+        cost_scale_context = Context.query.filter(Context.asset_cost_scale.isnot(None)).first()
+        if cost_scale_context and cost_scale_context.asset_cost_scale:
+            try:
+                import json
+                cost_scale = json.loads(cost_scale_context.asset_cost_scale)
                 
-                criterion_id_by_name = {name: cid for cid, name in impact_criteria_dict.items()}
+                # Добавляем " руб." к значениям
+                low_val = cost_scale.get('low_value', '-')
+                med_val = cost_scale.get('medium_value', '-')
+                high_val = cost_scale.get('high_value', '-')
                 
-                # Порядок значений для определения максимального
-                VALUE_ORDER = {'Н': 1, 'С': 2, 'В': 3}
+                if low_val and low_val != '-':
+                    low_val = f"{low_val} руб."
+                if med_val and med_val != '-':
+                    med_val = f"{med_val} руб."
+                if high_val and high_val != '-':
+                    high_val = f"{high_val} руб."
                 
-                for asset in assets:
-                    security_properties = ['confidentiality', 'integrity', 'availability']
-                    security_property_names = ['Конфиденциальность', 'Целостность', 'Доступность']
-                    
-                    # Сначала собираем все значения для этого актива
-                    asset_impact_values = []
-                    
-                    for prop in security_properties:
-                        for criterion_name in impact_criteria:
-                            criterion_id = criterion_id_by_name.get(criterion_name)
-                            if criterion_id:
-                                impact_data = AssetSecurityPropertyImpact.query.filter_by(
-                                    asset_id=asset.id,
-                                    security_property=prop,
-                                    impact_criterion_id=criterion_id
-                                ).first()
-                                impact_value = impact_data.impact_value if impact_data else '-'
-                                if impact_value and impact_value not in ['', '-']:
-                                    asset_impact_values.append(impact_value)
-                    #print(asset_impact_values)
-                    # Определяем максимальное значение
-                    max_value = '-'
-                    if asset_impact_values:
-                        # Сортируем по порядку и берем максимальное
-                        sorted_values = sorted(asset_impact_values, key=lambda x: VALUE_ORDER.get(x, 0), reverse=True)
-                        print(sorted_values)
-                        max_value = sorted_values[0]
-                    
-                    # Теперь создаем строки таблицы
-                    for i, (prop, prop_name) in enumerate(zip(security_properties, security_property_names)):
-                        row = [asset.name, prop_name]
-                        
-                        for criterion_name in impact_criteria:
-                            criterion_id = criterion_id_by_name.get(criterion_name)
-                            if criterion_id:
-                                impact_data = AssetSecurityPropertyImpact.query.filter_by(
-                                    asset_id=asset.id,
-                                    security_property=prop,
-                                    impact_criterion_id=criterion_id
-                                ).first()
-                                impact_value = impact_data.impact_value if impact_data else '-'
-                            else:
-                                impact_value = '-'
-                            row.append(impact_value)
-                        
-                        # Максимальное значение пишем только в первой строке для этого актива
-                        if i == 0:
-                            row.append(max_value)
-                        else:
-                            row.append('')
-                        
-                        table8_data.append(row)
-                
-                table8 = create_standard_table(table8_data, styles, num_columns=len(header_row))
-                elements.append(table8)
-                elements.append(Spacer(1, 12))
-                
-                # Зависимость активов
-                elements.append(Paragraph("Зависимость активов", styles['Title']))
-                elements.append(Spacer(1, 6))
+                cost_scale_data = [
+                    ['Стоимость актива', 'Диапазон'],
+                    ['Низкая', low_val],
+                    ['Средняя', med_val],
+                    ['Высокая', high_val]
+                ]
+                with section.keep_together():
+                    section.title("Шкала стоимости актива:")
+                    section.spacer(6)
+                    section.standard_table(cost_scale_data, 2)
+                section.spacer(12)
+            except:
+                pass
+        
+        # Основная таблица - свойства ИБ
+        section.title("Свойства информационной безопасности активов:")
+        section.spacer(6)
+        
+        data = [['Название актива', 'Конфиденциальность', 'Целостность', 'Доступность']]
+        for asset in assets:
+            try:
+                import json
+                props = json.loads(asset.properties) if asset.properties else {}
+                conf = 'Да' if props.get('confidentiality') else 'Нет'
+                integ = 'Да' if props.get('integrity') else 'Нет'
+                avail = 'Да' if props.get('availability') else 'Нет'
+            except:
+                conf = integ = avail = 'Нет'
+            
+            data.append([asset.name, conf, integ, avail])
+        
+        section.standard_table(data, 4)
+        section.spacer(12)
+        
+        # Ценность активов относительно нарушения свойств ИБ
+        section.title("Ценность активов относительно нарушения свойств ИБ")
+        section.spacer(6)
+        
+        impact_criteria = []
+        impact_criteria_dict = {}
+        impact_lookup = {}
+        
+        if assets:
+            asset_ids = [a.id for a in assets]
+            impact_lookup = load_security_property_impacts(asset_ids)
+            
+            criterion_ids = {criterion_id for _, _, criterion_id in impact_lookup}
+            
+            if criterion_ids:
+                criteria = ImpactCriterion.query.filter(ImpactCriterion.id.in_(criterion_ids)).all()
+                for criterion in criteria:
+                    impact_criteria_dict[criterion.id] = criterion.name
                 
-                if len(assets) > 0:
-                    asset_ids = [a.id for a in assets]
-                    dependencies = AssetDependency.query.filter(
-                        AssetDependency.asset_id.in_(asset_ids),
-                        AssetDependency.depends_on_asset_id.in_(asset_ids)
-                    ).all()
-                    
-                    dep_dict = {}
-                    for dep in dependencies:
-                        if dep.asset_id not in dep_dict:
-                            dep_dict[dep.asset_id] = set()
-                        dep_dict[dep.asset_id].add(dep.depends_on_asset_id)
-                    
-                    dep_table_data = [['Актив'] + [a.name for a in assets]]
-                    
-                    for asset in assets:
-                        row = [asset.name]
-                        for other_asset in assets:
-                            if asset.id == other_asset.id:
-                                row.append('')
-                            elif asset.id in dep_dict and other_asset.id in dep_dict[asset.id]:
-                                row.append('+')
-                            else:
-                                row.append('-')
-                        dep_table_data.append(row)
-                    
-                    dep_table = create_standard_table(dep_table_data, styles, num_columns=len(dep_table_data[0]))
-                    elements.append(dep_table)
-                    elements.append(Spacer(1, 6))
-                    elements.append(Paragraph("Примечание: '+' - актив зависит от указанного актива, '-' - зависимости нет", styles['Normal']))
-                else:
-                    elements.append(Paragraph("Нет данных о зависимостях активов", styles['Normal']))
-            else:
-                elements.append(Paragraph("Данные об активах отсутствуют", styles['Normal']))
+                impact_criteria = [impact_criteria_dict[cid] for cid in sorted(criterion_ids) if cid in impact_criteria_dict]
+        
+        header_row = ['Актив', 'Свойства ИБ'] + impact_criteria + ['Ценность актива']
+        table8_data = [header_row]
+        
+        criterion_id_by_name = {name: cid for cid, name in impact_criteria_dict.items()}
+        
+        # Порядок значений для определения максимального
+        VALUE_ORDER = {'Н': 1, 'С': 2, 'В': 3}
+        
+        for asset in assets:
+            security_properties = ['confidentiality', 'integrity', 'availability']
+            security_property_names = ['Конфиденциальность', 'Целостность', 'Доступность']
             
-            elements.append(Spacer(1, 12))
+            # Значения актива по свойствам и критериям берутся из загруженного словаря
+            property_rows = []
+            asset_impact_values = []
             
-        elif module == 'threats':
-            elements.append(PageBreak())
-            elements.append(Paragraph("2. УГРОЗЫ", styles['Title']))
-            elements.append(Spacer(1, 8))
+            for prop in security_properties:
+                values = []
+                for criterion_name in impact_criteria:
+                    criterion_id = criterion_id_by_name.get(criterion_name)
+                    if criterion_id:
+                        impact_value = impact_lookup.get((asset.id, prop, criterion_id), '-')
+                        if impact_value and impact_value not in ['', '-']:
+                            asset_impact_values.append(impact_value)
+                    else:
+                        impact_value = '-'
+                    values.append(impact_value)
+                property_rows.append(values)
             
-            # Только актуальные угрозы
-            threats = Threat.query.filter_by(is_relevant=True).all()
+            # Определяем максимальное значение
+            max_value = '-'
+            if asset_impact_values:
+                max_value = max(asset_impact_values, key=lambda x: VALUE_ORDER.get(x, 0))
             
-            if threats:
-                for threat in threats:
-                    # Заголовок угрозы с таблицей вместе
-                    threat_data = [
-                        ['Параметр', 'Значение'],
-                        ['Наименование', threat.name],
-                        ['Описание', threat.description or ''],
-                        ['Источник', threat.source or ''],
-                        ['Объект воздействия', threat.target_object or ''],
-                        ['Нарушение конфиденциальности', 'Да' if threat.confidentiality_violation else 'Нет'],
-                        ['Нарушение целостности', 'Да' if threat.integrity_violation else 'Нет'],
-                        ['Нарушение доступности', 'Да' if threat.availability_violation else 'Нет'],
-                        ['Актуальность', 'Да' if threat.is_relevant else 'Нет']
-                    ]
-                    
-                    wrapped_threat_data = create_table_data_with_wrapping(threat_data, styles, max_length=60)
-                    threat_table = Table(wrapped_threat_data, colWidths=[2*inch, 4*inch])
-                    threat_table.setStyle(create_detailed_table_style())
-                    
-                    elements.append(KeepTogether([
-                        Paragraph(f"Угроза: {threat.name}", styles['Title']),
-                        Spacer(1, 6),
-                        threat_table
-                    ]))
-                    elements.append(Spacer(1, 12))
-                    
-                    if threat.is_relevant:
-                        import json
-                        properties = json.loads(threat.step5)
-
-                        threat_props_data = [
-                            ['Информационные активы', ''],
-                            ['К (Конфиденциальность)', '+' if properties.get('info_conf') else '-'],
-                            ['Ц (Целостность)',       '+' if properties.get('info_int') else '-'],
-                            ['Д (Доступность)',       '+' if properties.get('info_av') else '-'],
-                            ['Аппаратные средства',   ''],
-                            ['К (Конфиденциальность)', '+' if properties.get('hw_conf') else '-'],
-                            ['Ц (Целостность)',       '+' if properties.get('hw_int') else '-'],
-                            ['Д (Доступность)',       '+' if properties.get('hw_av') else '-'],
-                            ['Программные средства',  ''],
-                            ['К (Конфиденциальность)', '+' if properties.get('sw_conf') else '-'],
-                            ['Ц (Целостность)',       '+' if properties.get('sw_int') else '-'],
-                            ['Д (Доступность)',       '+' if properties.get('sw_av') else '-']
-                        ]
-                        wrapped_props_data = create_table_data_with_wrapping(threat_props_data, styles, max_length=60)
-                        threat_props_table = Table(wrapped_props_data, colWidths=[2*inch, 4*inch])
-                        threat_props_table.setStyle(create_detailed_table_style())
-                        elements.append(threat_props_table)
-                        elements.append(Spacer(1, 12))
-
-                    # Оценка признака "Источник угрозы ИБ"
-                    static_table_data = [
-                        ['Признак', '1 балл', '2 балла', '3 балла', '4 балла'],
-                        ['Мотивация ИУ', 'отсутствует', '', '', 'присутствует'],
-                        ['Квалификация ИУ', 'отсутствие знаний и навыков', 
-                         'знания на уровне пользователя',
-                         'владение языками программирования, знания администрирования',
-                         'знания на уровне разработчика'],
-                        ['Ресурсы ИУ', 'ресурсы физ. лица',
-                         'ресурсы группы лиц',
-                         'ресурсы организации',
-                         'поддержка на уровне гос-ва'],
-                        ['Расположение ИУ', 'внешнее', 'внутреннее', '', 'внешнее и внутреннее']
-                    ]
-                    
-                    wrapped_static_data = create_table_data_with_wrapping(static_table_data, styles, max_length=35)
-                    static_table = Table(wrapped_static_data)
-                    static_table.setStyle(create_table_style())
-                    
-                    elements.append(KeepTogether([
-                        Paragraph("Оценка признака 'Источник угрозы ИБ'", styles['Title']),
-                        Spacer(1, 6),
-                        static_table
-                    ]))
-                    elements.append(Spacer(1, 6))
-                    
-                    if threat.source_assessment:
-                        try:
-                            import json
-                            source_data = json.loads(threat.source_assessment)
-                            elements.append(Paragraph(f"Оценка: {source_data.get('assessment', 'Нет данных')}", styles['Normal']))
-                            
-                            if 'scores' in source_data:
-                                scores = source_data['scores']
-                                user_scores_data = [
-                                    ['Признак', 'Оценка'],
-                                    ['Мотивация ИУ', str(scores.get('motivation', 'Не указано'))],
-                                    ['Квалификация ИУ', str(scores.get('qualification', 'Не указано'))],
-                                    ['Ресурсы ИУ', str(scores.get('resources', 'Не указано'))],
-                                    ['Расположение ИУ', str(scores.get('location', 'Не указано'))]
-                                ]
-                                
-                                user_scores_table = Table(create_table_data_with_wrapping(user_scores_data, styles))
-                                user_scores_table.setStyle(create_table_style())
-                                elements.append(user_scores_table)
-                        except:
-                            elements.append(Paragraph("Ошибка чтения данных оценки", styles['Normal']))
-                    
-                    elements.append(Spacer(1, 12))
-                    
-                    # Критерии оценки вероятности реализации угрозы
-                    criteria_table_data = [
-                        ['Признак', '1 балл', '2 балла', '3 балла', '4 балла'],
-                        ['Продолжительность реализации', 'кратковременная', 'непрерывная непродолжительная', '', 'длительная непрерывная'],
-                        ['Возможность обнаружения', 'легко', 'трудно', 'очень трудно', 'невозможно'],
-                        ['Возможность нейтрализации', 'легко', 'трудно', 'очень трудно', 'невозможно'],
-                        ['Источник угрозы ИБ', 'I = 1/4', '1/4 < I ≤ 1/2', '1/2 < I ≤ 3/4', '3/4 < I ≤ 1']
-                    ]
-                    
-                    wrapped_criteria_data = create_table_data_with_wrapping(criteria_table_data, styles, max_length=35)
-                    criteria_table = Table(wrapped_criteria_data)
-                    criteria_table.setStyle(create_table_style())
-                    
-                    values_table_data = [
-                        ['Качественное значение', 'Количественное значение'],
-                        ['Минимальная', '[0,25; 0,4]'],
-                        ['Средняя', '[0,4; 0,7]'],
-                        ['Высокая', '[0,7; 1]']
-                    ]
-                    
-                    values_table = Table(create_table_data_with_wrapping(values_table_data, styles))
-                    values_table.setStyle(create_table_style())
-                    
-                    # Объединяем заголовок и обе таблицы вместе
-                    elements.append(KeepTogether([
-                        Paragraph("Критерии оценки вероятности реализации угрозы", styles['Title']),
-                        Spacer(1, 6),
-                        criteria_table,
-                        Spacer(1, 6),
-                        values_table
-                    ]))
-                    elements.append(Spacer(1, 12))
-                    
-                    if threat.probability_assessment:
-                        try:
-                            import json
-                            prob_data = json.loads(threat.probability_assessment)
-                            elements.append(Paragraph(f"Оценка вероятности: {prob_data.get('assessment', 'Нет данных')}", styles['Normal']))
-                            
-                            if 'scores' in prob_data:
-                                scores = prob_data['scores']
-                                prob_scores_data = [
-                                    ['Признак', 'Оценка'],
-                                    ['Продолжительность', str(scores.get('duration', 'Не указано'))],
-                                    ['Возможность обнаружения', str(scores.get('detectability', 'Не указано'))],
-                                    ['Возможность нейтрализации', str(scores.get('neutralization', 'Не указано'))],
-                                    ['Источник угрозы', str(scores.get('source', 'Не указано'))]
-                                ]
-                                
-                                prob_scores_table = Table(create_table_data_with_wrapping(prob_scores_data, styles))
-                                prob_scores_table.setStyle(create_table_style())
-                                elements.append(prob_scores_table)
-                        except:
-                            elements.append(Paragraph("Ошибка чтения данных оценки вероятности", styles['Normal']))
-                    
-                    elements.append(Spacer(1, 12))
-                
-                # Итоговая таблица
-                elements.append(Paragraph("Итог: Оценка вероятности реализации угроз для активов", styles['Title']))
-                elements.append(Spacer(1, 6))
-                
-                threat_assessments = ThreatAssessment.query.all()
-                all_assets = Asset.query.all()
-                # Только актуальные угрозы
-                all_threats = Threat.query.filter_by(is_relevant=True).all()
-                
-                assets_dict = {a.id: a for a in all_assets}
-                threats_dict = {t.id: t for t in all_threats}
+            # Теперь создаем строки таблицы
+            for i, (prop_name, values) in enumerate(zip(security_property_names, property_rows)):
+                row = [asset.name, prop_name] + values
                 
-                valid_assessments = []
-                for ta in threat_assessments:
-                    asset = assets_dict.get(ta.asset_id)
-                    threat_obj = threats_dict.get(ta.threat_id)
-                    if asset and threat_obj:
-                        valid_assessments.append(ta)
-                
-                if valid_assessments:
-                    info_assets = {}
-                    software_assets = {}
-                    hardware_assets = {}
-                    other_assets = {}
-                    
-                    for assessment in valid_assessments:
-                        asset = assets_dict.get(assessment.asset_id)
-                        threat_obj = threats_dict.get(assessment.threat_id)
-                        
-                        if not asset or not threat_obj:
-                            continue
-                        
-                        if assessment.assessment is not None and assessment.assessment != '':
-                            level = assessment.assessment
-                        else:
-                            level = get_assessment_level(assessment.score if assessment.score is not None else 0.5)
-                        
-                        table_row = [threat_obj.name, level]
-                        
-                        if asset.type == 'information':
-                            if asset.id not in info_assets:
-                                info_assets[asset.id] = {'asset': asset, 'threats': []}
-                            info_assets[asset.id]['threats'].append(table_row)
-                        elif asset.type == 'software':
-                            if asset.id not in software_assets:
-                                software_assets[asset.id] = {'asset': asset, 'threats': []}
-                            software_assets[asset.id]['threats'].append(table_row)
-                        elif asset.type == 'hardware':
-                            if asset.id not in hardware_assets:
-                                hardware_assets[asset.id] = {'asset': asset, 'threats': []}
-                            hardware_assets[asset.id]['threats'].append(table_row)
-                        else:
-                            if asset.id not in other_assets:
-                                other_assets[asset.id] = {'asset': asset, 'threats': []}
-                            other_assets[asset.id]['threats'].append(table_row)
-                    
-                    final_table_data = []
-                    
-                    if info_assets:
-                        final_table_data.append([Paragraph('<b>Информационные активы</b>', styles['Normal']), '', ''])
-                        for asset_data in info_assets.values():
-                            asset = asset_data['asset']
-                            threats_list = asset_data['threats']
-                            if threats_list:
-                                final_table_data.append([
-                                    asset.name,
-                                    threats_list[0][0],
-                                    threats_list[0][1]
-                                ])
-                                for threat_row in threats_list[1:]:
-                                    final_table_data.append(['', threat_row[0], threat_row[1]])
-                    
-                    if software_assets:
-                        final_table_data.append([Paragraph('<b>Программные средства</b>', styles['Normal']), '', ''])
-                        for asset_data in software_assets.values():
-                            asset = asset_data['asset']
-                            threats_list = asset_data['threats']
-                            if threats_list:
-                                final_table_data.append([
-                                    asset.name,
-                                    threats_list[0][0],
-                                    threats_list[0][1]
-                                ])
-                                for threat_row in threats_list[1:]:
-                                    final_table_data.append(['', threat_row[0], threat_row[1]])
-                    
-                    if hardware_assets:
-                        final_table_data.append([Paragraph('<b>Аппаратные средства</b>', styles['Normal']), '', ''])
-                        for asset_data in hardware_assets.values():
-                            asset = asset_data['asset']
-                            threats_list = asset_data['threats']
-                            if threats_list:
-                                final_table_data.append([
-                                    asset.name,
-                                    threats_list[0][0],
-                                    threats_list[0][1]
-                                ])
-                                for threat_row in threats_list[1:]:
-                                    final_table_data.append(['', threat_row[0], threat_row[1]])
-                    
-                    if other_assets:
-                        final_table_data.append([Paragraph('<b>Прочие активы</b>', styles['Normal']), '', ''])
-                        for asset_data in other_assets.values():
-                            asset = asset_data['asset']
-                            threats_list = asset_data['threats']
-                            if threats_list:
-                                final_table_data.append([
-                                    asset.name,
-                                    threats_list[0][0],
-                                    threats_list[0][1]
-                                ])
-                                for threat_row in threats_list[1:]:
-                                    final_table_data.append(['', threat_row[0], threat_row[1]])
-                    
-                    if final_table_data:
-                        header_row = [
-                            Paragraph('<b>Актив</b>', styles['Normal']),
-                            Paragraph('<b>Угроза</b>', styles['Normal']),
-                            Paragraph('<b>Оценка</b>', styles['Normal'])
-                        ]
-                        final_table_data.insert(0, header_row)
-                        
-                        wrapped_final_data = create_table_data_with_wrapping(final_table_data, styles, max_length=35)
-                        final_table = Table(wrapped_final_data, colWidths=[1.8*inch, 3*inch, 1.2*inch])
-                        final_table.setStyle(create_table_style())
-                        elements.append(final_table)
-                    else:
-                        elements.append(Paragraph("Нет данных для отображения", styles['Normal']))
+                # Максимальное значение пишем только в первой строке для этого актива
+                if i == 0:
+                    row.append(max_value)
                 else:
-                    elements.append(Paragraph("Данные для оценки вероятности отсутствуют", styles['Normal']))
-            else:
-                elements.append(Paragraph("Данные об угрозах отсутствуют", styles['Normal']))
+                    row.append('')
+                
+                table8_data.append(row)
+        
+        section.standard_table(table8_data, len(header_row))
+        section.spacer(12)
+        
+        # Зависимость активов
+        section.title("Зависимость активов")
+        section.spacer(6)
+        
+        if len(assets) > 0:
+            asset_ids = [a.id for a in assets]
+            dependencies = AssetDependency.query.filter(
+                AssetDependency.asset_id.in_(asset_ids),
+                AssetDependency.depends_on_asset_id.in_(asset_ids)
+            ).all()
             
-            elements.append(Spacer(1, 12))
+            dep_dict = {}
+            for dep in dependencies:
+                if dep.asset_id not in dep_dict:
+                    dep_dict[dep.asset_id] = set()
+                dep_dict[dep.asset_id].add(dep.depends_on_asset_id)
             
-        elif module == 'vulnerabilities':
-            elements.append(PageBreak())
-            elements.append(Paragraph("3. УЯЗВИМОСТИ", styles['Title']))
-            elements.append(Spacer(1, 8))
+            dep_table_data = [['Актив'] + [a.name for a in assets]]
             
-            # Список выявленных уязвимостей
-            elements.append(Paragraph("Список выявленных уязвимостей", styles['Title']))
-            elements.append(Spacer(1, 6))
+            for asset in assets:
+                row = [asset.name]
+                for other_asset in assets:
+                    if asset.id == other_asset.id:
+                        row.append('')
+                    elif asset.id in dep_dict and other_asset.id in dep_dict[asset.id]:
+                        row.append('+')
+                    else:
+                        row.append('-')
+                dep_table_data.append(row)
+            
+            section.standard_table(dep_table_data, len(dep_table_data[0]))
+            section.spacer(6)
+            section.text("Примечание: '+' - актив зависит от указанного актива, '-' - зависимости нет")
+        else:
+            section.text("Нет данных о зависимостях активов")
+    else:
+        section.text("Данные об активах отсутствуют")
+    
+    section.spacer(12)
+    
+    return section.items
+
+
+def load_threats_section(context_id):
+    """Раздел отчета «Угрозы»: выборка данных и разметка раздела (без элементов reportlab)"""
+    section = SectionContent()
+    section.page_break()
+    section.title("2. УГРОЗЫ")
+    section.spacer(8)
+    
+    # Только актуальные угрозы
+    threats = Threat.query.filter_by(is_relevant=True).all()
+    
+    if threats:
+        for threat in threats:
+            # Заголовок угрозы с таблицей вместе
+            threat_data = [
+                ['Параметр', 'Значение'],
+                ['Наименование', threat.name],
+                ['Описание', threat.description or ''],
+                ['Источник', threat.source or ''],
+                ['Объект воздействия', threat.target_object or ''],
+                ['Нарушение конфиденциальности', 'Да' if threat.confidentiality_violation else 'Нет'],
+                ['Нарушение целостности', 'Да' if threat.integrity_violation else 'Нет'],
+                ['Нарушение доступности', 'Да' if threat.availability_violation else 'Нет'],
+                ['Актуальность', 'Да' if threat.is_relevant else 'Нет']
+            ]
             
-            vulnerabilities = Vulnerability.query.all()
+            threat_col_widths = [2*inch, 4*inch]
+            with section.keep_together():
+                section.title(f"Угроза: {threat.name}")
+                section.spacer(6)
+                section.table(threat_data, max_length=60, col_widths=threat_col_widths, detailed=True)
+            section.spacer(12)
             
-            if vulnerabilities:
-                table_data = [['ID', 'Наименование', 'Описание']]
-                for vuln in vulnerabilities:
-                    description = vuln.description or ''
-                    truncated_desc = description
-                    table_data.append([
-                        str(vuln.id),
-                        vuln.name,
-                        truncated_desc
-                    ])
+            if threat.is_relevant:
+                import json
+                properties = json.loads(threat.step5)
                 
-                vuln_table = create_standard_table(table_data, styles, num_columns=3)
-                elements.append(vuln_table)
-            else:
-                elements.append(Paragraph("Уязвимости не выявлены", styles['Normal']))
+                threat_props_data = [
+                    ['Информационные активы', ''],
+                    ['К (Конфиденциальность)', '+' if properties.get('info_conf') else '-'],
+                    ['Ц (Целостность)',       '+' if properties.get('info_int') else '-'],
+                    ['Д (Доступность)',       '+' if properties.get('info_av') else '-'],
+                    ['Аппаратные средства',   ''],
+                    ['К (Конфиденциальность)', '+' if properties.get('hw_conf') else '-'],
+                    ['Ц (Целостность)',       '+' if properties.get('hw_int') else '-'],
+                    ['Д (Доступность)',       '+' if properties.get('hw_av') else '-'],
+                    ['Программные средства',  ''],
+                    ['К (Конфиденциальность)', '+' if properties.get('sw_conf') else '-'],
+                    ['Ц (Целостность)',       '+' if properties.get('sw_int') else '-'],
+                    ['Д (Доступность)',       '+' if properties.get('sw_av') else '-']
+                ]
+                section.table(threat_props_data, max_length=60, col_widths=threat_col_widths, detailed=True)
+                section.spacer(12)
             
-            elements.append(Spacer(1, 12))
+            # Оценка признака "Источник угрозы ИБ"
+            static_table_data = [
+                ['Признак', '1 балл', '2 балла', '3 балла', '4 балла'],
+                ['Мотивация ИУ', 'отсутствует', '', '', 'присутствует'],
+                ['Квалификация ИУ', 'отсутствие знаний и навыков', 
+                 'знания на уровне пользователя',
+                 'владение языками программирования, знания администрирования',
+                 'знания на уровне разработчика'],
+                ['Ресурсы ИУ', 'ресурсы физ. лица',
+                 'ресурсы группы лиц',
+                 'ресурсы организации',
+                 'поддержка на уровне гос-ва'],
+                ['Расположение ИУ', 'внешнее', 'внутреннее', '', 'внешнее и внутреннее']
+            ]
             
-            # Качественная шкала оценки уязвимостей
-            elements.append(Paragraph("Качественная шкала оценки уязвимостей", styles['Title']))
-            elements.append(Spacer(1, 6))
+            with section.keep_together():
+                section.title("Оценка признака 'Источник угрозы ИБ'")
+                section.spacer(6)
+                section.table(static_table_data, max_length=35)
+            section.spacer(6)
             
-            scale_data = []
-            av_with_scale = AssetVulnerability.query.filter(AssetVulnerability.scale_json.isnot(None)).first()
-            if av_with_scale and av_with_scale.scale_json:
+            if threat.source_assessment:
                 try:
                     import json
-                    scale_data = json.loads(av_with_scale.scale_json)
+                    source_data = json.loads(threat.source_assessment)
+                    section.text(f"Оценка: {source_data.get('assessment', 'Нет данных')}")
+                    
+                    if 'scores' in source_data:
+                        scores = source_data['scores']
+                        user_scores_data = [
+                            ['Признак', 'Оценка'],
+                            ['Мотивация ИУ', str(scores.get('motivation', 'Не указано'))],
+                            ['Квалификация ИУ', str(scores.get('qualification', 'Не указано'))],
+                            ['Ресурсы ИУ', str(scores.get('resources', 'Не указано'))],
+                            ['Расположение ИУ', str(scores.get('location', 'Не указано'))]
+                        ]
+                        
+                        section.table(user_scores_data)
                 except:
-                    scale_data = []
+                    section.text("Ошибка чтения данных оценки")
             
-            if not scale_data:
-                scale_data = [
-                    {'name': 'Низкий', 'description': 'Уязвимость существует у актива в минимальной степени'},
-                    {'name': 'Средний', 'description': 'Уязвимость существует у актива частично'},
-                    {'name': 'Высокий', 'description': 'Уязвимость существует у актива в максимальной степени'}
-                ]
+            section.spacer(12)
             
-            scale_table_data = [['Уровень', 'Описание']]
-            for level in scale_data:
-                scale_table_data.append([
-                    level.get('name', ''),
-                    level.get('description', '')
-                ])
-            
-            scale_table = create_standard_table(scale_table_data, styles, num_columns=2)
-            elements.append(scale_table)
-            elements.append(Spacer(1, 12))
+            # Критерии оценки вероятности реализации угрозы
+            criteria_table_data = [
+                ['Признак', '1 балл', '2 балла', '3 балла', '4 балла'],
+                ['Продолжительность реализации', 'кратковременная', 'непрерывная непродолжительная', '', 'длительная непрерывная'],
+                ['Возможность обнаружения', 'легко', 'трудно', 'очень трудно', 'невозможно'],
+                ['Возможность нейтрализации', 'легко', 'трудно', 'очень трудно', 'невозможно'],
+                ['Источник угрозы ИБ', 'I = 1/4', '1/4 < I ≤ 1/2', '1/2 < I ≤ 3/4', '3/4 < I ≤ 1']
+            ]
             
-            # Оценка уязвимостей активов
-            elements.append(Paragraph("Оценка уязвимостей активов", styles['Title']))
-            elements.append(Spacer(1, 6))
+            values_table_data = [
+                ['Качественное значение', 'Количественное значение'],
+                ['Минимальная', '[0,25; 0,4]'],
+                ['Средняя', '[0,4; 0,7]'],
+                ['Высокая', '[0,7; 1]']
+            ]
             
-            asset_vulns = AssetVulnerability.query.all()
-            asset_vuln_map = {}
-            vul_map = {}
-            asset_map = {}
+            # Объединяем заголовок и обе таблицы вместе
+            with section.keep_together():
+                section.title("Критерии оценки вероятности реализации угрозы")
+                section.spacer(6)
+                section.table(criteria_table_data, max_length=35)
+                section.spacer(6)
+                section.table(values_table_data)
+            section.spacer(12)
             
-            if asset_vulns:
-                for av in asset_vulns:
-                    if av.vulnerability_id == 'scale_only' or av.vulnerability_id is None or av.asset_id is None:
-                        continue
-                    
-                    asset = Asset.query.get(av.asset_id)
-                    vulnerability = Vulnerability.query.get(av.vulnerability_id)
-                    if not asset or not vulnerability:
-                        continue
-                    
-                    asset_map[av.asset_id] = asset
-                    vul_map[av.vulnerability_id] = vulnerability
-                    
-                    if av.asset_id not in asset_vuln_map:
-                        asset_vuln_map[av.asset_id] = {}
-                    
-                    assessment_value = av.assessment or '-'
-                    if av.scale_json:
-                        try:
-                            import json
-                            scale_data = json.loads(av.scale_json)
-                            if isinstance(scale_data, list) and len(scale_data) > 0:
-                                assessment_value = scale_data[0].get('name', assessment_value)
-                            elif isinstance(scale_data, dict):
-                                assessment_value = scale_data.get('name', assessment_value)
-                        except:
-                            pass
+            if threat.probability_assessment:
+                try:
+                    import json
+                    prob_data = json.loads(threat.probability_assessment)
+                    section.text(f"Оценка вероятности: {prob_data.get('assessment', 'Нет данных')}")
                     
-                    asset_vuln_map[av.asset_id][av.vulnerability_id] = assessment_value
+                    if 'scores' in prob_data:
+                        scores = prob_data['scores']
+                        prob_scores_data = [
+                            ['Признак', 'Оценка'],
+                            ['Продолжительность', str(scores.get('duration', 'Не указано'))],
+                            ['Возможность обнаружения', str(scores.get('detectability', 'Не указано'))],
+                            ['Возможность нейтрализации', str(scores.get('neutralization', 'Не указано'))],
+                            ['Источник угрозы', str(scores.get('source', 'Не указано'))]
+                        ]
+                        
+                        section.table(prob_scores_data)
+                except:
+                    section.text("Ошибка чтения данных оценки вероятности")
             
-            if asset_vuln_map:
-                type_names = {
-                    'information': 'Информационные активы',
-                    'software': 'Программные средства',
-                    'hardware': 'Аппаратные средства',
-                    'other': 'Прочие активы'
-                }
+            section.spacer(12)
+        
+        # Итоговая таблица
+        section.title("Итог: Оценка вероятности реализации угроз для активов")
+        section.spacer(6)
+        
+        threat_assessments = ThreatAssessment.query.all()
+        all_assets = Asset.query.all()
+        # Только актуальные угрозы
+        all_threats = Threat.query.filter_by(is_relevant=True).all()
+        
+        assets_dict = {a.id: a for a in all_assets}
+        threats_dict = {t.id: t for t in all_threats}
+        
+        valid_assessments = []
+        for ta in threat_assessments:
+            asset = assets_dict.get(ta.asset_id)
+            threat_obj = threats_dict.get(ta.threat_id)
+            if asset and threat_obj:
+                valid_assessments.append(ta)
+        
+        if valid_assessments:
+            info_assets = {}
+            software_assets = {}
+            hardware_assets = {}
+            other_assets = {}
+            
+            for assessment in valid_assessments:
+                asset = assets_dict.get(assessment.asset_id)
+                threat_obj = threats_dict.get(assessment.threat_id)
                 
-                type_groups = {'information': {}, 'software': {}, 'hardware': {}, 'other': {}}
+                if not asset or not threat_obj:
+                    continue
                 
-                for asset_id, vul_dict in asset_vuln_map.items():
-                    asset = asset_map.get(asset_id)
-                    if not asset:
-                        continue
-                    
-                    asset_type = asset.type if asset.type in type_groups else 'other'
-                    type_groups[asset_type][asset_id] = vul_dict
+                if assessment.assessment is not None and assessment.assessment != '':
+                    level = assessment.assessment
+                else:
+                    level = get_assessment_level(assessment.score if assessment.score is not None else 0.5)
                 
-                for asset_type, assets_dict in type_groups.items():
-                    if not assets_dict:
-                        continue
-                    
-                    elements.append(Paragraph(f"{type_names[asset_type]}", styles['Normal']))
-                    elements.append(Spacer(1, 4))
-                    
-                    all_vul_ids = set()
-                    for vul_dict in assets_dict.values():
-                        all_vul_ids.update(vul_dict.keys())
-                    
-                    vul_ids_list = list(all_vul_ids)
-                    
-                    header_row = ['Актив']
-                    for vid in vul_ids_list:
-                        vul_obj = vul_map.get(vid)
-                        if vul_obj and hasattr(vul_obj, 'name'):
-                            header_row.append(vul_obj.name)
-                        else:
-                            header_row.append(str(vid))
-                    
-                    assessment_table_data = [header_row]
-                    
-                    for asset_id, vul_dict in assets_dict.items():
-                        asset = asset_map.get(asset_id)
-                        if not asset:
-                            continue
-                        
-                        row = [asset.name]
-                        for vul_id in vul_ids_list:
-                            assessment = vul_dict.get(vul_id, '-')
-                            row.append(assessment)
-                        
-                        assessment_table_data.append(row)
-                    
-                    assessment_table = create_standard_table(assessment_table_data, styles, num_columns=len(header_row))
-                    elements.append(assessment_table)
-                    elements.append(Spacer(1, 6))
-            else:
-                elements.append(Paragraph("Оценки уязвимостей не заполнены", styles['Normal']))
+                table_row = [threat_obj.name, level]
+                
+                if asset.type == 'information':
+                    if asset.id not in info_assets:
+                        info_assets[asset.id] = {'asset': asset, 'threats': []}
+                    info_assets[asset.id]['threats'].append(table_row)
+                elif asset.type == 'software':
+                    if asset.id not in software_assets:
+                        software_assets[asset.id] = {'asset': asset, 'threats': []}
+                    software_assets[asset.id]['threats'].append(table_row)
+                elif asset.type == 'hardware':
+                    if asset.id not in hardware_assets:
+                        hardware_assets[asset.id] = {'asset': asset, 'threats': []}
+                    hardware_assets[asset.id]['threats'].append(table_row)
+                else:
+                    if asset.id not in other_assets:
+                        other_assets[asset.id] = {'asset': asset, 'threats': []}
+                    other_assets[asset.id]['threats'].append(table_row)
             
-            elements.append(Spacer(1, 12))
+            final_table_data = []
             
-        elif module == 'incidents':
-            elements.append(PageBreak())
-            elements.append(Paragraph("4. ИНЦИДЕНТЫ", styles['Title']))
-            elements.append(Spacer(1, 8))
+            if info_assets:
+                final_table_data.append([bold_cell('Информационные активы'), '', ''])
+                for asset_data in info_assets.values():
+                    asset = asset_data['asset']
+                    threats_list = asset_data['threats']
+                    if threats_list:
+                        final_table_data.append([
+                            asset.name,
+                            threats_list[0][0],
+                            threats_list[0][1]
+                        ])
+                        for threat_row in threats_list[1:]:
+                            final_table_data.append(['', threat_row[0], threat_row[1]])
+            
+            if software_assets:
+                final_table_data.append([bold_cell('Программные средства'), '', ''])
+                for asset_data in software_assets.values():
+                    asset = asset_data['asset']
+                    threats_list = asset_data['threats']
+                    if threats_list:
+                        final_table_data.append([
+                            asset.name,
+                            threats_list[0][0],
+                            threats_list[0][1]
+                        ])
+                        for threat_row in threats_list[1:]:
+                            final_table_data.append(['', threat_row[0], threat_row[1]])
             
-            query = db.session.query(Incident).join(Asset).join(Context)
-            if context_id:
-                query = query.filter(Asset.context_id == context_id)
+            if hardware_assets:
+                final_table_data.append([bold_cell('Аппаратные средства'), '', ''])
+                for asset_data in hardware_assets.values():
+                    asset = asset_data['asset']
+                    threats_list = asset_data['threats']
+                    if threats_list:
+                        final_table_data.append([
+                            asset.name,
+                            threats_list[0][0],
+                            threats_list[0][1]
+                        ])
+                        for threat_row in threats_list[1:]:
+                            final_table_data.append(['', threat_row[0], threat_row[1]])
             
-            incidents = query.all()
+            if other_assets:
+                final_table_data.append([bold_cell('Прочие активы'), '', ''])
+                for asset_data in other_assets.values():
+                    asset = asset_data['asset']
+                    threats_list = asset_data['threats']
+                    if threats_list:
+                        final_table_data.append([
+                            asset.name,
+                            threats_list[0][0],
+                            threats_list[0][1]
+                        ])
+                        for threat_row in threats_list[1:]:
+                            final_table_data.append(['', threat_row[0], threat_row[1]])
             
-            if incidents:
-                elements.append(Paragraph("Подробная информация об инцидентах:", styles['Title']))
-                elements.append(Spacer(1, 6))
+            if final_table_data:
+                header_row = [bold_cell('Актив'), bold_cell('Угроза'), bold_cell('Оценка')]
+                final_table_data.insert(0, header_row)
                 
-                for incident in incidents:
-                    elements.append(Paragraph(f"Инцидент #{incident.id}", styles['Normal']))
-                    elements.append(Spacer(1, 4))
-                    
-                    operational_impact_text = ''
-                    if incident.operational_impact:
-                        try:
-                            import json
-                            impacts = json.loads(incident.operational_impact)
-                            impact_names = []
-                            if 'confidentiality' in impacts:
-                                impact_names.append('Конфиденциальность')
-                            if 'integrity' in impacts:
-                                impact_names.append('Целостность')
-                            if 'availability' in impacts:
-                                impact_names.append('Доступность')
-                            operational_impact_text = ', '.join(impact_names)
-                        except:
-                            operational_impact_text = incident.operational_impact or ''
-                    
-                    info_data = [
-                        ['Параметр', 'Значение'],
-                        ['ID', str(incident.id)],
-                        ['Актив', incident.asset.name if incident.asset else ''],
-                        ['Угроза', incident.threat.name if incident.threat else ''],
-                        ['Уязвимость', incident.vulnerability.name if incident.vulnerability else ''],
-                        ['Операционное воздействие', operational_impact_text],
-                        ['Воздействие на бизнес', incident.business_impact or ''],
-                        ['Уровень воздействия', incident.impact_level or ''],
-                        ['Название сценария', incident.scenario_name or ''],
-                        ['Вероятность сценария', str(incident.scenario_probability) if incident.scenario_probability else ''],
-                        ['Дата создания', incident.created_at.strftime('%d.%m.%Y %H:%M:%S') if incident.created_at else '']
-                    ]
-                    
-                    wrapped_info_data = create_table_data_with_wrapping(info_data, styles, max_length=50)
-                    info_table = Table(wrapped_info_data, colWidths=[1.8*inch, 4.2*inch])
-                    info_table.setStyle(create_detailed_table_style())
-                    elements.append(info_table)
-                    
-                    
-                    
-                    if incident.treatment_plans:
-                        elements.append(Spacer(1, 6))
-                        elements.append(Paragraph("Планы обработки:", styles['Normal']))
-                        plan_data = [['ID плана', 'Меры', 'Остаточный риск', 'Сроки', 'Ответственные']]
-                        for plan in incident.treatment_plans:
-                            plan_data.append([
-                                str(plan.id),
-                                (plan.risk_treatment_measures[:40] + "...") if plan.risk_treatment_measures and len(plan.risk_treatment_measures) > 40 else (plan.risk_treatment_measures or ''),
-                                plan.residual_risk or '',
-                                plan.deadlines or '',
-                                plan.responsible_persons or ''
-                            ])
-                        
-                        plan_table = Table(create_table_data_with_wrapping(plan_data, styles, max_length=35))
-                        plan_table.setStyle(create_table_style())
-                        elements.append(plan_table)
-                    
-                    elements.append(Spacer(1, 10))
+                final_col_widths = [1.8*inch, 3*inch, 1.2*inch]
+                section.table(final_table_data, max_length=35, col_widths=final_col_widths, cell_padding=TABLE_CELL_PADDING)
             else:
-                elements.append(Paragraph("Данные об инцидентах отсутствуют", styles['Normal']))
+                section.text("Нет данных для отображения")
+        else:
+            section.text("Данные для оценки вероятности отсутствуют")
+    else:
+        section.text("Данные об угрозах отсутствуют")
+    
+    section.spacer(12)
+    
+    return section.items
+
+
+def load_vulnerabilities_section(context_id):
+    """Раздел отчета «Уязвимости»: выборка данных и разметка раздела (без элементов reportlab)"""
+    section = SectionContent()
+    section.page_break()
+    section.title("3. УЯЗВИМОСТИ")
+    section.spacer(8)
+    
+    # Список выявленных уязвимостей
+    section.title("Список выявленных уязвимостей")
+    section.spacer(6)
+    
+    # Все оценки уязвимостей активов контекста одним запросом с JOIN
+    # (в отчет попадают только оцененные уязвимости, а не весь каталог БДУ)
+    assessed_query = db.session.query(
+        AssetVulnerability.asset_id,
+        AssetVulnerability.vulnerability_id,
+        AssetVulnerability.assessment,
+        AssetVulnerability.scale_json,
+        Asset.name,
+        Asset.type,
+        Vulnerability.name,
+        Vulnerability.description
+    ).join(Asset, Asset.id == AssetVulnerability.asset_id).join(
+        Vulnerability, Vulnerability.id == AssetVulnerability.vulnerability_id
+    ).filter(AssetVulnerability.vulnerability_id != 'scale_only')
+    if context_id:
+        assessed_query = assessed_query.filter(Asset.context_id == context_id)
+    assessed_rows = assessed_query.order_by(AssetVulnerability.id).all()
+    
+    vulnerabilities = {}
+    for _, vulnerability_id, _, _, _, _, vulnerability_name, vulnerability_description in assessed_rows:
+        vulnerabilities.setdefault(vulnerability_id, (vulnerability_name, vulnerability_description))
+    
+    if vulnerabilities:
+        table_data = [['ID', 'Наименование', 'Описание']]
+        for vulnerability_id in sorted(vulnerabilities):
+            name, description = vulnerabilities[vulnerability_id]
+            table_data.append([
+                str(vulnerability_id),
+                name,
+                description or ''
+            ])
+        
+        section.standard_table(table_data, 3)
+    else:
+        section.text("Уязвимости не выявлены")
+    
+    section.spacer(12)
+    
+    # Качественная шкала оценки уязвимостей
+    section.title("Качественная шкала оценки уязвимостей")
+    section.spacer(6)
+    
+    # Шкала хранится в каждой оценке; разбираем каждый уникальный JSON один раз
+    parsed_scales = {}
+    
+    def parse_scale(scale_json):
+        if scale_json not in parsed_scales:
+            try:
+                import json
+                parsed_scales[scale_json] = json.loads(scale_json)
+            except:
+                parsed_scales[scale_json] = None
+        return parsed_scales[scale_json]
+    
+    scale_data = []
+    scale_query = db.session.query(AssetVulnerability.scale_json).filter(AssetVulnerability.scale_json.isnot(None))
+    if context_id:
+        scale_query = scale_query.join(Asset, Asset.id == AssetVulnerability.asset_id).filter(Asset.context_id == context_id)
+    scale_json = scale_query.order_by(AssetVulnerability.id).limit(1).scalar()
+    if scale_json:
+        scale_data = parse_scale(scale_json) or []
+    
+    if not scale_data:
+        scale_data = [
+            {'name': 'Низкий', 'description': 'Уязвимость существует у актива в минимальной степени'},
+            {'name': 'Средний', 'description': 'Уязвимость существует у актива частично'},
+            {'name': 'Высокий', 'description': 'Уязвимость существует у актива в максимальной степени'}
+        ]
+    
+    scale_table_data = [['Уровень', 'Описание']]
+    for level in scale_data:
+        scale_table_data.append([
+            level.get('name', ''),
+            level.get('description', '')
+        ])
+    
+    section.standard_table(scale_table_data, 2)
+    section.spacer(12)
+    
+    # Оценка уязвимостей активов
+    section.title("Оценка уязвимостей активов")
+    section.spacer(6)
+    
+    asset_vuln_map = {}
+    vul_map = {}
+    asset_map = {}
+    
+    for asset_id, vulnerability_id, assessment, row_scale_json, asset_name, asset_type, vulnerability_name, _ in assessed_rows:
+        asset_map[asset_id] = (asset_name, asset_type)
+        vul_map[vulnerability_id] = vulnerability_name
+        
+        if asset_id not in asset_vuln_map:
+            asset_vuln_map[asset_id] = {}
+        
+        assessment_value = assessment or '-'
+        if row_scale_json:
+            row_scale = parse_scale(row_scale_json)
+            try:
+                if isinstance(row_scale, list) and len(row_scale) > 0:
+                    assessment_value = row_scale[0].get('name', assessment_value)
+                elif isinstance(row_scale, dict):
+                    assessment_value = row_scale.get('name', assessment_value)
+            except:
+                pass
+        
+        asset_vuln_map[asset_id][vulnerability_id] = assessment_value
+    
+    if asset_vuln_map:
+        type_names = {
+            'information': 'Информационные активы',
+            'software': 'Программные средства',
+            'hardware': 'Аппаратные средства',
+            'other': 'Прочие активы'
+        }
+        
+        type_groups = {'information': {}, 'software': {}, 'hardware': {}, 'other': {}}
+        
+        for asset_id, vul_dict in asset_vuln_map.items():
+            asset_type = asset_map[asset_id][1]
+            asset_type = asset_type if asset_type in type_groups else 'other'
+            type_groups[asset_type][asset_id] = vul_dict
+        
+        for asset_type, assets_dict in type_groups.items():
+            if not assets_dict:
+                continue
             
-            elements.append(Spacer(1, 12))
+            section.text(f"{type_names[asset_type]}")
+            section.spacer(4)
             
-        elif module == 'risks':
-            elements.append(PageBreak())
-            elements.append(Paragraph("5. РИСКИ", styles['Title']))
-            elements.append(Spacer(1, 8))
+            # Колонки в порядке первого появления уязвимости
+            vul_ids_list = list(dict.fromkeys(
+                vul_id for vul_dict in assets_dict.values() for vul_id in vul_dict
+            ))
+            
+            header_row = ['Актив']
+            for vid in vul_ids_list:
+                header_row.append(vul_map.get(vid) or str(vid))
+            
+            assessment_table_data = [header_row]
+            
+            for asset_id, vul_dict in assets_dict.items():
+                row = [asset_map[asset_id][0]]
+                for vul_id in vul_ids_list:
+                    assessment = vul_dict.get(vul_id, '-')
+                    row.append(assessment)
+                
+                assessment_table_data.append(row)
+            
+            section.standard_table(assessment_table_data, len(header_row))
+            section.spacer(6)
+    else:
+        section.text("Оценки уязвимостей не заполнены")
+    
+    section.spacer(12)
+    
+    return section.items
+
+
+def format_operational_impact(operational_impact, short=False):
+    """
+    Операционное воздействие инцидента (JSON со свойствами ИБ) в виде текста;
+    short=True - сокращения К, Ц, Д (как в перечне активов)
+    """
+    if not operational_impact:
+        return ''
+    try:
+        import json
+        impacts = json.loads(operational_impact)
+        impact_names = []
+        if 'confidentiality' in impacts:
+            impact_names.append('К' if short else 'Конфиденциальность')
+        if 'integrity' in impacts:
+            impact_names.append('Ц' if short else 'Целостность')
+        if 'availability' in impacts:
+            impact_names.append('Д' if short else 'Доступность')
+        return ', '.join(impact_names)
+    except:
+        return operational_impact
+
+
+def format_register_scenario(scenario_name, scenario_probability):
+    """Сценарий инцидента с оценкой вероятности в скобках (колонка реестра)"""
+    if not scenario_probability:
+        return scenario_name or ''
+    return f"{scenario_name or ''} ({scenario_probability})".strip()
+
+
+def risk_acceptability(risk, risk_acceptance_criteria):
+    """Приемлемость риска ('Да'/'Нет') по критериям принятия из контекста"""
+    is_acceptable = 'Нет'
+    risk_level = risk.risk_level or ''
+    if risk_acceptance_criteria:
+        if risk_level == 'низкий':
+            is_acceptable = 'Да' if risk_acceptance_criteria.get('low') == 'приемлемый' else 'Нет'
+        elif risk_level == 'средний':
+            is_acceptable = 'Да' if risk_acceptance_criteria.get('medium') == 'приемлемый' else 'Нет'
+        elif risk_level == 'высокий':
+            is_acceptable = 'Да' if risk_acceptance_criteria.get('high') == 'приемлемый' else 'Нет'
+    else:
+        # По умолчанию: низкий и средний - приемлемый, высокий - неприемлемый
+        if risk.risk_score is not None:
+            is_acceptable = 'Да' if risk.risk_score < 5 else 'Нет'
+    return is_acceptable
+
+
+def load_incidents_section(context_id):
+    """Раздел отчета «Инциденты»: выборка данных и разметка раздела (без элементов reportlab)"""
+    section = SectionContent()
+    section.page_break()
+    section.title("4. ИНЦИДЕНТЫ")
+    section.spacer(8)
+    
+    query = db.session.query(Incident).join(Asset).join(Context).options(
+        selectinload(Incident.asset),
+        selectinload(Incident.threat),
+        selectinload(Incident.vulnerability),
+        selectinload(Incident.treatment_plans)
+    )
+    if context_id:
+        query = query.filter(Asset.context_id == context_id)
+    
+    incidents = query.all()
+    
+    if incidents and use_register_layout(len(incidents)):
+        section.title("Реестр инцидентов:")
+        section.spacer(6)
+        incident_rows = []
+        plan_rows = []
+        for incident in incidents:
+            incident_rows.append([
+                str(incident.id),
+                incident.asset.name if incident.asset else '',
+                incident.threat.name if incident.threat else '',
+                incident.vulnerability.name if incident.vulnerability else '',
+                format_operational_impact(incident.operational_impact, short=True),
+                incident.business_impact or '',
+                incident.impact_level or '',
+                format_register_scenario(incident.scenario_name, incident.scenario_probability),
+                incident.created_at.strftime('%d.%m.%Y %H:%M:%S') if incident.created_at else ''
+            ])
+            for plan in incident.treatment_plans:
+                plan_rows.append([
+                    str(incident.id),
+                    str(plan.id),
+                    plan.risk_treatment_measures or '',
+                    plan.residual_risk or '',
+                    plan.deadlines or '',
+                    plan.responsible_persons or ''
+                ])
+        section.register_table(INCIDENT_REGISTER_COLUMNS, incident_rows)
+        section.spacer(6)
+        section.text(
+            "Примечание: операционное воздействие - К (конфиденциальность), Ц (целостность), Д (доступность); "
+            "в скобках после сценария - оценка его вероятности"
+        )
+        if plan_rows:
+            section.spacer(12)
+            section.title("Планы обработки:")
+            section.spacer(6)
+            section.register_table(TREATMENT_PLAN_REGISTER_COLUMNS, plan_rows)
+    elif incidents:
+        section.title("Подробная информация об инцидентах:")
+        section.spacer(6)
+        
+        for incident in incidents:
+            section.text(f"Инцидент #{incident.id}")
+            section.spacer(4)
+            
+            operational_impact_text = format_operational_impact(incident.operational_impact)
             
-            # Загружаем критерии принятия риска из контекста
-            risk_acceptance_criteria = None
-            if context_id:
-                context = Context.query.get(context_id)
-                if context and context.risk_acceptance_criteria:
-                    try:
-                        import json
-                        risk_acceptance_criteria = json.loads(context.risk_acceptance_criteria)
-                    except:
-                        pass
+            info_data = [
+                ['Параметр', 'Значение'],
+                ['ID', str(incident.id)],
+                ['Актив', incident.asset.name if incident.asset else ''],
+                ['Угроза', incident.threat.name if incident.threat else ''],
+                ['Уязвимость', incident.vulnerability.name if incident.vulnerability else ''],
+                ['Операционное воздействие', operational_impact_text],
+                ['Воздействие на бизнес', incident.business_impact or ''],
+                ['Уровень воздействия', incident.impact_level or ''],
+                ['Название сценария', incident.scenario_name or ''],
+                ['Вероятность сценария', str(incident.scenario_probability) if incident.scenario_probability else ''],
+                ['Дата создания', incident.created_at.strftime('%d.%m.%Y %H:%M:%S') if incident.created_at else '']
+            ]
             
-            query = db.session.query(Risk).join(Incident).join(Asset).join(Context)
-            if context_id:
-                query = query.filter(Context.id == context_id)
+            info_col_widths = [1.8*inch, 4.2*inch]
+            section.table(info_data, max_length=50, col_widths=info_col_widths, detailed=True)
             
-            risks = query.all()
             
-            if risks:
-                elements.append(Paragraph("Подробная информация о рисках:", styles['Title']))
-                elements.append(Spacer(1, 6))
+            
+            if incident.treatment_plans:
+                section.spacer(6)
+                section.text("Планы обработки:")
+                plan_data = [['ID плана', 'Меры', 'Остаточный риск', 'Сроки', 'Ответственные']]
+                for plan in incident.treatment_plans:
+                    plan_data.append([
+                        str(plan.id),
+                        (plan.risk_treatment_measures[:40] + "...") if plan.risk_treatment_measures and len(plan.risk_treatment_measures) > 40 else (plan.risk_treatment_measures or ''),
+                        plan.residual_risk or '',
+                        plan.deadlines or '',
+                        plan.responsible_persons or ''
+                    ])
                 
-                for risk in risks:
-                    elements.append(Paragraph(f"Риск #{risk.id}", styles['Normal']))
-                    elements.append(Spacer(1, 4))
-                    
-                    # Определяем приемлемость риска на основе критериев из контекста
-                    is_acceptable = 'Нет'
-                    risk_level = risk.risk_level or ''
-                    
-                    if risk_acceptance_criteria:
-                        if risk_level == 'низкий':
-                            is_acceptable = 'Да' if risk_acceptance_criteria.get('low') == 'приемлемый' else 'Нет'
-                        elif risk_level == 'средний':
-                            is_acceptable = 'Да' if risk_acceptance_criteria.get('medium') == 'приемлемый' else 'Нет'
-                        elif risk_level == 'высокий':
-                            is_acceptable = 'Да' if risk_acceptance_criteria.get('high') == 'приемлемый' else 'Нет'
-                    else:
-                        # По умолчанию: низкий и средний - приемлемый, высокий - неприемлемый
-                        if risk.risk_score is not None:
-                            is_acceptable = 'Да' if risk.risk_score < 5 else 'Нет'
-                    
-                    info_data = [
-                        ['Параметр', 'Значение'],
-                        ['ID', str(risk.id)],
-                        ['Актив', risk.incident.asset.name if risk.incident and risk.incident.asset else ''],
-                        ['Угроза', risk.incident.threat.name if risk.incident and risk.incident.threat else ''],
-                        ['Уязвимость', risk.incident.vulnerability.name if risk.incident and risk.incident.vulnerability else ''],
-                        ['Уровень последствий', risk.impact_level or ''],
-                        ['Вероятность сценария', str(format_scenario_probability(risk.scenario_probability)) if risk.scenario_probability else ''],
-                        ['Уровень риска', risk_level],
-                        ['Приемлемый', is_acceptable],
-                        ['Дата создания', risk.created_at.strftime('%d.%m.%Y %H:%M:%S') if risk.created_at else '']
-                    ]
-                    
-                    wrapped_info_data = create_table_data_with_wrapping(info_data, styles, max_length=50)
-                    info_table = Table(wrapped_info_data, colWidths=[1.8*inch, 4.2*inch])
-                    info_table.setStyle(create_detailed_table_style())
-                    elements.append(info_table)
-                    elements.append(Spacer(1, 10))
-            else:
-                elements.append(Paragraph("Данные о рисках отсутствуют", styles['Normal']))
+                section.table(plan_data, max_length=35)
+            
+            section.spacer(10)
+    else:
+        section.text("Данные об инцидентах отсутствуют")
+    
+    section.spacer(12)
+    
+    return section.items
+
+
+def load_risks_section(context_id):
+    """Раздел отчета «Риски»: выборка данных и разметка раздела (без элементов reportlab)"""
+    section = SectionContent()
+    section.page_break()
+    section.title("5. РИСКИ")
+    section.spacer(8)
+    
+    # Загружаем критерии принятия риска из контекста
+    risk_acceptance_criteria = None
+    if context_id:
+        context = Context.query.get(context_id)
+        if context and context.risk_acceptance_criteria:
+            try:
+                import json
+                risk_acceptance_criteria = json.loads(context.risk_acceptance_criteria)
+            except:
+                pass
+    
+    query = db.session.query(Risk).join(Incident).join(Asset).join(Context).options(
+        selectinload(Risk.incident).selectinload(Incident.asset),
+        selectinload(Risk.incident).selectinload(Incident.threat),
+        selectinload(Risk.incident).selectinload(Incident.vulnerability)
+    )
+    if context_id:
+        query = query.filter(Context.id == context_id)
+    
+    risks = query.all()
+    
+    if risks and use_register_layout(len(risks)):
+        section.title("Реестр рисков:")
+        section.spacer(6)
+        risk_rows = []
+        for risk in risks:
+            incident = risk.incident
+            risk_rows.append([
+                str(risk.id),
+                incident.asset.name if incident and incident.asset else '',
+                incident.threat.name if incident and incident.threat else '',
+                incident.vulnerability.name if incident and incident.vulnerability else '',
+                risk.impact_level or '',
+                str(format_scenario_probability(risk.scenario_probability)) if risk.scenario_probability else '',
+                risk.risk_level or '',
+                risk_acceptability(risk, risk_acceptance_criteria),
+                risk.created_at.strftime('%d.%m.%Y %H:%M:%S') if risk.created_at else ''
+            ])
+        section.register_table(RISK_REGISTER_COLUMNS, risk_rows)
+    elif risks:
+        section.title("Подробная информация о рисках:")
+        section.spacer(6)
+        
+        for risk in risks:
+            section.text(f"Риск #{risk.id}")
+            section.spacer(4)
+            
+            # Определяем приемлемость риска на основе критериев из контекста
+            is_acceptable = risk_acceptability(risk, risk_acceptance_criteria)
+            risk_level = risk.risk_level or ''
+            
+            info_data = [
+                ['Параметр', 'Значение'],
+                ['ID', str(risk.id)],
+                ['Актив', risk.incident.asset.name if risk.incident and risk.incident.asset else ''],
+                ['Угроза', risk.incident.threat.name if risk.incident and risk.incident.threat else ''],
+                ['Уязвимость', risk.incident.vulnerability.name if risk.incident and risk.incident.vulnerability else ''],
+                ['Уровень последствий', risk.impact_level or ''],
+                ['Вероятность сценария', str(format_scenario_probability(risk.scenario_probability)) if risk.scenario_probability else ''],
+                ['Уровень риска', risk_level],
+                ['Приемлемый', is_acceptable],
+                ['Дата создания', risk.created_at.strftime('%d.%m.%Y %H:%M:%S') if risk.created_at else '']
+            ]
             
-            elements.append(Spacer(1, 12))
+            info_col_widths = [1.8*inch, 4.2*inch]
+            section.table(info_data, max_length=50, col_widths=info_col_widths, detailed=True)
+            section.spacer(10)
+    else:
+        section.text("Данные о рисках отсутствуют")
+    
+    section.spacer(12)
+    
+    return section.items
+
+def load_security_property_impacts(asset_ids):
+    """
+    Оценки воздействия по свойствам ИБ для набора активов одним запросом:
+    {(asset_id, security_property, impact_criterion_id): impact_value}.
+    При дублях берется первая запись (как .first() по каждой тройке).
+    """
+    lookup = {}
+    rows = db.session.query(
+        AssetSecurityPropertyImpact.asset_id,
+        AssetSecurityPropertyImpact.security_property,
+        AssetSecurityPropertyImpact.impact_criterion_id,
+        AssetSecurityPropertyImpact.impact_value
+    ).filter(
+        AssetSecurityPropertyImpact.asset_id.in_(asset_ids),
+        AssetSecurityPropertyImpact.impact_criterion_id.isnot(None)
+    ).order_by(AssetSecurityPropertyImpact.id)
+    for asset_id, security_property, criterion_id, impact_value in rows:
+        lookup.setdefault((asset_id, security_property, criterion_id), impact_value)
+    return lookup
+
+
+# Выборка данных разделов комбинированного отчета по модулям
+SECTION_LOADERS = {
+    'assets': load_assets_section,
+    'threats': load_threats_section,
+    'vulnerabilities': load_vulnerabilities_section,
+    'incidents': load_incidents_section,
+    'risks': load_risks_section
+}
+
+
+def _load_section_in_app_context(app, loader, context_id):
+    """Выборка раздела в потоке пула: свой контекст приложения и своя сессия БД"""
+    with app.app_context():
+        try:
+            return loader(context_id)
+        finally:
+            db.session.remove()
+
+
+def gather_report_sections(context_id, modules, styles, progress_callback=None):
+    """
+    Построение разделов отчета по модулям.
+
+    Выборка данных и разметка разделов (SECTION_LOADERS) выполняются
+    параллельно в пуле из REPORT_SECTION_WORKERS потоков, каждый со своей
+    сессией БД; в потоках не создаются объекты reportlab. Элементы PDF
+    строятся render_section в вызывающем потоке по мере готовности
+    разделов, поэтому стили и кэши переноса текста используются только им.
+    progress_callback(module) вызывается после построения каждого раздела.
+    Результат - в порядке modules (для неизвестных модулей - пустой список).
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from flask import current_app
+    
+    sections = {module: [] for module in modules}
+    tasks = [module for module in dict.fromkeys(modules) if module in SECTION_LOADERS]
+    workers = min(len(tasks), current_app.config.get('REPORT_SECTION_WORKERS', 5))
+    
+    def add_section(module, items):
+        sections[module] = render_section(items, styles)
+        if progress_callback:
+            progress_callback(module)
+    
+    if workers <= 1:
+        for module in tasks:
+            add_section(module, SECTION_LOADERS[module](context_id))
+    else:
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-section') as executor:
+            futures = {
+                executor.submit(_load_section_in_app_context, app, SECTION_LOADERS[module], context_id): module
+                for module in tasks
+            }
+            for future in as_completed(futures):
+                add_section(futures[future], future.result())
+    
+    return [sections[module] for module in modules]
+
+
+def generate_combined_pdf_report(context_id, modules, progress_callback=None, output_path=None):
+    """
+    Генерация комбинированного PDF отчета с выбранными модулями
+
+    Данные разделов выбираются параллельно (gather_report_sections), doc.build
+    собирает разделы в порядке modules. progress_callback(stage) вызывается по
+    готовности каждого раздела (stage - имя модуля) и перед сборкой PDF
+    (stage = 'pdf').
+
+    Если указан output_path, PDF записывается сразу в этот файл и функция
+    возвращает путь; иначе возвращается BytesIO с документом.
+    """
+    buffer = output_path or BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.75*inch, bottomMargin=0.75*inch)
+    elements = []
+    styles = create_cyrillic_style_sheet()
+    
+    title = "Отчёт по оценке рисков информационной безопасности"
+    elements.append(Paragraph(title, styles['Title']))
+    elements.append(Spacer(1, 10))
+    
+    # Отчет из кэша выдается повторно, пока данные не изменились, поэтому
+    # указывается именно момент формирования файла
+    current_date = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+    elements.append(Paragraph(f"Отчет сформирован: {current_date}", styles['Normal']))
+    elements.append(Spacer(1, 10))
+    
+    if context_id:
+        context = Context.query.get(context_id)
+        if context:
+            elements.append(Paragraph(f"Название объекта: {context.name}", styles['Normal']))
+            elements.append(Spacer(1, 6))
+    
+    module_names = {
+        'assets': 'Активы',
+        'threats': 'Угрозы',
+        'vulnerabilities': 'Уязвимости',
+        'incidents': 'Инциденты',
+        'risks': 'Риски'
+    }
+    
+    elements.append(Paragraph("Включенные модули:", styles['Normal']))
+    for module in modules:
+        if module in module_names:
+            elements.append(Paragraph(f"• {module_names[module]}", styles['Normal']))
+    elements.append(Spacer(1, 12))
+    
+    for section in gather_report_sections(context_id, modules, styles, progress_callback):
+        elements.extend(section)
     
+    if progress_callback:
+        progress_callback('pdf')
     doc.build(elements)
+    if output_path:
+        return output_path
     buffer.seek(0)
     return buffer
 
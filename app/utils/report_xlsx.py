@@ -0,0 +1,281 @@
+import json
+
+from app import db
+from app.models import Context, Asset, Threat, Vulnerability, Incident, Risk, RiskTreatmentPlan
+from app.models import ThreatAssessment, AssetVulnerability
+
+# Размер пакета строк, читаемых из курсора БД (yield_per): в памяти
+# одновременно находится не больше одного пакета каждого листа
+XLSX_BATCH_SIZE = 1000
+
+# Строки с такими первыми символами Excel и LibreOffice считают формулой:
+# введенный пользователем текст выводится с префиксом "'" и не выполняется
+FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+ASSET_TYPE_NAMES = {
+    'information': 'Информационный',
+    'software': 'Программный',
+    'hardware': 'Аппаратный'
+}
+
+
+def _asset_properties_text(properties):
+    if not properties:
+        return ''
+    try:
+        props = json.loads(properties)
+    except (TypeError, ValueError):
+        return properties
+    props_list = []
+    if props.get('confidentiality'): props_list.append('К')
+    if props.get('integrity'): props_list.append('Ц')
+    if props.get('availability'): props_list.append('Д')
+    return ','.join(props_list)
+
+
+def _cell_value(value):
+    """
+    Значение ячейки для записи в лист: из строк удаляются управляющие
+    символы, недопустимые в XLSX, строки-формулы экранируются префиксом "'"
+    """
+    if not isinstance(value, str):
+        return value
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    value = ILLEGAL_CHARACTERS_RE.sub('', value)
+    if value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _context_sheet(context_id):
+    query = db.session.query(
+        Context.id, Context.name, Context.owner_name, Context.description, Context.created_at
+    ).order_by(Context.id)
+    if context_id:
+        query = query.filter(Context.id == context_id)
+    return (
+        'Контекст',
+        ['ID', 'Название объекта', 'ФИО ответственного', 'Описание', 'Дата создания'],
+        query,
+        list
+    )
+
+
+def _assets_sheets(context_id):
+    query = db.session.query(
+        Asset.id, Asset.name, Asset.type, Asset.properties, Asset.value_without_dependencies,
+        Asset.dependency_value, Asset.final_value, Asset.asset_cost, Asset.created_at
+    ).order_by(Asset.id)
+    if context_id:
+        query = query.filter(Asset.context_id == context_id)
+
+    def row(asset):
+        return [
+            asset.id,
+            asset.name,
+            ASSET_TYPE_NAMES.get(asset.type, asset.type),
+            _asset_properties_text(asset.properties),
+            asset.value_without_dependencies,
+            asset.dependency_value,
+            asset.final_value,
+            asset.asset_cost,
+            asset.created_at
+        ]
+
+    return [(
+        'Активы',
+        ['ID', 'Наименование', 'Тип', 'Свойства ИБ', 'Ценность без зависимостей',
+         'Ценность с зависимостями', 'Итоговая ценность', 'Стоимость, тыс.руб.', 'Дата создания'],
+        query,
+        row
+    )]
+
+
+def _threats_sheets(context_id):
+    # Как и в PDF отчете: перечень актуальных угроз и итоговая оценка по активам контекста
+    threats_query = db.session.query(
+        Threat.id, Threat.bdu_id, Threat.name, Threat.description, Threat.source,
+        Threat.target_object, Threat.likelihood
+    ).filter(Threat.is_relevant == True).order_by(Threat.id)
+
+    assessments_query = db.session.query(
+        Asset.name, Threat.name, ThreatAssessment.cia_values, ThreatAssessment.features_count,
+        ThreatAssessment.score, ThreatAssessment.assessment
+    ).join(Asset, Asset.id == ThreatAssessment.asset_id).join(
+        Threat, Threat.id == ThreatAssessment.threat_id
+    ).order_by(ThreatAssessment.id)
+    if context_id:
+        assessments_query = assessments_query.filter(Asset.context_id == context_id)
+
+    return [
+        (
+            'Угрозы',
+            ['ID', 'Идентификатор УБИ', 'Наименование', 'Описание', 'Источник угрозы',
+             'Объект воздействия', 'Вероятность'],
+            threats_query,
+            list
+        ),
+        (
+            'Оценка угроз',
+            ['Актив', 'Угроза', 'Нарушаемые свойства', 'Количество признаков', 'Баллы', 'Оценка'],
+            assessments_query,
+            list
+        )
+    ]
+
+
+def _vulnerabilities_sheets(context_id):
+    query = db.session.query(
+        Asset.name, Vulnerability.id, Vulnerability.name, Vulnerability.level, Vulnerability.cvss_score,
+        AssetVulnerability.level, AssetVulnerability.assessment
+    ).join(Asset, Asset.id == AssetVulnerability.asset_id).join(
+        Vulnerability, Vulnerability.id == AssetVulnerability.vulnerability_id
+    ).filter(AssetVulnerability.vulnerability_id != 'scale_only').order_by(AssetVulnerability.id)
+    if context_id:
+        query = query.filter(Asset.context_id == context_id)
+    return [(
+        'Уязвимости',
+        ['Актив', 'ID уязвимости', 'Наименование', 'Уровень опасности', 'CVSS',
+         'Уровень уязвимости', 'Оценка'],
+        query,
+        list
+    )]
+
+
+def _incidents_sheets(context_id):
+    from app.utils.report_utils import format_operational_impact
+
+    incidents_query = db.session.query(
+        Incident.id, Asset.name, Threat.name, Vulnerability.name, Incident.operational_impact,
+        Incident.business_impact, Incident.impact_level, Incident.scenario_name,
+        Incident.scenario_probability, Incident.created_at
+    ).join(Asset, Asset.id == Incident.asset_id).outerjoin(
+        Threat, Threat.id == Incident.threat_id
+    ).outerjoin(
+        Vulnerability, Vulnerability.id == Incident.vulnerability_id
+    ).order_by(Incident.id)
+
+    plans_query = db.session.query(
+        RiskTreatmentPlan.incident_id, RiskTreatmentPlan.id, RiskTreatmentPlan.risk_treatment_measures,
+        RiskTreatmentPlan.residual_risk, RiskTreatmentPlan.resources, RiskTreatmentPlan.deadlines,
+        RiskTreatmentPlan.responsible_persons, RiskTreatmentPlan.actions
+    ).join(Incident, Incident.id == RiskTreatmentPlan.incident_id).join(
+        Asset, Asset.id == Incident.asset_id
+    ).order_by(RiskTreatmentPlan.id)
+
+    if context_id:
+        incidents_query = incidents_query.filter(Asset.context_id == context_id)
+        plans_query = plans_query.filter(Asset.context_id == context_id)
+
+    def incident_row(incident):
+        values = list(incident)
+        values[4] = format_operational_impact(incident[4])
+        return values
+
+    return [
+        (
+            'Инциденты',
+            ['ID', 'Актив', 'Угроза', 'Уязвимость', 'Операционное воздействие', 'Воздействие на бизнес',
+             'Уровень воздействия', 'Название сценария', 'Вероятность сценария', 'Дата создания'],
+            incidents_query,
+            incident_row
+        ),
+        (
+            'Планы обработки',
+            ['Инцидент', 'ID плана', 'Меры', 'Остаточный риск', 'Ресурсы', 'Сроки',
+             'Ответственные', 'Статус выполнения'],
+            plans_query,
+            list
+        )
+    ]
+
+
+def _risks_sheets(context_id):
+    from app.utils.report_utils import risk_acceptability
+
+    risk_acceptance_criteria = None
+    if context_id:
+        context = Context.query.get(context_id)
+        if context and context.risk_acceptance_criteria:
+            try:
+                risk_acceptance_criteria = json.loads(context.risk_acceptance_criteria)
+            except ValueError:
+                pass
+
+    query = db.session.query(
+        Risk.id, Asset.name, Threat.name, Vulnerability.name, Risk.impact_level,
+        Risk.scenario_probability, Risk.risk_score, Risk.risk_level, Risk.created_at
+    ).join(Incident, Incident.id == Risk.incident_id).join(
+        Asset, Asset.id == Incident.asset_id
+    ).outerjoin(
+        Threat, Threat.id == Incident.threat_id
+    ).outerjoin(
+        Vulnerability, Vulnerability.id == Incident.vulnerability_id
+    ).order_by(Risk.id)
+    if context_id:
+        query = query.filter(Asset.context_id == context_id)
+
+    def row(risk):
+        values = list(risk)
+        values.insert(8, risk_acceptability(risk, risk_acceptance_criteria))
+        return values
+
+    return [(
+        'Риски',
+        ['ID', 'Актив', 'Угроза', 'Уязвимость', 'Уровень последствий', 'Вероятность сценария',
+         'Числовой уровень риска', 'Уровень риска', 'Приемлемый', 'Дата создания'],
+        query,
+        row
+    )]
+
+
+# Листы книги по модулям отчета (те же модули, что и в PDF отчете)
+XLSX_SHEET_BUILDERS = {
+    'assets': _assets_sheets,
+    'threats': _threats_sheets,
+    'vulnerabilities': _vulnerabilities_sheets,
+    'incidents': _incidents_sheets,
+    'risks': _risks_sheets
+}
+
+
+def generate_combined_xlsx_report(context_id, modules, output_path):
+    """
+    Выгрузка реестра рисков в XLSX: лист контекста и листы выбранных модулей.
+
+    Модули обрабатываются в порядке modules, повторы и неизвестные модули
+    пропускаются (как в generate_combined_pdf_report). Книга создается в
+    режиме write-only openpyxl, строки читаются из БД пакетами (yield_per)
+    и сразу записываются в лист, поэтому память не зависит от объема данных.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    sheets = [_context_sheet(context_id)]
+    for module in dict.fromkeys(modules):
+        if module in XLSX_SHEET_BUILDERS:
+            sheets.extend(XLSX_SHEET_BUILDERS[module](context_id))
+
+    workbook = Workbook(write_only=True)
+    header_font = Font(bold=True)
+    rows_written = {}
+    for title, headers, query, make_row in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.freeze_panes = 'A2'
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.font = header_font
+            header_cells.append(cell)
+        sheet.append(header_cells)
+
+        count = 0
+        for row in query.yield_per(XLSX_BATCH_SIZE):
+            sheet.append([_cell_value(value) for value in make_row(row)])
+            count += 1
+        rows_written[title] = count
+
+    workbook.save(output_path)
+    return rows_written
@@ -0,0 +1,251 @@
+import re
+from html import escape
+
+from app import db
+
+# Полнотекстовые индексы (SQLite FTS5) по каталогам.
+# Индексы построены как external content: текст хранится только в исходных
+# таблицах, FTS-таблицы синхронизируются триггерами, поэтому индекс
+# обновляется и при пакетном импорте (bulk_insert_mappings), где события
+# ORM не вызываются.
+# key - целочисленная колонка исходной таблицы, по которой строки связаны с
+# индексом (content_rowid). Неявный rowid для этого не подходит: у таблиц без
+# INTEGER PRIMARY KEY он может измениться (VACUUM, выгрузка и загрузка БД)
+SEARCH_INDEXES = {
+    'threats': {
+        'table': 'threats',
+        'key': 'id',
+        'columns': ['name', 'description']
+    },
+    'vulnerabilities': {
+        'table': 'vulnerabilities',
+        'key': 'search_rowid',
+        'columns': ['name', 'description', 'software_name', 'vendor', 'cve']
+    },
+    'assets': {
+        'table': 'assets',
+        'key': 'id',
+        'columns': ['name', 'description']
+    }
+}
+
+# Ключ индекса для таблиц с текстовым первичным ключом: колонка вне модели,
+# заполняется триггером при вставке (следующий номер после максимального)
+SEARCH_KEY_COLUMN = 'search_rowid'
+
+SEARCH_TOKENIZER = 'unicode61 remove_diacritics 2'
+MAX_SEARCH_RESULTS = 100
+SNIPPET_TOKENS = 24
+
+# Служебные маркеры подсветки: заменяются на <mark> после экранирования HTML
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+def fts_table(entity):
+    return SEARCH_INDEXES[entity]['table'] + '_fts'
+
+
+def is_search_index_supported():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def _search_index_statements(entity):
+    """DDL виртуальной таблицы и триггеров синхронизации для каталога"""
+    config = SEARCH_INDEXES[entity]
+    table = config['table']
+    key = config['key']
+    fts = fts_table(entity)
+    columns = ', '.join(config['columns'])
+    new_values = ', '.join('new.' + column for column in config['columns'])
+    old_values = ', '.join('old.' + column for column in config['columns'])
+
+    if key == SEARCH_KEY_COLUMN:
+        # Ключ назначается в том же триггере, до добавления строки в индекс
+        insert_body = (
+            f"UPDATE {table} SET {key} = (SELECT IFNULL(MAX({key}), 0) + 1 FROM {table}) "
+            f"WHERE rowid = new.rowid AND {key} IS NULL; "
+            f"INSERT INTO {fts}(rowid, {columns}) SELECT {key}, {columns} FROM {table} WHERE rowid = new.rowid;"
+        )
+    else:
+        insert_body = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.{key}, {new_values});"
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{columns}, content='{table}', content_rowid='{key}', tokenize='{SEARCH_TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_body} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.{key}, {old_values}); END",
+        # Только при изменении индексируемых колонок: пересчет ценности
+        # активов и оценки угроз индекс не затрагивают
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.{key}, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.{key}, {new_values}); END"
+    ]
+
+
+def _ensure_search_key(connection, entity):
+    """
+    Колонка ключа индекса для таблицы с текстовым первичным ключом:
+    добавляется в существующую таблицу и заполняется текущими rowid
+    (они уникальны), уникальный индекс нужен для чтения строк по ключу.
+    """
+    config = SEARCH_INDEXES[entity]
+    table = config['table']
+    key = config['key']
+    if key != SEARCH_KEY_COLUMN:
+        return
+    columns = {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+    if key not in columns:
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {key} INTEGER")
+    connection.exec_driver_sql(f"UPDATE {table} SET {key} = rowid WHERE {key} IS NULL")
+    connection.exec_driver_sql(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{table}_{key} ON {table} ({key})")
+
+
+def ensure_search_index():
+    """
+    Создание FTS-индексов и триггеров, если их еще нет. Индекс, созданный
+    для уже заполненной таблицы, сразу перестраивается. Индекс, связанный
+    с таблицей по другой колонке (прежние версии - по неявному rowid),
+    пересоздается вместе с триггерами.
+    Возвращает True, если полнотекстовый поиск доступен.
+    """
+    if not is_search_index_supported():
+        return False
+
+    try:
+        with db.engine.begin() as connection:
+            existing = {
+                name: sql for name, sql in connection.exec_driver_sql(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+            for entity in SEARCH_INDEXES:
+                fts = fts_table(entity)
+                _ensure_search_key(connection, entity)
+                if fts in existing and f"content_rowid='{SEARCH_INDEXES[entity]['key']}'" not in existing[fts]:
+                    for suffix in ('ai', 'ad', 'au'):
+                        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+                    connection.exec_driver_sql(f"DROP TABLE {fts}")
+                    del existing[fts]
+                for statement in _search_index_statements(entity):
+                    connection.exec_driver_sql(statement)
+                if fts not in existing:
+                    connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                    print(f"Создан полнотекстовый индекс {fts}")
+    except Exception as e:
+        print(f"Warning: Could not create full-text search index: {e}")
+        return False
+    return True
+
+
+def rebuild_search_index():
+    """Полная перестройка FTS-индексов по текущему содержимому таблиц"""
+    with db.engine.begin() as connection:
+        for entity in SEARCH_INDEXES:
+            fts = fts_table(entity)
+            connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def build_match_query(text):
+    """
+    Пользовательская строка -> выражение MATCH: каждое слово ищется по
+    префиксу, все слова обязательны. Спецсимволы синтаксиса FTS5 отбрасываются.
+    """
+    tokens = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _render_highlight(value):
+    if value is None:
+        return None
+    return escape(value).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+
+
+def _search_entity(entity, match_query, limit, context_id=None):
+    config = SEARCH_INDEXES[entity]
+    table = config['table']
+    fts = fts_table(entity)
+    # Подсветка по названию, фрагмент - по колонке с лучшим совпадением
+    sql = (
+        f"SELECT {table}.id, "
+        f"highlight({fts}, 0, :hl_start, :hl_end) AS title, "
+        f"snippet({fts}, -1, :hl_start, :hl_end, '…', :snippet_tokens) AS snippet, "
+        f"bm25({fts}) AS rank "
+        f"FROM {fts} JOIN {table} ON {table}.{config['key']} = {fts}.rowid "
+        f"WHERE {fts} MATCH :query"
+    )
+    params = {
+        'hl_start': HIGHLIGHT_START,
+        'hl_end': HIGHLIGHT_END,
+        'snippet_tokens': SNIPPET_TOKENS,
+        'query': match_query,
+        'limit': limit
+    }
+    if entity == 'assets' and context_id:
+        sql += f" AND {table}.context_id = :context_id"
+        params['context_id'] = context_id
+    sql += " ORDER BY rank LIMIT :limit"
+
+    return [
+        {
+            'type': entity,
+            'id': row.id,
+            'title': _render_highlight(row.title),
+            'snippet': _render_highlight(row.snippet),
+            'rank': row.rank
+        }
+        for row in db.session.execute(db.text(sql), params)
+    ]
+
+
+def _search_entity_like(entity, text, limit, context_id=None):
+    """Запасной вариант без FTS5: подстрочный поиск по названию и описанию"""
+    from app.models import Asset, Threat, Vulnerability
+    model = {'threats': Threat, 'vulnerabilities': Vulnerability, 'assets': Asset}[entity]
+    pattern = f'%{text}%'
+    query = model.query.filter(db.or_(model.name.ilike(pattern), model.description.ilike(pattern)))
+    if entity == 'assets' and context_id:
+        query = query.filter(model.context_id == context_id)
+    return [
+        {
+            'type': entity,
+            'id': obj.id,
+            'title': escape(obj.name or ''),
+            'snippet': escape((obj.description or '')[:200]),
+            'rank': 0
+        }
+        for obj in query.order_by(model.id).limit(limit)
+    ]
+
+
+def search_catalogs(text, types=None, limit=20, offset=0, context_id=None):
+    """
+    Поиск по каталогам угроз, уязвимостей и активам.
+
+    Результаты всех каталогов объединяются и сортируются по релевантности
+    (bm25), title и snippet содержат подсветку совпадений тегом <mark>.
+    Возвращает (страница результатов, есть ли следующая страница).
+    """
+    types = [entity for entity in (types or SEARCH_INDEXES) if entity in SEARCH_INDEXES]
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    offset = max(0, offset)
+    # Из каждого каталога достаточно взять offset + limit + 1 лучших записей
+    per_entity = offset + limit + 1
+
+    hits = []
+    if is_search_index_supported():
+        match_query = build_match_query(text)
+        if not match_query:
+            return [], False
+        for entity in types:
+            hits.extend(_search_entity(entity, match_query, per_entity, context_id))
+    else:
+        if not text or not text.strip():
+            return [], False
+        for entity in types:
+            hits.extend(_search_entity_like(entity, text.strip(), per_entity, context_id))
+
+    hits.sort(key=lambda hit: hit['rank'])
+    page = hits[offset:offset + limit]
+    return page, len(hits) > offset + limit
@@ -0,0 +1,100 @@
+import threading
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Incident, Sequence, Vulnerability
+
+# Начальные значения последовательностей: максимальный существующий номер.
+# Запрос выполняется один раз - при создании строки последовательности
+SEQUENCE_SEEDS = {
+    'incidents': lambda: db.select(db.func.max(Incident.id)),
+    'vulnerabilities': lambda: db.select(db.func.max(db.cast(Vulnerability.id, db.Integer)))
+}
+
+# Блоки номеров, выделенные процессу: (URL БД, имя) -> [следующий, последний]
+_blocks = {}
+_blocks_lock = threading.Lock()
+_created_sequences = set()
+
+
+def _ensure_sequence(name):
+    """Создание строки последовательности при первом обращении"""
+    key = (str(db.engine.url), name)
+    if key in _created_sequences:
+        return
+    table = Sequence.__table__
+    with db.engine.begin() as connection:
+        exists = connection.execute(db.select(table.c.name).where(table.c.name == name)).first()
+    if not exists:
+        try:
+            with db.engine.begin() as connection:
+                seed = connection.execute(SEQUENCE_SEEDS[name]()).scalar() if name in SEQUENCE_SEEDS else None
+                connection.execute(table.insert().values(name=name, last_value=seed or 0))
+        except IntegrityError:
+            # Строку параллельно создал другой процесс
+            pass
+    _created_sequences.add(key)
+
+
+def allocate_sequence_block(name, count):
+    """
+    Выделение count последовательных номеров последовательности name.
+
+    Номера выделяются одним UPDATE ... RETURNING в отдельной транзакции,
+    которая фиксируется сразу, независимо от сессии вызывающего кода:
+    параллельные процессы получают непересекающиеся блоки, а откат или сбой
+    после выделения оставляет пропуск в нумерации, но не повтор номеров.
+    Поэтому вызывать до изменений в текущей сессии (SQLite блокирует запись).
+
+    Возвращает первый номер блока.
+    """
+    _ensure_sequence(name)
+    table = Sequence.__table__
+    statement = table.update().where(table.c.name == name).values(last_value=table.c.last_value + count)
+    with db.engine.begin() as connection:
+        if db.engine.dialect.update_returning:
+            last_value = connection.execute(statement.returning(table.c.last_value)).scalar_one()
+        else:
+            # Строка заблокирована UPDATE до конца транзакции
+            connection.execute(statement)
+            last_value = connection.execute(
+                db.select(table.c.last_value).where(table.c.name == name)
+            ).scalar_one()
+    return last_value - count + 1
+
+
+def resync_sequence(name):
+    """
+    Сдвиг последовательности name за максимальный существующий номер
+    (SEQUENCE_SEEDS) - например, после добавления записей с номером, заданным
+    вручную. Последовательность не уменьшается; блок процесса сбрасывается.
+    """
+    _ensure_sequence(name)
+    table = Sequence.__table__
+    with db.engine.begin() as connection:
+        seed = connection.execute(SEQUENCE_SEEDS[name]()).scalar() or 0
+        connection.execute(
+            table.update().where(table.c.name == name, table.c.last_value < seed).values(last_value=seed)
+        )
+    with _blocks_lock:
+        _blocks.pop((str(db.engine.url), name), None)
+
+
+def next_sequence_value(name):
+    """
+    Следующий номер последовательности name. Номера берутся из блока,
+    закэшированного процессом (SEQUENCE_BLOCK_SIZE номеров на одно обращение
+    к БД); номера блока, не выданные до остановки процесса, пропускаются.
+    """
+    key = (str(db.engine.url), name)
+    with _blocks_lock:
+        block = _blocks.get(key)
+        if block is None or block[0] > block[1]:
+            size = max(1, current_app.config.get('SEQUENCE_BLOCK_SIZE', 20))
+            first = allocate_sequence_block(name, size)
+            block = _blocks[key] = [first, first + size - 1]
+        value = block[0]
+        block[0] += 1
+        return value
@@ -0,0 +1,157 @@
+from datetime import date, datetime
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models import Asset, Incident, Risk, Vulnerability
+
+# Ограничение размера страницы при keyset-пагинации
+MAX_PAGE_SIZE = 1000
+
+# Связи, которые Incident.to_dict() разворачивает во вложенные объекты
+INCIDENT_RELATIONS = ('asset', 'threat', 'vulnerability')
+
+
+def cached_to_dict(obj, cache=None, nested=False):
+    """
+    Сериализация связанного объекта с кэшем по идентичности.
+
+    Один и тот же актив, угроза или уязвимость часто встречается во многих
+    инцидентах списка - словарь для него строится один раз на запрос.
+    nested=True передает кэш в to_dict() объекта для его собственных связей.
+    """
+    if obj is None:
+        return None
+    if cache is None:
+        return obj.to_dict()
+    key = (type(obj), obj.id)
+    result = cache.get(key)
+    if result is None:
+        result = cache[key] = obj.to_dict(cache=cache) if nested else obj.to_dict()
+    return result
+
+
+def related_to_dict(obj, relation, cache=None, fields=None, nested=False):
+    """Вложенный объект связи; если связь не запрошена в fields, она не загружается"""
+    if fields is not None and relation not in fields:
+        return None
+    return cached_to_dict(getattr(obj, relation), cache, nested)
+
+
+def project_fields(data, fields=None):
+    """Оставляет в словаре только запрошенные поля (fields=None - все поля)"""
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
+
+
+def parse_fields(value):
+    """
+    Разбор параметра fields=id,name,... Поле id включается всегда, так как
+    по нему строится курсор пагинации.
+    """
+    if not value:
+        return None
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    fields.add('id')
+    return fields
+
+
+def paginate_by_id(query, id_column, after_id=None, limit=None):
+    """
+    Keyset-пагинация по возрастанию id (целочисленного или строкового).
+
+    Возвращает (объекты, курсор следующей страницы или None). Без limit
+    возвращаются все строки после after_id.
+    """
+    query = query.order_by(id_column)
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    if not limit:
+        return query.all(), None
+
+    limit = min(limit, MAX_PAGE_SIZE)
+    items = query.limit(limit + 1).all()
+    if len(items) > limit:
+        items = items[:limit]
+        return items, items[-1].id
+    return items, None
+
+
+def incident_load_options(path=None, fields=None):
+    """
+    Опции загрузки связей, которые использует Incident.to_dict().
+
+    path - путь к инциденту от корневой сущности запроса (например,
+    selectinload(Risk.incident)). Угрозы и уязвимости общие для многих
+    инцидентов, поэтому догружаются отдельными запросами по IN, а не JOIN.
+    Загружаются только связи, запрошенные в fields.
+    """
+    def chain(attribute):
+        return path.selectinload(attribute) if path is not None else selectinload(attribute)
+
+    options = []
+    for relation in INCIDENT_RELATIONS:
+        if fields is not None and relation not in fields:
+            continue
+        option = chain(getattr(Incident, relation))
+        if relation == 'asset':
+            option = option.joinedload(Asset.context)
+        options.append(option)
+    return options
+
+
+def serialize_incidents(query, fields=None, after_id=None, limit=None):
+    """
+    Страница инцидентов для API за фиксированное число запросов (не более 4).
+
+    Возвращает (список словарей, курсор следующей страницы).
+    """
+    incidents, next_cursor = paginate_by_id(
+        query.options(*incident_load_options(fields=fields)), Incident.id, after_id, limit
+    )
+    cache = {}
+    return [incident.to_dict(cache=cache, fields=fields) for incident in incidents], next_cursor
+
+
+def serialize_risks(query, fields=None, after_id=None, limit=None):
+    """
+    Страница рисков для API за фиксированное число запросов (не более 5).
+
+    Возвращает (список словарей, курсор следующей страницы).
+    """
+    if fields is None or 'incident' in fields:
+        query = query.options(*incident_load_options(selectinload(Risk.incident)))
+    risks, next_cursor = paginate_by_id(query, Risk.id, after_id, limit)
+    cache = {}
+    return [risk.to_dict(cache=cache, fields=fields) for risk in risks], next_cursor
+
+
+def serialize_columns(query, model, fields, after_id=None, limit=None):
+    """
+    Страница записей с выборкой только запрошенных колонок (без загрузки
+    длинных текстовых полей). Даты приводятся к ISO, как в to_dict().
+
+    Возвращает (список словарей, курсор следующей страницы).
+    """
+    columns = [getattr(model, column.name) for column in model.__table__.columns if column.name in fields]
+    rows, next_cursor = paginate_by_id(query.with_entities(*columns), model.id, after_id, limit)
+    names = [column.key for column in columns]
+    result = []
+    for row in rows:
+        item = {}
+        for name, value in zip(names, row):
+            item[name] = value.isoformat() if isinstance(value, (date, datetime)) else value
+        result.append(item)
+    return result, next_cursor
+
+
+def serialize_vulnerabilities(query, fields=None, after_id=None, limit=None):
+    """
+    Страница каталога уязвимостей одним запросом.
+
+    Возвращает (список словарей, курсор следующей страницы).
+    """
+    if fields is not None:
+        return serialize_columns(query, Vulnerability, fields, after_id, limit)
+    vulnerabilities, next_cursor = paginate_by_id(query, Vulnerability.id, after_id, limit)
+    return [vulnerability.to_dict() for vulnerability in vulnerabilities], next_cursor
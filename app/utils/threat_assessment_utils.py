@@ -0,0 +1,86 @@
+import time
+
+from app import db
+from app.models import ThreatAssessment
+from app.utils.db_utils import dialect_insert
+
+# Оценки записываются пакетами по THREAT_ASSESSMENT_BATCH_SIZE строк
+THREAT_ASSESSMENT_BATCH_SIZE = 1000
+
+# Колонки уникального ограничения (threat_id, asset_id)
+THREAT_ASSESSMENT_KEY_COLUMNS = ['threat_id', 'asset_id']
+
+
+def _save_batch_orm(rows):
+    """Запись пакета без ON CONFLICT: существующие оценки загружаются одним запросом"""
+    existing = {
+        (assessment.threat_id, assessment.asset_id): assessment
+        for assessment in ThreatAssessment.query.filter(
+            ThreatAssessment.asset_id.in_({row['asset_id'] for row in rows}),
+            ThreatAssessment.threat_id.in_({row['threat_id'] for row in rows})
+        )
+    }
+    for row in rows:
+        assessment = existing.get((row['threat_id'], row['asset_id']))
+        if assessment is None:
+            db.session.add(ThreatAssessment(**row))
+        else:
+            assessment.score = row['score']
+            assessment.assessment = row['assessment']
+    db.session.flush()
+
+
+def save_threat_assessments(items, batch_size=THREAT_ASSESSMENT_BATCH_SIZE):
+    """
+    Сохранение оценок вероятности реализации угроз для активов.
+
+    Каждый пакет записывается одним INSERT ... ON CONFLICT (threat_id, asset_id)
+    DO UPDATE (executemany): новые оценки добавляются, у существующих
+    обновляются баллы и оценка. Повторы пары актив-угроза во входных данных
+    схлопываются (действует последняя). Все пакеты фиксируются одной транзакцией.
+
+    Возвращает статистику: count, elapsed и время каждого пакета (batches).
+    """
+    started_at = time.perf_counter()
+    rows = {}
+    for item in items:
+        rows[(item['threat_id'], item['asset_id'])] = {
+            'threat_id': item['threat_id'],
+            'asset_id': item['asset_id'],
+            'score': item['score'],
+            'assessment': item.get('level', '')
+        }
+    rows = list(rows.values())
+
+    insert = dialect_insert()
+    statement = None
+    if insert is not None:
+        statement = insert(ThreatAssessment.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=THREAT_ASSESSMENT_KEY_COLUMNS,
+            set_={'score': statement.excluded.score, 'assessment': statement.excluded.assessment}
+        )
+
+    batches = []
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            batch_started_at = time.perf_counter()
+            if statement is not None:
+                db.session.execute(statement, batch)
+            else:
+                _save_batch_orm(batch)
+            batches.append({
+                'rows': len(batch),
+                'elapsed': round(time.perf_counter() - batch_started_at, 3)
+            })
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'count': len(rows),
+        'batches': batches,
+        'elapsed': round(time.perf_counter() - started_at, 3)
+    }
@@ -0,0 +1,135 @@
+"""
+Перенос текста в ячейках таблиц отчета: до и после кэширования.
+
+Строится таблица из --rows строк, похожая на реестр инцидентов: длинные
+повторяющиеся названия угроз и уязвимостей, короткие уровни ('Н', 'С',
+'В'), отметки '+'/'-' и уникальные номера. Сравниваются три варианта
+подготовки ячеек:
+  before   - прежний перенос по числу символов без кэша и отдельный
+             Paragraph для каждой ячейки
+  after    - create_table_data_with_wrapping: перенос по ширине колонки с
+             кэшем _wrap_lines и общие Paragraph коротких ячеек (_shared_cell)
+  register - create_register_table: строки с переносами без Paragraph
+             (_plain_cell_text)
+
+Для каждого варианта выводится медиана времени подготовки ячеек (cells)
+и сборки PDF из одной LongTable (build). Кэши переноса очищаются перед
+каждым запуском. БД не используется.
+
+Запуск из корня репозитория:
+    python benchmarks/report_cell_wrapping.py [--rows 5000] [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LEVELS = ['Н', 'С', 'В']
+
+
+def legacy_wrap_text(text, max_length=30):
+    """Перенос текста ячейки в том виде, в котором он был до кэширования"""
+    if not isinstance(text, str) or len(text) <= max_length:
+        return text
+
+    words = text.split()
+    lines = []
+    current_line = ""
+
+    for word in words:
+        if len(current_line + " " + word) <= max_length:
+            current_line += " " + word if current_line else word
+        else:
+            if current_line:
+                lines.append(current_line)
+            current_line = word
+
+    if current_line:
+        lines.append(current_line)
+
+    return "<br/>".join(lines)
+
+
+def sample_rows(row_count):
+    threats = [f'Угроза {i}: несанкционированный доступ к информации ' + 'в системе ' * (i % 4) for i in range(40)]
+    vulnerabilities = [f'Уязвимость {i} программного обеспечения веб-сервера' for i in range(60)]
+    return [
+        [
+            str(i + 1),
+            f'Актив {i % 50}',
+            threats[i % len(threats)],
+            vulnerabilities[i % len(vulnerabilities)],
+            LEVELS[i % 3],
+            '+' if i % 2 else '-',
+            f'СИ{i + 1} ({i % 5 + 1})'
+        ]
+        for i in range(row_count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate
+    from app.utils import report_utils
+    from app.utils.report_utils import (
+        PAGE_WIDTH, create_cyrillic_style_sheet, create_register_table, create_table_data_with_wrapping,
+        create_table_style
+    )
+
+    titles = ['ID', 'Актив', 'Угроза', 'Уязвимость', 'Уровень', 'К', 'Сценарий']
+    col_widths = [0.4 * inch, 0.9 * inch, 1.8 * inch, 1.6 * inch, 0.5 * inch, 0.3 * inch, 1.0 * inch]
+    assert abs(sum(col_widths) - PAGE_WIDTH) < 1
+    columns = list(zip(titles, col_widths))
+    rows = sample_rows(args.rows)
+
+    def before(styles):
+        data = [titles] + rows
+        return LongTable(
+            [[Paragraph(legacy_wrap_text(cell), styles['Table']) for cell in row] for row in data],
+            colWidths=col_widths, repeatRows=1
+        )
+
+    def after(styles):
+        data = create_table_data_with_wrapping(
+            [titles] + rows, styles, col_widths=col_widths, cell_padding=report_utils.TABLE_CELL_PADDING
+        )
+        return LongTable(data, colWidths=col_widths, repeatRows=1)
+
+    def register(styles):
+        return create_register_table(columns, rows, styles)
+
+    print(f"строк: {args.rows}")
+    for name, make_table in [('before', before), ('after', after), ('register', register)]:
+        cells_timings, build_timings = [], []
+        for _ in range(args.runs):
+            report_utils._wrap_lines.cache_clear()
+            report_utils._plain_cell_text.cache_clear()
+            styles = create_cyrillic_style_sheet()
+
+            started_at = time.perf_counter()
+            table = make_table(styles)
+            table.setStyle(create_table_style())
+            cells_timings.append(time.perf_counter() - started_at)
+
+            started_at = time.perf_counter()
+            doc = SimpleDocTemplate(BytesIO(), pagesize=A4, leftMargin=0.5 * inch, rightMargin=0.5 * inch)
+            doc.build([table])
+            build_timings.append(time.perf_counter() - started_at)
+
+        print(f"{name:8s}  cells {statistics.median(cells_timings):6.2f} с  "
+              f"build {statistics.median(build_timings):6.2f} с")
+
+
+if __name__ == '__main__':
+    main()
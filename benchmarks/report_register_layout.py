@@ -0,0 +1,115 @@
+"""
+Раскладка разделов "Инциденты" и "Риски": подробный вид против реестра.
+
+Для каждого числа инцидентов создается временная БД с тестовыми данными
+(активы, угрозы, уязвимости, инциденты и риски по одному на инцидент), затем
+сводный PDF-отчет формируется дважды:
+  detailed - подробный вид (порог REPORT_REGISTER_THRESHOLD выше числа записей)
+  register - реестровый вид (порог 0)
+
+Выводится медиана времени формирования, размер PDF и число страниц.
+Рабочая БД не затрагивается.
+
+Запуск из корня репозитория:
+    python benchmarks/report_register_layout.py [--incidents 100 300 1000] [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LAYOUTS = {
+    'detailed': None,
+    'register': 0
+}
+
+LEVELS = ['низкий', 'средний', 'высокий']
+
+
+def seed(db, incident_count, asset_count=20, threat_count=15, vulnerability_count=40):
+    """Тестовые данные для разделов инцидентов и рисков; возвращает id контекста"""
+    from app.models import Asset, Context, Incident, Risk, Threat, Vulnerability
+
+    context = Context(
+        name='Объект оценки',
+        risk_acceptance_criteria=json.dumps({'low': 'приемлемый', 'medium': 'приемлемый', 'high': 'неприемлемый'})
+    )
+    db.session.add(context)
+    db.session.flush()
+
+    assets = [
+        Asset(context_id=context.id, name=f'Актив {i}', type=['information', 'software', 'hardware'][i % 3])
+        for i in range(asset_count)
+    ]
+    threats = [
+        Threat(bdu_id=i + 1, name=f'Угроза {i} ' + 'текст ' * 10, is_relevant=True,
+               step5=json.dumps({'info_conf': True}))
+        for i in range(threat_count)
+    ]
+    vulnerabilities = [
+        Vulnerability(id=f'BDU:2024-{i:05d}', name=f'Уязвимость {i}', level='Высокий')
+        for i in range(vulnerability_count)
+    ]
+    db.session.add_all(assets + threats + vulnerabilities)
+    db.session.flush()
+
+    # Тройки актив-угроза-уязвимость уникальны (ограничение incidents)
+    for i in range(incident_count):
+        incident = Incident(
+            asset_id=assets[i % asset_count].id,
+            threat_id=threats[i // asset_count % threat_count].id,
+            vulnerability_id=vulnerabilities[i // (asset_count * threat_count) % vulnerability_count].id,
+            operational_impact=json.dumps(['confidentiality', 'availability']),
+            business_impact='Финансовые потери, простой процессов',
+            impact_level=LEVELS[i % 3],
+            scenario_name=f'СИ{i + 1}',
+            scenario_probability=i % 5 + 1
+        )
+        db.session.add(incident)
+        db.session.flush()
+        db.session.add(Risk(
+            incident_id=incident.id, likelihood='средняя', impact_level=LEVELS[i % 3],
+            vulnerability_level='С', scenario_probability=i % 5 + 1, risk_score=i % 5 + 1,
+            risk_level=LEVELS[i % 3], acceptable=i % 2 == 0
+        ))
+    db.session.commit()
+    return context.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--incidents', type=int, nargs='+', default=[100, 300, 1000])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    # Конфигурация читает DATABASE_URL при импорте
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'report_layout.db')
+    from app import create_app, db
+    from app.utils.report_utils import generate_combined_pdf_report
+
+    app = create_app()
+    with app.app_context():
+        for incident_count in args.incidents:
+            db.drop_all()
+            db.create_all()
+            context_id = seed(db, incident_count)
+
+            for layout, threshold in LAYOUTS.items():
+                app.config['REPORT_REGISTER_THRESHOLD'] = incident_count if threshold is None else threshold
+                timings = []
+                for _ in range(args.runs):
+                    started_at = time.perf_counter()
+                    pdf = generate_combined_pdf_report(context_id, ['incidents', 'risks']).getvalue()
+                    timings.append(time.perf_counter() - started_at)
+                print(f"{incident_count:6d} инцидентов  {layout:8s}  {statistics.median(timings):7.2f} с  "
+                      f"{len(pdf) / 1024:8.0f} КБ  {pdf.count(b'/Type /Page') - pdf.count(b'/Type /Pages'):5d} стр.")
+
+
+if __name__ == '__main__':
+    main()
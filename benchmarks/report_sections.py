@@ -0,0 +1,162 @@
+"""
+Параллельная выборка данных разделов сводного отчета.
+
+Во временной БД создаются тестовые данные для всех пяти модулей отчета
+(активы с зависимостями и оценками, угрозы, уязвимости, инциденты и риски).
+Для каждого числа потоков REPORT_SECTION_WORKERS измеряется:
+  load   - выборка данных и построение элементов всех разделов
+           (gather_report_sections, без сборки PDF)
+  report - формирование PDF целиком (generate_combined_pdf_report)
+
+workers = 1 - последовательная выборка в вызывающем потоке (как до пула).
+Выигрыш от пула зависит от числа ядер и задержек БД: на одном ядре с
+SQLite в локальном файле ожидать ускорения не следует.
+Выводится медиана времени по --runs запускам. Рабочая БД не затрагивается.
+
+Запуск из корня репозитория:
+    python benchmarks/report_sections.py [--scale 1 3] [--workers 1 5] [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODULES = ['assets', 'threats', 'vulnerabilities', 'incidents', 'risks']
+VALUES = ['Н', 'С', 'В']
+LEVELS = ['низкий', 'средний', 'высокий']
+RATINGS = ['низкая', 'средняя', 'высокая']
+PROPERTIES = ['confidentiality', 'integrity', 'availability']
+
+
+def seed(db, scale):
+    """Тестовые данные для всех разделов отчета; возвращает id контекста"""
+    from app.models import (
+        Asset, AssetDependency, AssetSecurityPropertyImpact, AssetThreat, AssetValueResult,
+        AssetVulnerability, Context, ImpactCriterion, Incident, Risk, Threat, ThreatAssessment,
+        Vulnerability, VulnerabilityAssessment
+    )
+
+    asset_count, threat_count, vulnerability_count, incident_count = 20 * scale, 15 * scale, 40 * scale, 60 * scale
+    context = Context(
+        name='Объект оценки',
+        selected_impact_criteria=json.dumps(['Финансовые потери']),
+        damage_scales=json.dumps({'Финансовые потери': {'minimal': '1', 'medium': '2', 'high': '3'}}),
+        risk_acceptance_criteria=json.dumps({'low': 'приемлемый', 'medium': 'приемлемый', 'high': 'неприемлемый'}),
+        asset_cost_scale=json.dumps({'low_value': 10, 'medium_value': 100, 'high_value': 1000})
+    )
+    criterion = ImpactCriterion(name='Финансовые потери')
+    db.session.add_all([context, criterion])
+    db.session.flush()
+
+    assets = [
+        Asset(context_id=context.id, name=f'Актив {i}', type=['information', 'software', 'hardware'][i % 3],
+              properties=json.dumps({'confidentiality': i % 2 == 0, 'integrity': True, 'availability': i % 3 == 0}),
+              value_without_dependencies=VALUES[i % 3], final_value=VALUES[i % 3],
+              asset_cost=i * 10.0, asset_cost_rating=RATINGS[i % 3], dependency_value=RATINGS[i % 3])
+        for i in range(asset_count)
+    ]
+    threats = [
+        Threat(bdu_id=i + 1, name=f'Угроза {i} ' + 'текст ' * 20, description='Описание ' * (i % 10 + 1),
+               is_relevant=i % 4 != 0, source='Внешний нарушитель', target_object='Сервер', likelihood='средняя',
+               step5=json.dumps({'info_conf': True, 'hw_av': True}),
+               source_assessment=json.dumps({'assessment': 'С', 'scores': {'motivation': 1, 'qualification': 2}}),
+               probability_assessment=json.dumps({'assessment': 'В', 'scores': {'duration': 1}}))
+        for i in range(threat_count)
+    ]
+    vulnerabilities = [
+        Vulnerability(id=f'BDU:2024-{i:05d}', name=f'Уязвимость {i}',
+                      description='Описание уязвимости ' * (i % 7 + 1), level='Высокий')
+        for i in range(vulnerability_count)
+    ]
+    db.session.add_all(assets + threats + vulnerabilities)
+    db.session.flush()
+
+    for i in range(1, asset_count):
+        asset = assets[i]
+        db.session.add(AssetDependency(asset_id=asset.id, depends_on_asset_id=assets[i - 1].id))
+        db.session.add(AssetValueResult(asset_id=asset.id, type=asset.type, value_without_dependencies='Н',
+                                        value_with_dependencies='С', final_value='В'))
+        for security_property in PROPERTIES:
+            db.session.add(AssetSecurityPropertyImpact(asset_id=asset.id, security_property=security_property,
+                                                       impact_criterion_id=criterion.id, impact_value=VALUES[i % 3]))
+    for i, asset in enumerate(assets):
+        for threat in threats[i % 5::5]:
+            db.session.add(AssetThreat(asset_id=asset.id, threat_id=threat.id))
+            db.session.add(ThreatAssessment(asset_id=asset.id, threat_id=threat.id, cia_values='К,Ц',
+                                            features_count=3, score=0.5 + i % 5 / 10, assessment='С'))
+        for vulnerability in vulnerabilities[i % 4::8]:
+            db.session.add(AssetVulnerability(asset_id=asset.id, vulnerability_id=vulnerability.id, level='средний',
+                                              assessment='С', scale_json='[]'))
+            db.session.add(VulnerabilityAssessment(asset_id=asset.id, vulnerability_id=vulnerability.id,
+                                                   assessment_level=VALUES[i % 3]))
+
+    for i in range(incident_count):
+        incident = Incident(
+            asset_id=assets[i % asset_count].id,
+            threat_id=threats[i % threat_count].id,
+            vulnerability_id=vulnerabilities[i % vulnerability_count].id,
+            operational_impact=json.dumps(['confidentiality', 'availability']),
+            business_impact='Финансовые потери, простой процессов',
+            impact_level=LEVELS[i % 3],
+            scenario_name=f'СИ{i + 1}',
+            scenario_probability=i % 5 + 1
+        )
+        db.session.add(incident)
+        db.session.flush()
+        db.session.add(Risk(
+            incident_id=incident.id, likelihood='средняя', impact_level=LEVELS[i % 3],
+            vulnerability_level='С', scenario_probability=i % 5 + 1, risk_score=i % 5 + 1,
+            risk_level=LEVELS[i % 3], acceptable=i % 2 == 0
+        ))
+    db.session.commit()
+    return context.id
+
+
+def median_time(func, runs):
+    timings = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 3])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 5])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    # Конфигурация читает DATABASE_URL при импорте
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'report_sections.db')
+    from app import create_app, db
+    from app.utils.report_utils import (
+        create_cyrillic_style_sheet, gather_report_sections, generate_combined_pdf_report
+    )
+
+    print(f"ядер: {os.cpu_count()}")
+    app = create_app()
+    with app.app_context():
+        for scale in args.scale:
+            db.drop_all()
+            db.create_all()
+            context_id = seed(db, scale)
+
+            for workers in args.workers:
+                app.config['REPORT_SECTION_WORKERS'] = workers
+                load = median_time(
+                    lambda: gather_report_sections(context_id, MODULES, create_cyrillic_style_sheet()), args.runs
+                )
+                report = median_time(lambda: generate_combined_pdf_report(context_id, MODULES), args.runs)
+                print(f"масштаб {scale}  потоков {workers}  load {load:6.2f} с  report {report:6.2f} с")
+
+
+if __name__ == '__main__':
+    main()
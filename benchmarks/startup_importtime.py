@@ -0,0 +1,83 @@
+"""
+Время запуска воркера: разбор `python -X importtime` для create_app().
+
+Сравниваются два сценария:
+  lazy  - обычный запуск (pandas, reportlab и шрифты загружаются при первом использовании)
+  eager - запуск с принудительной загрузкой модулей отчетов и импорта и
+          регистрацией шрифтов, как это происходило до отложенной загрузки
+
+Время импорта суммируется по пакетам верхнего уровня (собственное время
+модулей). Приложение создается на временной БД, рабочая БД не затрагивается.
+
+Запуск из корня репозитория:
+    python benchmarks/startup_importtime.py [--runs 5] [--top 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'lazy': 'from app import create_app\ncreate_app()',
+    'eager': (
+        'from app import create_app\ncreate_app()\n'
+        'import pandas, openpyxl\n'
+        'import app.utils.import_utils, app.utils.report_utils\n'
+        'from app.utils.report_utils import get_cyrillic_font\n'
+        'get_cyrillic_font()'
+    )
+}
+
+HEAVY_MODULES = ['pandas', 'reportlab', 'openpyxl']
+
+
+def run_importtime(statement, database_url):
+    """Запуск интерпретатора с -X importtime; возвращает {пакет: мкс} и время процесса"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    started_at = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    wall_time = time.perf_counter() - started_at
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_time)
+    return packages, wall_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'startup.db')
+    for scenario, statement in SCENARIOS.items():
+        wall_times, import_totals = [], []
+        packages = {}
+        for _ in range(args.runs):
+            packages, wall_time = run_importtime(statement, database_url)
+            wall_times.append(wall_time)
+            import_totals.append(sum(packages.values()) / 1e6)
+
+        loaded = [name for name in HEAVY_MODULES if name in packages]
+        print(f"== {scenario}: импорт {statistics.median(import_totals):.3f} с, "
+              f"процесс {statistics.median(wall_times):.3f} с (медиана из {args.runs})")
+        print(f"   тяжелые библиотеки: {', '.join(loaded) or 'не загружены'}")
+        for name, self_time in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"   {self_time / 1000:9.1f} мс  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,10 @@ from app import create_app
 from app import db
 from app.models import ImpactCriterion
 from app.utils.import_utils import load_default_threats_and_vulnerabilities
+from app.utils.search_utils import ensure_search_index
+from app.utils.report_jobs import resume_report_jobs
+from app.utils.report_cache import ensure_data_version_triggers
+from app.utils.incident_utils import merge_duplicate_incidents
 
 # Default impact criteria
 DEFAULT_IMPACT_CRITERIA = [
@@ -34,15 +38,34 @@ def create_default_impact_criteria():
     return added_count
 
 
+def create_missing_indexes():
+    """
+    Создание индексов, объявленных в моделях после создания таблиц
+    (db.create_all не добавляет индексы в уже существующие таблицы)
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
 def create_app_with_db():
     app = create_app()
     
     with app.app_context():
         db.create_all()
+        # Дубликаты инцидентов мешают созданию уникального индекса
+        merge_duplicate_incidents()
+        create_missing_indexes()
+        # Полнотекстовый индекс создается до импорта, чтобы триггеры его заполнили
+        ensure_search_index()
+        # Счетчики версий данных для кэша отчетов
+        ensure_data_version_triggers()
         # Загружаем угрозы и уязвимости из файлов при запуске
         load_default_threats_and_vulnerabilities()
         # Создаем дефолтные критерии влияния
         create_default_impact_criteria()
+        # Незавершенные задачи формирования отчетов
+        resume_report_jobs(app)
     
     return app
 
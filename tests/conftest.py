@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+# Config читает DATABASE_URL при импорте приложения, поэтому временная БД
+# задается до импорта app
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+
+from app import create_app, db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    from app.utils import dependency_graph
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        # БД пересоздается для каждого теста, версии графа зависимостей - тоже
+        dependency_graph._graphs.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Число SQL-запросов, выполненных func(*args, **kwargs). Сессия перед
+    вызовом очищается, чтобы объекты не брались из identity map.
+    """
+    def count(func, *args, **kwargs):
+        statements = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        db.session.expunge_all()
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            func(*args, **kwargs)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return len(statements)
+
+    return count
@@ -0,0 +1,59 @@
+from app import db
+from app.models import Asset
+
+from tests.test_dependency_utils import create_assets
+
+
+def bulk_update(client, edges):
+    return client.post('/api/asset-dependencies/bulk-update', json={'dependencies': [
+        {'asset_id': asset_id, 'depends_on_asset_id': depends_on_asset_id}
+        for asset_id, depends_on_asset_id in edges
+    ]}).get_json()
+
+
+def asset_values(asset_id):
+    asset = db.session.get(Asset, asset_id)
+    db.session.refresh(asset)
+    return asset.dependency_value, asset.final_value
+
+
+def test_bulk_update_lowers_values_after_edge_removal(app, client):
+    _, (application, workstation, database) = create_assets('С', 'Н', 'В')
+
+    result = bulk_update(client, [(application, database), (workstation, application)])
+    assert result['added'] == 2
+    assert asset_values(application) == ('высокая', 'С')
+    assert asset_values(workstation) == ('высокая', 'Н')
+
+    result = bulk_update(client, [])
+    assert result['removed'] == 2
+    assert sorted(result['changed_assets']) == sorted([application, workstation])
+    assert asset_values(application) == (None, 'С')
+    assert asset_values(workstation) == (None, 'Н')
+
+
+def test_graph_endpoints_with_cycle(app, client):
+    context_id, (application, server, storage, workstation) = create_assets('С', 'Н', 'В', 'Н')
+    bulk_update(client, [
+        (application, server), (server, storage), (storage, server), (workstation, application)
+    ])
+    graph_url = f'/api/asset-dependencies/graph/{context_id}'
+
+    summary = client.get(graph_url).get_json()
+    assert (summary['assets'], summary['edges'], summary['cycles']) == (4, 4, 1)
+    assert client.get(f'{graph_url}/cycles').get_json() == [sorted([server, storage])]
+
+    dependents = client.get(f'{graph_url}/dependents/{storage}').get_json()['dependents']
+    assert dependents == sorted([application, server, storage, workstation])
+    direct = client.get(f'{graph_url}/dependents/{storage}?direct=true').get_json()['dependents']
+    assert direct == [server]
+    dependencies = client.get(f'{graph_url}/dependencies/{workstation}').get_json()['dependencies']
+    assert dependencies == sorted([application, server, storage])
+
+    order = client.get(f'{graph_url}/topological-order').get_json()
+    assert sorted(order[:2]) == sorted([server, storage])
+    assert order[2:] == [application, workstation]
+
+    # Цикл: ценность распространяется по всей компоненте и на зависящие активы
+    assert asset_values(server) == ('высокая', 'Н')
+    assert asset_values(workstation) == ('высокая', 'Н')
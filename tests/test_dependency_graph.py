@@ -0,0 +1,54 @@
+from app import db
+from app.models import AssetDependency, Sequence
+from app.utils.dependency_graph import GRAPH_VERSION_SEQUENCE, get_dependency_graph
+
+from tests.test_dependency_utils import create_assets
+
+
+def graph_version():
+    return db.session.query(Sequence.last_value).filter(Sequence.name == GRAPH_VERSION_SEQUENCE).scalar()
+
+
+def test_graph_is_cached_until_data_changes(app):
+    context_id, (server, database) = create_assets('Н', 'В')
+    graph = get_dependency_graph(context_id)
+    assert get_dependency_graph(context_id) is graph
+
+    db.session.add(AssetDependency(asset_id=server, depends_on_asset_id=database))
+    db.session.commit()
+
+    rebuilt = get_dependency_graph(context_id)
+    assert rebuilt is not graph
+    assert rebuilt.direct_dependencies(server) == [database]
+
+
+def test_uncommitted_changes_do_not_touch_cache(app):
+    context_id, (server, database) = create_assets('Н', 'В')
+    graph = get_dependency_graph(context_id)
+    version = graph_version()
+
+    db.session.add(AssetDependency(asset_id=server, depends_on_asset_id=database))
+    db.session.flush()
+    # Своя транзакция видит новое ребро, но такой граф не кэшируется
+    assert get_dependency_graph(context_id).direct_dependencies(server) == [database]
+
+    db.session.rollback()
+    assert graph_version() == version
+    assert get_dependency_graph(context_id) is graph
+
+
+def test_change_committed_by_another_process_rebuilds_graph(app):
+    context_id, (server, database) = create_assets('Н', 'В')
+    graph = get_dependency_graph(context_id)
+
+    # Другой процесс: отдельное соединение, кэш этого процесса не трогается
+    table = Sequence.__table__
+    with db.engine.begin() as connection:
+        connection.execute(AssetDependency.__table__.insert().values(asset_id=server, depends_on_asset_id=database))
+        connection.execute(
+            table.update().where(table.c.name == GRAPH_VERSION_SEQUENCE).values(last_value=table.c.last_value + 1)
+        )
+
+    rebuilt = get_dependency_graph(context_id)
+    assert rebuilt is not graph
+    assert rebuilt.direct_dependencies(server) == [database]
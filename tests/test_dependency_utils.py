@@ -0,0 +1,46 @@
+from app import db
+from app.models import Asset, AssetDependency, Context
+from app.utils.dependency_utils import recalculate_dependency_values
+
+
+def create_assets(*values):
+    """Контекст и активы с заданной собственной (и итоговой) ценностью"""
+    context = Context(name='Объект оценки')
+    db.session.add(context)
+    db.session.flush()
+    assets = [
+        Asset(context_id=context.id, name=f'Актив {i}', type='information',
+              value_without_dependencies=value, final_value=value)
+        for i, value in enumerate(values)
+    ]
+    db.session.add_all(assets)
+    db.session.commit()
+    return context.id, [asset.id for asset in assets]
+
+
+def test_raise_only_raises_dependency_and_final_value(app):
+    context_id, (server, database) = create_assets('Н', 'В')
+    db.session.add(AssetDependency(asset_id=server, depends_on_asset_id=database))
+    db.session.commit()
+
+    assert recalculate_dependency_values(context_id, raise_only=True) == [server]
+
+    asset = db.session.get(Asset, server)
+    assert asset.dependency_value == 'высокая'
+    assert asset.final_value == 'В'
+
+
+def test_full_recalculation_lowers_dependency_value_and_keeps_final_value(app):
+    context_id, (server, database) = create_assets('С', 'В')
+    dependency = AssetDependency(asset_id=server, depends_on_asset_id=database)
+    db.session.add(dependency)
+    db.session.commit()
+    recalculate_dependency_values(context_id)
+
+    db.session.delete(dependency)
+    db.session.commit()
+    assert recalculate_dependency_values(context_id, changed_asset_ids=[server]) == [server]
+
+    asset = db.session.get(Asset, server)
+    assert asset.dependency_value is None
+    assert asset.final_value == 'С'
@@ -0,0 +1,120 @@
+import json
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import (
+    Asset, AssetDependency, AssetSecurityPropertyImpact, AssetVulnerability, Context, ImpactCriterion,
+    Incident, Report, ReportCacheEntry, ReportJob, Risk, RiskTreatmentPlan, Threat, ThreatAssessment,
+    Vulnerability
+)
+from app.utils.report_cache import (
+    REPORT_COMMON_TABLES, REPORT_MODULE_TABLES, ensure_data_version_triggers, evict_report_cache,
+    report_cache_key
+)
+
+
+def seed_report_data():
+    """Контекст, в котором каждый раздел отчета выбирает все свои данные"""
+    context = Context(name='Объект', risk_acceptance_criteria=json.dumps({'low': 'приемлемый'}))
+    first = Asset(name='Сервер', type='hardware', context=context, properties=json.dumps({'integrity': True}))
+    second = Asset(name='База данных', type='information', context=context)
+    criterion = ImpactCriterion(name='Финансовые потери')
+    threat = Threat(name='Угроза', is_relevant=True, step5=json.dumps({'info_int': True}))
+    vulnerability = Vulnerability(id='V1', name='Уязвимость')
+    incident = Incident(asset=first, threat=threat, vulnerability=vulnerability, scenario_name='СИ1')
+    plan = RiskTreatmentPlan(incident=incident, risk_treatment_measures='Резервирование')
+    db.session.add_all([
+        context, first, second, criterion, threat, vulnerability, incident, plan,
+        AssetDependency(asset=first, depends_on_asset=second),
+        AssetSecurityPropertyImpact(asset=first, security_property='integrity', impact_criterion=criterion, impact_value='В'),
+        ThreatAssessment(asset_id=1, threat_id=1, score=0.5, assessment='С'),
+        AssetVulnerability(asset=first, vulnerability_id='V1', assessment='С', scale_json='[]'),
+        Risk(incident=incident, risk_score=3, risk_level='средний')
+    ])
+    db.session.commit()
+    return context, plan
+
+
+@pytest.mark.parametrize('module', sorted(REPORT_MODULE_TABLES))
+def test_section_reads_only_tracked_tables(app, module):
+    from app.utils.report_utils import SECTION_LOADERS
+
+    context_id = seed_report_data()[0].id
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.session.expunge_all()
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        SECTION_LOADERS[module](context_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    read_tables = set()
+    for statement in statements:
+        read_tables.update(re.findall(r'\b(?:FROM|JOIN)\s+(\w+)', statement))
+    assert read_tables <= set(REPORT_MODULE_TABLES[module]) | set(REPORT_COMMON_TABLES)
+
+
+@pytest.mark.parametrize('module', ['incidents', 'risks'])
+def test_treatment_plan_update_changes_cache_key(client, module):
+    assert ensure_data_version_triggers()
+    context, plan = seed_report_data()
+    before = report_cache_key(context.id, [module])
+
+    response = client.put(f'/api/treatment_plans/{plan.id}', json={'risk_treatment_measures': 'Шифрование'})
+    assert response.status_code == 200
+
+    assert report_cache_key(context.id, [module]) != before
+
+
+def cached_report(path, size, days_unused):
+    """Отчет кэша с файлом заданного размера, не использовавшийся days_unused дней"""
+    path.write_bytes(b'x' * size)
+    report = Report(name=path.name, file_path=str(path), file_size=size)
+    db.session.add(ReportCacheEntry(
+        cache_key=path.name, report=report, last_used_at=datetime.utcnow() - timedelta(days=days_unused)
+    ))
+    db.session.commit()
+    return report
+
+
+def test_eviction_ignores_reports_outside_cache(app, tmp_path):
+    legacy = tmp_path / 'legacy_report.pdf'
+    legacy.write_bytes(b'x' * 1000)
+    cached = cached_report(tmp_path / 'cached.pdf', 100, days_unused=1)
+
+    assert evict_report_cache(max_bytes=500) == 0
+    assert legacy.exists()
+    assert db.session.get(Report, cached.id) is not None
+
+
+def test_eviction_keeps_report_being_returned(app, tmp_path):
+    fresh = cached_report(tmp_path / 'fresh.pdf', 100, days_unused=40)
+    older = cached_report(tmp_path / 'older.pdf', 100, days_unused=10)
+    fresh_id, older_id = fresh.id, older.id
+
+    assert evict_report_cache(max_bytes=150, max_age_days=30, keep_report_id=fresh_id) == 1
+    assert (tmp_path / 'fresh.pdf').exists()
+    assert not (tmp_path / 'older.pdf').exists()
+    assert db.session.get(Report, fresh_id) is not None
+    assert db.session.get(Report, older_id) is None
+
+
+def test_eviction_clears_job_reference(app, tmp_path):
+    report = cached_report(tmp_path / 'old.pdf', 100, days_unused=40)
+    job = ReportJob(modules='[]', status='done', report_id=report.id)
+    db.session.add(job)
+    db.session.commit()
+
+    assert evict_report_cache(max_age_days=30) == 1
+    db.session.expire_all()
+    job = db.session.get(ReportJob, job.id)
+    assert job.report_id is None
+    assert job.to_dict()['download_url'] is None
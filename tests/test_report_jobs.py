@@ -0,0 +1,29 @@
+from app import db
+from app.models import ReportJob
+from app.utils.report_jobs import run_report_job
+
+
+def test_job_failing_before_generation_is_marked_failed(app):
+    # Ошибка при чтении задачи (до формирования отчета) не оставляет ее в очереди
+    job = ReportJob(modules='not json', status='queued')
+    db.session.add(job)
+    db.session.commit()
+
+    run_report_job(app, job.id)
+
+    db.session.expire_all()
+    job = db.session.get(ReportJob, job.id)
+    assert job.status == 'failed'
+    assert job.error
+    assert job.finished_at is not None
+
+
+def test_claimed_job_is_not_run_twice(app):
+    job = ReportJob(modules='[]', status='running')
+    db.session.add(job)
+    db.session.commit()
+
+    run_report_job(app, job.id)
+
+    db.session.expire_all()
+    assert db.session.get(ReportJob, job.id).status == 'running'
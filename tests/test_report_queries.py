@@ -0,0 +1,50 @@
+import json
+
+from app import db
+from app.models import Asset, AssetDependency, AssetSecurityPropertyImpact, Context, ImpactCriterion
+
+SECURITY_PROPERTIES = ['confidentiality', 'integrity', 'availability']
+
+# Контекст, активы, контекст со шкалой стоимости, оценки по свойствам ИБ,
+# критерии влияния, зависимости
+ASSETS_SECTION_QUERIES = 6
+
+
+def add_assets(context, criteria, count):
+    """count активов с оценками по всем свойствам и критериям и зависимостью от предыдущего"""
+    previous = None
+    for number in range(count):
+        asset = Asset(
+            name=f'Актив {len(context.assets)}', type='information', context=context,
+            properties=json.dumps({'confidentiality': True, 'integrity': True})
+        )
+        db.session.add(asset)
+        for prop in SECURITY_PROPERTIES:
+            for criterion in criteria:
+                db.session.add(AssetSecurityPropertyImpact(
+                    asset=asset, security_property=prop, impact_criterion=criterion, impact_value='С'
+                ))
+        if previous is not None:
+            db.session.add(AssetDependency(asset=asset, depends_on_asset=previous))
+        previous = asset
+    db.session.commit()
+
+
+def test_assets_section_query_count_is_constant(count_queries):
+    from app.utils.report_utils import load_assets_section
+
+    context = Context(name='Объект', selected_impact_criteria=json.dumps(['Финансовые потери']))
+    criteria = [ImpactCriterion(name=f'Критерий {number}') for number in range(4)]
+    db.session.add_all([context] + criteria)
+    db.session.commit()
+    context_id = context.id
+
+    add_assets(context, criteria, 5)
+    small = count_queries(load_assets_section, context_id)
+
+    context = db.session.get(Context, context_id)
+    criteria = ImpactCriterion.query.all()
+    add_assets(context, criteria, 15)
+    large = count_queries(load_assets_section, context_id)
+
+    assert small == large == ASSETS_SECTION_QUERIES
@@ -0,0 +1,41 @@
+import gc
+import pickle
+import weakref
+
+
+def test_shared_cells_are_reused_and_freed_with_stylesheet(app):
+    from app.utils.report_utils import create_cyrillic_style_sheet, create_table_data_with_wrapping
+
+    styles = create_cyrillic_style_sheet()
+    data = create_table_data_with_wrapping([['Н', 'С'], ['Н', 'С']], styles)
+    assert data[0][0] is data[1][0]
+
+    cell = weakref.ref(data[0][0])
+    del styles, data
+    gc.collect()
+    assert cell() is None
+
+
+def test_sections_are_loaded_as_plain_data_in_pool(app):
+    from app.utils.report_utils import (
+        SECTION_LOADERS, create_cyrillic_style_sheet, gather_report_sections
+    )
+    from tests.test_report_cache import seed_report_data
+
+    context_id = seed_report_data()[0].id
+    modules = ['risks', 'assets', 'unknown', 'threats', 'incidents', 'vulnerabilities']
+
+    # Разметка разделов не содержит объектов reportlab и передается между процессами
+    for loader in SECTION_LOADERS.values():
+        items = loader(context_id)
+        assert items and pickle.loads(pickle.dumps(items)) == items
+
+    layouts = {}
+    for workers in (1, 5):
+        app.config['REPORT_SECTION_WORKERS'] = workers
+        ready = []
+        sections = gather_report_sections(context_id, modules, create_cyrillic_style_sheet(), ready.append)
+        assert sorted(ready) == sorted(SECTION_LOADERS)
+        layouts[workers] = [[type(element).__name__ for element in section] for section in sections]
+    assert layouts[1] == layouts[5]
+    assert layouts[5][modules.index('unknown')] == []
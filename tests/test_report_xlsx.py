@@ -0,0 +1,29 @@
+from openpyxl import load_workbook
+
+from app import db
+from app.models import Asset, Context
+from app.utils.report_xlsx import generate_combined_xlsx_report
+
+
+def test_xlsx_cells_are_sanitized(app, tmp_path):
+    context = Context(name='=HYPERLINK("http://example.com")', description='Строка\x00 с\x1b символами')
+    db.session.add(context)
+    db.session.flush()
+    db.session.add_all([
+        Asset(context_id=context.id, name='+79990000000', type='hardware'),
+        Asset(context_id=context.id, name='@SUM(A1)', type='hardware'),
+        Asset(context_id=context.id, name='Сервер - основной', type='hardware', asset_cost=-5.0)
+    ])
+    db.session.commit()
+    output_path = tmp_path / 'report.xlsx'
+
+    generate_combined_xlsx_report(context.id, ['assets'], str(output_path))
+
+    workbook = load_workbook(output_path)
+    context_row = [cell.value for cell in workbook['Контекст'][2]]
+    assert context_row[1] == '\'=HYPERLINK("http://example.com")'
+    assert context_row[3] == 'Строка с символами'
+    assets = [[cell.value for cell in row] for row in workbook['Активы'].iter_rows(min_row=2)]
+    assert [row[1] for row in assets] == ["'+79990000000", "'@SUM(A1)", 'Сервер - основной']
+    assert assets[2][7] == -5
+    assert all(cell.data_type != 'f' for sheet in workbook.worksheets for row in sheet.iter_rows() for cell in row)
@@ -0,0 +1,52 @@
+import pytest
+
+from app import db
+from app.models import Vulnerability
+from app.utils.search_utils import SEARCH_INDEXES, ensure_search_index, fts_table, search_catalogs
+
+
+@pytest.fixture
+def search_index(app):
+    assert ensure_search_index()
+    yield
+    # FTS-таблицы не входят в метаданные моделей, drop_all их не удаляет
+    with db.engine.begin() as connection:
+        for entity in SEARCH_INDEXES:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts_table(entity)}")
+
+
+def found_ids(text):
+    results, _ = search_catalogs(text, types=['vulnerabilities'])
+    return [result['id'] for result in results]
+
+
+def test_vulnerability_search_survives_rowid_renumbering(search_index):
+    db.session.add_all([
+        Vulnerability(id='BDU:2024-00001', name='Переполнение буфера в веб-сервере'),
+        Vulnerability(id='BDU:2024-00002', name='Внедрение SQL-кода в панели управления')
+    ])
+    db.session.commit()
+    assert found_ids('буфера') == ['BDU:2024-00001']
+
+    # Неявный rowid таблицы с текстовым ключом меняется без триггеров
+    # (так бывает после VACUUM или выгрузки и загрузки БД)
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE vulnerabilities SET rowid = rowid + 100")
+
+    assert found_ids('буфера') == ['BDU:2024-00001']
+    assert found_ids('панели') == ['BDU:2024-00002']
+
+
+def test_vulnerability_search_follows_updates_and_deletes(search_index):
+    vulnerability = Vulnerability(id='BDU:2024-00003', name='Обход аутентификации')
+    db.session.add(vulnerability)
+    db.session.commit()
+
+    vulnerability.name = 'Повышение привилегий'
+    db.session.commit()
+    assert found_ids('аутентификации') == []
+    assert found_ids('привилегий') == ['BDU:2024-00003']
+
+    db.session.delete(vulnerability)
+    db.session.commit()
+    assert found_ids('привилегий') == []
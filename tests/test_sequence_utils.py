@@ -0,0 +1,79 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from app import create_app, db
+from app.models import Vulnerability
+from app.utils import sequence_utils
+from app.utils.sequence_utils import allocate_sequence_block, next_sequence_value
+
+PROCESSES = 3
+THREADS = 4
+VALUES_PER_THREAD = 100
+BLOCK_SIZE = 50
+
+
+@pytest.fixture(autouse=True)
+def clean_sequence_cache(monkeypatch):
+    # Таблицы пересоздаются для каждого теста, кэш процесса - тоже
+    monkeypatch.setattr(sequence_utils, '_blocks', {})
+    monkeypatch.setattr(sequence_utils, '_created_sequences', set())
+
+
+def allocate_in_threads(queue):
+    """Процесс-воркер: THREADS потоков берут номера по одному и блоками"""
+    sequence_utils._blocks.clear()
+    sequence_utils._created_sequences.clear()
+    app = create_app()
+    values = []
+    lock = threading.Lock()
+
+    def worker():
+        with app.app_context():
+            allocated = [next_sequence_value('incidents') for _ in range(VALUES_PER_THREAD)]
+            first = allocate_sequence_block('incidents', BLOCK_SIZE)
+            allocated.extend(range(first, first + BLOCK_SIZE))
+        with lock:
+            values.extend(allocated)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put(values)
+
+
+def test_sequence_values_are_unique_across_processes_and_threads(app):
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    processes = [context.Process(target=allocate_in_threads, args=(queue,)) for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    results = [queue.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    values = [value for result in results for value in result]
+    assert len(values) == PROCESSES * THREADS * (VALUES_PER_THREAD + BLOCK_SIZE)
+    assert len(set(values)) == len(values)
+    assert min(values) >= 1
+
+
+def test_vulnerability_id_skips_manually_assigned_ids(app, client):
+    db.session.add(Vulnerability(id='BDU:2024-00001', name='Из БДУ'))
+    db.session.commit()
+    first = client.post('/api/vulnerabilities/', json={'name': 'Первая'}).get_json()['id']
+
+    # id, заданный вручную далеко впереди последовательности, пропускается
+    # одним сдвигом последовательности, а не перебором номеров
+    taken = str(int(first) + 1)
+    far = str(int(first) + 10000)
+    db.session.add_all([Vulnerability(id=taken, name='Вручную'), Vulnerability(id=far, name='Вручную')])
+    db.session.commit()
+
+    response = client.post('/api/vulnerabilities/', json={'name': 'Вторая'})
+    assert response.status_code == 201
+    assert response.get_json()['id'] == str(int(far) + 1)
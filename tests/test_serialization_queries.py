@@ -0,0 +1,34 @@
+from app import db
+from app.models import Asset, Context, Incident, Risk, Threat, Vulnerability
+from app.utils.serialization_utils import serialize_incidents, serialize_risks
+
+
+def add_incidents(count):
+    """count инцидентов с рисками; у каждого свой контекст, актив, угроза и уязвимость"""
+    start = Incident.query.count()
+    for number in range(start, start + count):
+        context = Context(name=f'Контекст {number}')
+        asset = Asset(name=f'Актив {number}', type='information', context=context)
+        threat = Threat(name=f'Угроза {number}')
+        vulnerability = Vulnerability(id=f'V{number}', name=f'Уязвимость {number}')
+        incident = Incident(asset=asset, threat=threat, vulnerability=vulnerability, scenario_name=f'СИ{number}')
+        db.session.add_all([context, asset, threat, vulnerability, incident, Risk(incident=incident, risk_score=1)])
+    db.session.commit()
+
+
+def test_incident_listing_query_count_does_not_grow(count_queries):
+    add_incidents(10)
+    small = count_queries(serialize_incidents, Incident.query)
+    add_incidents(20)
+    large = count_queries(serialize_incidents, Incident.query)
+    assert small == large
+    assert large <= 4
+
+
+def test_risk_listing_query_count_does_not_grow(count_queries):
+    add_incidents(10)
+    small = count_queries(serialize_risks, Risk.query)
+    add_incidents(20)
+    large = count_queries(serialize_risks, Risk.query)
+    assert small == large
+    assert large <= 5